@@ -1,16 +1,76 @@
 import os
+import time
+
+_t_start = time.perf_counter()
 from lark import Lark
+_t_lark = time.perf_counter()
 
 # Ruta al archivo BabyDuck.lark
 GRAMMAR_PATH = os.path.join(os.path.dirname(__file__), "BabyDuck.lark")
 
+# Opciones del parser; forman parte de la llave de la caché de tablas
+PARSER_OPTIONS = {
+    "parser": "lalr",
+    "start": "programa",
+}
+
+# Tiempos de arranque en segundos, para el reporte de main.py --startup-report
+STARTUP_TIMES = {}
+# 'hit', 'miss' u 'off' según se usaron o no las tablas LALR guardadas
+PARSER_CACHE_STATE = 'off'
+
+def parser_cache_path(name='babyduck_parser'):
+    """
+    Archivo donde se guardan las tablas LALR. Lark guarda junto con ellas
+    un hash de la gramática y las opciones, así que un cambio en
+    BabyDuck.lark invalida el archivo y las tablas se reconstruyen.
+    Se desactiva con BABYDUCK_PARSER_CACHE=0.
+    """
+    if os.environ.get('BABYDUCK_PARSER_CACHE') == '0':
+        return None
+    from semantic.compile_cache import default_cache_dir
+    return os.path.join(default_cache_dir(), name + '.lark')
+
+def build_parser(grammar=None, cache_name='babyduck_parser', **options):
+    """
+    Construye un parser LALR de BabyDuck, usando la caché de tablas si existe.
+    Las opciones extra se pasan a Lark (p. ej. transformer= para aplicar
+    acciones semánticas al reducir, sin construir el árbol) y reemplazan a
+    las de PARSER_OPTIONS. Un parser con otras reglas iniciales necesita
+    su propio cache_name, pues sus tablas son distintas.
+    """
+    global PARSER_CACHE_STATE
+    grammar = _grammar if grammar is None else grammar
+    options = {**PARSER_OPTIONS, **options}
+    cache_path = parser_cache_path(cache_name)
+    if cache_path is None:
+        PARSER_CACHE_STATE = 'off'
+        return Lark(grammar, **options)
+
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        before = os.stat(cache_path).st_mtime_ns
+    except OSError:
+        before = None
+    result = Lark(grammar, cache=cache_path, **options)
+    try:
+        after = os.stat(cache_path).st_mtime_ns
+    except OSError:
+        after = None
+    PARSER_CACHE_STATE = 'hit' if before is not None and before == after else 'miss'
+    return result
+
 # Carga la gramatica una sola vez
 with open(GRAMMAR_PATH, 'r', encoding='utf-8') as f:
     _grammar = f.read()
+_t_grammar = time.perf_counter()
 
 # Crea y exporta el parser
-parser = Lark(
-    _grammar,
-    parser="lalr",
-    start="programa",
-)
+parser = build_parser(_grammar)
+_t_parser = time.perf_counter()
+
+STARTUP_TIMES.update({
+    'import_lark': _t_lark - _t_start,
+    'read_grammar': _t_grammar - _t_lark,
+    'build_tables': _t_parser - _t_grammar,
+})
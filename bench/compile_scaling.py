@@ -0,0 +1,156 @@
+# bench/compile_scaling.py
+"""
+Tiempo de compilación contra tamaño del programa.
+
+Genera programas con N ciclos while (cada uno con un if anidado) y mide
+el parseo y el análisis semántico para cada N. Si la generación de código
+es lineal, el tiempo por ciclo se mantiene constante al crecer N; si es
+cuadrática, crece en proporción a N.
+
+Con --incremental, cada tamaño es una cantidad de funciones: se compila
+el programa, se edita una sola función y se compara la recompilación
+con IncrementalCompiler contra una compilación completa. Si la
+recompilación incremental es casi constante, su tiempo no crece con N.
+
+Uso:
+    python bench/compile_scaling.py [--sizes 1000,4000,16000] [--streaming]
+    python bench/compile_scaling.py --incremental [--sizes 100,400,1600] [--repeat 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def generate(loops: int) -> str:
+    """Programa con `loops` ciclos while consecutivos en el main."""
+    lines = ["program scaling;", "var i, s: int;", "main {", "    s = 0;"]
+    for k in range(loops):
+        lines += [
+            "    i = 0;",
+            "    while (i < 3) do {",
+            f"        if (i > 1) {{ s = s + {k}; }} else {{ s = s - 1; }};",
+            "        i = i + 1;",
+            "    };",
+        ]
+    lines += ["    print(s);", "} end"]
+    return "\n".join(lines) + "\n"
+
+def generate_functions(functions: int, edit: int = 0) -> str:
+    """
+    Programa con `functions` funciones (un ciclo con un if cada una) que
+    el main llama en orden. edit cambia una constante de la función del
+    medio, de modo que sólo esa función difiere entre ediciones.
+    """
+    lines = ["program incremental;", "var s: int;"]
+    for k in range(functions):
+        step = k + edit if k == functions // 2 else k
+        lines += [
+            f"void f{k}(n: int) var i: int; {{",
+            "    i = 0;",
+            "    while (i < n) do {",
+            f"        if (i > 1) {{ s = s + {step}; }} else {{ s = s - 1; }};",
+            "        i = i + 1;",
+            "    };",
+            "};",
+        ]
+    lines += ["main {", "    s = 0;"]
+    lines += [f"    f{k}(3);" for k in range(functions)]
+    lines += ["    print(s);", "} end"]
+    return "\n".join(lines) + "\n"
+
+def measure_incremental(functions: int, repeat: int):
+    """
+    Returns:
+        Medianas en segundos de recompilar tras editar una función:
+        completa, incremental en memoria e incremental leyendo y
+        guardando el estado en disco (como main.py --incremental)
+    """
+    from main import compile_source
+    from semantic.incremental import IncrementalCompiler
+
+    compiler = IncrementalCompiler()
+    compiler.compile(generate_functions(functions))
+    full, incremental, with_state = [], [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'programa.state')
+        compiler.save(path)
+        for edit in range(1, repeat + 1):
+            code = generate_functions(functions, edit)
+
+            t0 = time.perf_counter()
+            compile_source(code)
+            full.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            compiler.compile(code)
+            incremental.append(time.perf_counter() - t0)
+            if compiler.recompiled != [f"f{functions // 2}"]:
+                raise RuntimeError(f"Se recompiló {compiler.recompiled}, se esperaba una función")
+
+            t0 = time.perf_counter()
+            stored = IncrementalCompiler.load(path)
+            stored.compile(code)
+            stored.save(path)
+            with_state.append(time.perf_counter() - t0)
+    return tuple(statistics.median(samples) for samples in (full, incremental, with_state))
+
+def measure(code: str, streaming: bool):
+    """
+    Returns:
+        (tiempos por fase en segundos, cuádruplos generados), sin optimizar
+    """
+    from main import compile_source
+    timings = {}
+    program = compile_source(code, timings, streaming=streaming, optimize=False)
+    if streaming:
+        phases = {'parseo + análisis': timings['parse_and_analysis']}
+    else:
+        phases = {'parseo': timings['parse'], 'análisis': timings['analysis']}
+    return phases, len(program.quadruples)
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--sizes", default=None,
+                            help="cantidades de ciclos (o de funciones con --incremental), "
+                                 "separadas por comas")
+    arg_parser.add_argument("--streaming", action="store_true",
+                            help="mide el análisis sin árbol en lugar del Transformer")
+    arg_parser.add_argument("--incremental", action="store_true",
+                            help="mide la recompilación tras editar una función")
+    arg_parser.add_argument("--repeat", type=int, default=5,
+                            help="ediciones medidas por tamaño con --incremental")
+    args = arg_parser.parse_args(argv)
+
+    if args.incremental:
+        sizes = [int(x) for x in (args.sizes or "100,400,1600").split(",")]
+        measure_incremental(2, 1)
+        print(f"{'funciones':>10} {'completa ms':>12} {'incremental ms':>15} "
+              f"{'con estado ms':>14} {'aceleración':>12}")
+        for functions in sizes:
+            full, incremental, with_state = measure_incremental(functions, args.repeat)
+            print(f"{functions:>10} {full * 1e3:>12.1f} {incremental * 1e3:>15.1f} "
+                  f"{with_state * 1e3:>14.1f} {full / incremental:>11.1f}x")
+        return
+
+    sizes = [int(x) for x in (args.sizes or "1000,4000,16000").split(",")]
+    # Calentamiento: construir el parser no es parte de la medición
+    phases, _ = measure(generate(1), args.streaming)
+
+    header = f"{'ciclos':>8} {'cuádruplos':>11}"
+    for name in phases:
+        header += f" {name + ' µs/ciclo':>26}"
+    print(header)
+    for loops in sizes:
+        phases, quads = measure(generate(loops), args.streaming)
+        row = f"{loops:>8} {quads:>11}"
+        for seconds in phases.values():
+            row += f" {seconds / loops * 1e6:>26.1f}"
+        print(row)
+
+if __name__ == "__main__":
+    main()
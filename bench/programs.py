@@ -0,0 +1,86 @@
+# bench/programs.py
+"""
+Programas BabyDuck para medir la máquina virtual. Cada generador recibe
+un tamaño N y devuelve el código fuente; el trabajo ejecutado crece en
+proporción a N.
+"""
+
+def arithmetic(n: int) -> str:
+    """Ciclo cerrado con aritmética entera y flotante."""
+    return f"""program bench_arith;
+var i, s, t: int;
+var x: float;
+main {{
+    i = 0; s = 0; x = 0.0;
+    while (i < {n}) do {{
+        t = i * 3 + 7;
+        s = s + t - i / 2;
+        x = x + 0.5 * 2.0;
+        i = i + 1;
+    }};
+    print(s, " ", x);
+}} end
+"""
+
+def nested(n: int) -> str:
+    """Dos ciclos anidados, con un if en el ciclo interno; n iteraciones internas."""
+    inner = 100
+    outer = max(1, n // inner)
+    return f"""program bench_nested;
+var i, j, s: int;
+main {{
+    i = 0; s = 0;
+    while (i < {outer}) do {{
+        j = 0;
+        while (j < {inner}) do {{
+            if (j > i) {{ s = s + 1; }} else {{ s = s - 1; }};
+            j = j + 1;
+        }};
+        i = i + 1;
+    }};
+    print(s);
+}} end
+"""
+
+def calls(n: int) -> str:
+    """n llamadas a una función con dos parámetros y una variable local."""
+    return f"""program bench_calls;
+var i, s: int;
+void step(a: int, b: int)
+var t: int;
+{{
+    t = a * b;
+    s = s + t - a;
+}};
+main {{
+    i = 0; s = 0;
+    while (i < {n}) do {{
+        step(i, 3);
+        i = i + 1;
+    }};
+    print(s);
+}} end
+"""
+
+def prints(n: int) -> str:
+    """n estatutos print con cadenas, enteros y flotantes."""
+    return f"""program bench_prints;
+var i: int;
+var x: float;
+main {{
+    i = 0; x = 0.0;
+    while (i < {n}) do {{
+        print("linea ", i, " valor ", x);
+        x = x + 0.25;
+        i = i + 1;
+    }};
+}} end
+"""
+
+# Nombre -> (generador, tamaño por omisión)
+PROGRAMS = {
+    'arithmetic': (arithmetic, 200_000),
+    'nested': (nested, 200_000),
+    'calls': (calls, 100_000),
+    'prints': (prints, 100_000),
+}
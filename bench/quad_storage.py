@@ -0,0 +1,118 @@
+# bench/quad_storage.py
+"""
+Memoria y tiempo de carga de los cuádruplos: lista de tuplas contra QuadStore.
+
+Para cada tamaño compila un programa de bench/compile_scaling.py y mide:
+  - memoria: bytes asignados (tracemalloc) al construir cada representación
+    con los mismos cuádruplos, por cuádruplo
+  - construcción: tiempo de hacer append de todos los cuádruplos y
+    rellenar sus saltos, como lo hace el analizador
+  - iteración: un recorrido completo desempacando cada cuádruplo
+  - carga: Interpreter(...) (enlace y carga en la tabla de pasos) desde cada una
+
+Uso:
+    python bench/quad_storage.py [--sizes 1000,4000,16000] [--repeat 5]
+"""
+
+import argparse
+import gc
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compile_scaling import generate
+from semantic.quad_store import QuadStore
+
+def allocated(build) -> int:
+    """Bytes que quedan asignados por el objeto que devuelve build()."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+def timed(action, repeat: int) -> float:
+    """Mediana en segundos de repeat ejecuciones de action()."""
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        action()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+def tuples(quads):
+    """
+    Tuplas nuevas que comparten los operandos con quads: no cuenta los
+    enteros de las direcciones, así que es una cota baja para la lista.
+    """
+    return [(op, left, right, result) for op, left, right, result in quads]
+
+def build(container, quads):
+    """Agrega los cuádruplos con los saltos vacíos y luego los rellena."""
+    jumps = []
+    for index, (op, left, right, result) in enumerate(quads):
+        if op in ('GOTO', 'GOTOF'):
+            jumps.append((index, result))
+            result = None
+        container.append((op, left, right, result))
+    if isinstance(container, QuadStore):
+        for index, target in jumps:
+            container.patch(index, target)
+    else:
+        for index, target in jumps:
+            op, left, right, _ = container[index]
+            container[index] = (op, left, right, target)
+    return container
+
+def scan(quads) -> int:
+    count = 0
+    for op, left, right, result in quads:
+        count += 1
+    return count
+
+def measure(loops: int, repeat: int) -> dict:
+    from main import compile_source
+    from semantic.interpreter import Interpreter
+    from semantic.output import MemorySink
+
+    program = compile_source(generate(loops), optimize=False)
+    source = list(program.quadruples)
+    representations = {'tuplas': lambda: tuples(source),
+                       'QuadStore': lambda: QuadStore(source)}
+    row = {'cuádruplos': len(source)}
+    for name, make in representations.items():
+        row[f'{name} B/cuád'] = allocated(make) / len(source)
+        empty = list if name == 'tuplas' else QuadStore
+        row[f'{name} construir ms'] = timed(lambda: build(empty(), source), repeat) * 1e3
+        quads = make()
+        row[f'{name} iterar ms'] = timed(lambda: scan(quads), repeat) * 1e3
+        row[f'{name} cargar ms'] = timed(
+            lambda: Interpreter(quads, program.global_vars, program.func_dir, program.memory,
+                                output=MemorySink()), repeat) * 1e3
+    return row
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--sizes", default="1000,4000,16000",
+                            help="cantidades de ciclos, separadas por comas")
+    arg_parser.add_argument("--repeat", type=int, default=5, help="repeticiones por medición")
+    args = arg_parser.parse_args(argv)
+
+    rows = [measure(int(x), args.repeat) for x in args.sizes.split(",")]
+    columns = list(rows[0])
+    print("  ".join(f"{name:>20}" for name in columns))
+    for row in rows:
+        print("  ".join(f"{row[name]:>20.1f}" if isinstance(row[name], float) else f"{row[name]:>20}"
+                        for name in columns))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# bench/service_load.py
+"""
+Generador de carga para service.py.
+
+Abre varias conexiones al servicio y envía desde cada una peticiones una
+tras otra (o varias a la vez con --pipeline), midiendo la latencia de
+cada respuesta. Reporta peticiones por segundo, latencias p50/p90/p99 y
+máxima, y cuántas respuestas fueron errores, "busy" o "timeout".
+
+Uso:
+    python bench/service_load.py [--port 8765 | --unix RUTA]
+                                 [--program test/fibonacci.bd] [--action run]
+                                 [--connections 8] [--requests 400] [--pipeline 1]
+                                 [--output resultados.json]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from service import ACTIONS, DEFAULT_PORT, open_connection
+
+def percentile(values, fraction: float) -> float:
+    """Percentil por el método del rango más cercano."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+async def _client(args, payload: dict, counter, latencies: list, outcomes: Counter):
+    """Una conexión: envía peticiones del contador compartido, con --pipeline en vuelo."""
+    reader, writer = await open_connection(args.host, args.port, args.unix)
+    sent = {}
+    try:
+        for request_id in counter:
+            if request_id >= args.requests:
+                break
+            sent[request_id] = time.perf_counter()
+            writer.write(json.dumps({**payload, 'id': request_id}).encode('utf-8') + b"\n")
+            await writer.drain()
+            await _receive(reader, sent, latencies, outcomes, until=args.pipeline - 1)
+        await _receive(reader, sent, latencies, outcomes, until=0)
+    finally:
+        writer.close()
+
+async def _receive(reader, sent: dict, latencies: list, outcomes: Counter, until: int):
+    """Lee respuestas hasta que queden a lo más `until` peticiones en vuelo."""
+    while len(sent) > until:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("el servicio cerró la conexión")
+        response = json.loads(line)
+        started = sent.pop(response.get('id'), None)
+        if started is not None:
+            latencies.append(time.perf_counter() - started)
+        outcomes[response.get('error') or ('ok' if response.get('ok') else 'failed')] += 1
+
+async def run_load(args) -> dict:
+    with open(args.program, 'r', encoding='utf-8') as f:
+        payload = {'action': args.action, 'source': f.read()}
+    counter = itertools.count()
+    latencies = []
+    outcomes = Counter()
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_client(args, payload, counter, latencies, outcomes)
+                           for _ in range(args.connections)))
+    elapsed = time.perf_counter() - t0
+    return {
+        'program': args.program,
+        'action': args.action,
+        'connections': args.connections,
+        'pipeline': args.pipeline,
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed,
+        'latency': {
+            'p50': percentile(latencies, 0.50),
+            'p90': percentile(latencies, 0.90),
+            'p99': percentile(latencies, 0.99),
+            'max': max(latencies),
+            'mean': statistics.fmean(latencies),
+        },
+        'outcomes': dict(outcomes),
+    }
+
+def print_report(result: dict):
+    latency = result['latency']
+    print(f"{result['requests']} peticiones '{result['action']}' de {result['program']} "
+          f"en {result['seconds']:.2f} s con {result['connections']} conexiones "
+          f"({result['requests_per_second']:.1f} pet/s)")
+    print("latencia ms:  " + "  ".join(f"{name} {latency[name] * 1000:.2f}"
+                                       for name in ('p50', 'p90', 'p99', 'max')))
+    print("respuestas:   " + ", ".join(f"{count} {kind}"
+                                       for kind, count in sorted(result['outcomes'].items())))
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    arg_parser.add_argument("--unix", metavar="RUTA", help="socket Unix del servicio")
+    arg_parser.add_argument("--program", default="test/fibonacci.bd", help="programa a enviar")
+    arg_parser.add_argument("--action", choices=ACTIONS, default="run")
+    arg_parser.add_argument("--connections", type=int, default=8, help="conexiones simultáneas")
+    arg_parser.add_argument("--requests", type=int, default=400, help="peticiones en total")
+    arg_parser.add_argument("--pipeline", type=int, default=1,
+                            help="peticiones en vuelo por conexión")
+    arg_parser.add_argument("--output", help="guarda el resultado como JSON en este archivo")
+    args = arg_parser.parse_args(argv)
+    if min(args.connections, args.requests, args.pipeline) < 1:
+        arg_parser.error("--connections, --requests y --pipeline deben ser al menos 1")
+
+    result = asyncio.run(run_load(args))
+    print_report(result)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
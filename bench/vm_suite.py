@@ -0,0 +1,214 @@
+# bench/vm_suite.py
+"""
+Benchmarks de la máquina virtual de BabyDuck.
+
+Compila y ejecuta cada programa de bench/programs.py varias veces y mide
+por separado el parseo, el análisis semántico, la optimización, la carga
+en el intérprete y Interpreter.execute. Reporta la mediana de cada fase y
+las instrucciones (cuádruplos ejecutados) por segundo.
+
+Los resultados se pueden guardar como JSON y compararse contra una línea
+base guardada: una fase cuya mediana supera la de la base en más de la
+tolerancia se marca como regresión y el proceso termina con código 1.
+
+Uso:
+    python bench/vm_suite.py [--programs arithmetic,calls] [--scale 1.0]
+                             [--repeat 5] [--engine table]
+                             [--output resultados.json]
+                             [--baseline base.json] [--tolerance 0.10]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from programs import PROGRAMS
+from semantic.interpreter import ENGINES
+
+PHASES = ('parse', 'analysis', 'optimize', 'load', 'execute')
+
+# Diferencia mínima en segundos para marcar una regresión: las fases de
+# compilación de estos programas duran menos de un milisegundo y su ruido
+# relativo es grande
+MIN_DELTA = 0.001
+
+def compile_program(code: str, timings: dict):
+    from main import compile_source
+    return compile_source(code, timings)
+
+def run_once(code: str, engine: str) -> dict:
+    """
+    Compila y ejecuta el programa una vez.
+    Returns:
+        segundos por fase
+    """
+    from semantic.interpreter import Interpreter
+    from semantic.output import MemorySink
+
+    timings = {}
+    program = compile_program(code, timings)
+    t0 = time.perf_counter()
+    if engine == 'aot':
+        # Traducción y compile() sin caché: cuentan como carga
+        from semantic.aot import load
+        interpreter = load(program, MemorySink())
+    else:
+        interpreter = Interpreter(program.quadruples, program.global_vars, program.func_dir,
+                                  program.memory, engine=engine, output=MemorySink())
+    t1 = time.perf_counter()
+    interpreter.execute()
+    t2 = time.perf_counter()
+    return {
+        'parse': timings['parse'],
+        'analysis': timings['analysis'],
+        'optimize': timings.get('optimize', 0.0),
+        'load': t1 - t0,
+        'execute': t2 - t1,
+    }
+
+def count_instructions(code: str) -> (int, int):
+    """
+    Ejecuta el programa una vez, fuera de la medición, contando los pasos
+    del motor por tabla sin superinstrucciones, así el conteo no depende
+    de cuántos pares se fusionaron.
+    Returns:
+        (cuádruplos generados, cuádruplos ejecutados)
+    """
+    from semantic.interpreter import Interpreter
+    from semantic.output import MemorySink
+
+    program = compile_program(code, {})
+    interpreter = Interpreter(program.quadruples, program.global_vars, program.func_dir,
+                              program.memory, output=MemorySink(), fuse=False)
+    executed = [0]
+    def counted(index, step):
+        def wrapper(ip):
+            executed[0] += 1
+            return step(ip)
+        return wrapper
+    interpreter.instrument(counted)
+    interpreter.execute()
+    return len(interpreter.quadruples), executed[0]
+
+def run_suite(names, scale: float, repeat: int, engine: str) -> dict:
+    results = {}
+    for name in names:
+        generate, default_size = PROGRAMS[name]
+        size = max(1, int(default_size * scale))
+        code = generate(size)
+        quadruples, executed = count_instructions(code)
+
+        samples = {phase: [] for phase in PHASES}
+        for _ in range(repeat):
+            for phase, seconds in run_once(code, engine).items():
+                samples[phase].append(seconds)
+
+        phases = {
+            phase: {'median': statistics.median(values), 'min': min(values)}
+            for phase, values in samples.items()
+        }
+        results[name] = {
+            'size': size,
+            'quadruples': quadruples,
+            'instructions': executed,
+            'instructions_per_second': executed / phases['execute']['median'],
+            'phases': phases,
+        }
+    return results
+
+def find_regressions(results: dict, baseline: dict, tolerance: float):
+    """
+    Compara las medianas contra la línea base. Sólo se comparan programas
+    medidos con el mismo tamaño, y una fase cuenta como regresión si
+    crece más que la tolerancia relativa y que MIN_DELTA.
+    Returns:
+        lista de (programa, fase, mediana base, mediana actual)
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if base is None or base['size'] != result['size']:
+            continue
+        for phase, stats in result['phases'].items():
+            base_stats = base['phases'].get(phase)
+            if base_stats is None:
+                continue
+            before, after = base_stats['median'], stats['median']
+            if after > before * (1 + tolerance) and after - before > MIN_DELTA:
+                regressions.append((name, phase, before, after))
+    return regressions
+
+def print_report(results: dict):
+    header = f"{'programa':<12} {'instrucciones':>13}"
+    for phase in PHASES:
+        header += f" {phase + ' ms':>12}"
+    header += f" {'instr/s':>12}"
+    print(header)
+    for name, result in results.items():
+        row = f"{name:<12} {result['instructions']:>13}"
+        for phase in PHASES:
+            row += f" {result['phases'][phase]['median'] * 1000:>12.2f}"
+        row += f" {result['instructions_per_second']:>12,.0f}"
+        print(row)
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--programs", default=",".join(PROGRAMS),
+                            help=f"programas a medir, separados por comas ({', '.join(PROGRAMS)})")
+    arg_parser.add_argument("--scale", type=float, default=1.0,
+                            help="factor sobre el tamaño por omisión de cada programa")
+    arg_parser.add_argument("--repeat", type=int, default=5,
+                            help="ejecuciones por programa; se reporta la mediana")
+    arg_parser.add_argument("--engine", choices=ENGINES + ('aot',), default="table", help="motor del intérprete")
+    arg_parser.add_argument("--output", help="archivo JSON donde guardar los resultados")
+    arg_parser.add_argument("--baseline", help="resultados JSON previos contra los cuales comparar")
+    arg_parser.add_argument("--tolerance", type=float, default=0.10,
+                            help="aumento relativo de la mediana que cuenta como regresión")
+    args = arg_parser.parse_args(argv)
+
+    names = [x for x in args.programs.split(",") if x]
+    unknown = [x for x in names if x not in PROGRAMS]
+    if unknown:
+        arg_parser.error(f"programas desconocidos: {', '.join(unknown)}")
+    if args.repeat < 1:
+        arg_parser.error("--repeat debe ser al menos 1")
+
+    # Calentamiento: construir el parser no es parte de la medición
+    compile_program(PROGRAMS[names[0]][0](1), {})
+
+    results = run_suite(names, args.scale, args.repeat, args.engine)
+    print_report(results)
+
+    document = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'engine': args.engine,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('engine') != args.engine:
+            print(f"Aviso: la línea base usa el motor '{baseline.get('engine')}'")
+        regressions = find_regressions(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegresiones (más de {args.tolerance:.0%} sobre la línea base):")
+            for name, phase, before, after in regressions:
+                print(f"  {name}.{phase}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms "
+                      f"({after / before - 1:+.0%})")
+            sys.exit(1)
+        print("\nSin regresiones contra la línea base.")
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,292 @@
+import time
+_T_START = time.perf_counter()
+
+import gc
 import sys
 import os
-from babyduck import parser
-from semantic.analyzer import SemanticAnalyzer, SemanticError
-from semantic.interpreter import Interpreter
+import argparse
+import json
+from semantic.interpreter import Interpreter, ENGINES
+from semantic.linker import LinkError
+from semantic.bytecode import BytecodeError
+from semantic.compile_cache import CompileCache
+from semantic.program import CompiledProgram
+from semantic.memory_manager import DEFAULT_SEGMENT_BITS, MAX_SEGMENT_BITS
+from semantic.output import DEFAULT_BUFFER_SIZE, StreamSink, stdout_sink
+from semantic.listing import LISTING_FORMATS, open_listing, write_listing
 
-from lark import UnexpectedInput
+_T_IMPORTS = time.perf_counter()
 
-def main():
-    # 1) Validacion de argumentos
-    if len(sys.argv) != 2:
-        print("Uso: python main.py <ruta_al_programa.bd>")
-        sys.exit(1)
+def parse_args(argv=None):
+    arg_parser = argparse.ArgumentParser(
+        description="Compila y ejecuta un programa BabyDuck."
+    )
+    arg_parser.add_argument("programa", help="ruta al programa .bd")
+    arg_parser.add_argument(
+        "--engine", choices=ENGINES + ('aot',), default="table",
+        help="motor de ejecución de cuádruplos; aot traduce el programa a Python "
+             "(por omisión: table)"
+    )
+    arg_parser.add_argument(
+        "--no-cache", action="store_true",
+        help="compila siempre, sin leer ni escribir la caché de programas"
+    )
+    arg_parser.add_argument(
+        "--cache-dir", default=None,
+        help="directorio de la caché (por omisión: $BABYDUCK_CACHE_DIR o ~/.cache/babyduck)"
+    )
+    arg_parser.add_argument(
+        "--streaming", action="store_true",
+        help="genera los cuádruplos durante el parseo, sin construir el árbol"
+    )
+    arg_parser.add_argument(
+        "--segment-bits", type=int, default=DEFAULT_SEGMENT_BITS,
+        help="bits de desplazamiento de cada segmento de memoria; cada uno admite "
+             f"2**N direcciones (por omisión: {DEFAULT_SEGMENT_BITS})"
+    )
+    arg_parser.add_argument(
+        "--no-optimize", action="store_true",
+        help="no aplica las optimizaciones sobre los cuádruplos"
+    )
+    arg_parser.add_argument(
+        "--incremental", action="store_true",
+        help="recompila sólo las funciones que cambiaron desde la última compilación"
+    )
+    arg_parser.add_argument(
+        "--output-buffer", type=int, default=DEFAULT_BUFFER_SIZE, metavar="N",
+        help="caracteres de salida acumulados antes de escribir; 0 escribe cada print "
+             f"al momento (por omisión: {DEFAULT_BUFFER_SIZE})"
+    )
+    arg_parser.add_argument(
+        "--no-fuse", action="store_true",
+        help="carga cada cuádruplo por separado, sin superinstrucciones"
+    )
+    arg_parser.add_argument(
+        "--fusion-report", action="store_true",
+        help="muestra cuántos pares de cuádruplos se cargaron como superinstrucciones"
+    )
+    arg_parser.add_argument(
+        "--profile", action="store_true",
+        help="cuenta y cronometra cada instrucción ejecutada y muestra las operaciones, "
+             "funciones, cuádruplos y ciclos más costosos"
+    )
+    arg_parser.add_argument(
+        "--profile-json", metavar="ARCHIVO",
+        help="guarda el perfil de ejecución en ARCHIVO como JSON (implica --profile)"
+    )
+    arg_parser.add_argument(
+        "--compile-report", action="store_true",
+        help="muestra tiempo y memoria de cada fase de compilación, cuádruplos por operación, "
+             "constantes y ocupación de cada segmento de memoria"
+    )
+    arg_parser.add_argument(
+        "--compile-report-json", metavar="ARCHIVO",
+        help="guarda el reporte de compilación en ARCHIVO como JSON (implica --compile-report)"
+    )
+    arg_parser.add_argument(
+        "--emit", choices=LISTING_FORMATS, default="text",
+        help="formato del listado de cuádruplos; se escribe conforme se generan "
+             "(por omisión: text)"
+    )
+    arg_parser.add_argument(
+        "--emit-file", metavar="ARCHIVO", default="-",
+        help="archivo del listado de cuádruplos (por omisión: - para la salida estándar)"
+    )
+    arg_parser.add_argument(
+        "--run-only", action="store_true",
+        help="sólo ejecuta: sin listado de cuádruplos, variables ni funciones"
+    )
+    arg_parser.add_argument(
+        "--batch", metavar="ENTRADAS",
+        help="ejecuta el programa una vez por conjunto de entrada, vectorizado con NumPy; "
+             "ENTRADAS es un JSON {global: [valor por carril] o valor para todos}"
+    )
+    arg_parser.add_argument(
+        "--batch-output", metavar="ARCHIVO", default="-",
+        help="JSONL con la salida, las globales finales y el error de cada carril de "
+             "--batch (por omisión: - para la salida estándar)"
+    )
+    arg_parser.add_argument(
+        "--startup-report", action="store_true",
+        help="muestra cómo se reparte el tiempo de arranque (imports, tablas LALR, parseo, análisis)"
+    )
+    return arg_parser.parse_args(argv)
 
-    filepath = sys.argv[1]
-    if not os.path.isfile(filepath):
-        print(f"Error: el archivo '{filepath}' no existe.")
-        sys.exit(1)
+def compile_source(code, timings=None, streaming=False, optimize=True,
+                   segment_bits=DEFAULT_SEGMENT_BITS, incremental=None, exit_on_error=True,
+                   listing=None):
+    """
+    Parsea, analiza y optimiza el código fuente; termina el proceso si hay
+    errores. Si se pasa un diccionario en timings, registra ahí los tiempos
+    de cada fase. Con streaming=True los cuádruplos se generan durante el
+    parseo, sin árbol. Con un IncrementalCompiler en incremental, éste
+    compila (y optimiza) sólo las funciones que cambiaron. Con
+    exit_on_error=False los errores de compilación se lanzan (ver
+    compile_error_message()) en lugar de terminar el proceso. Un
+    QuadListing en listing recibe los cuádruplos finales: sin optimizar,
+    conforme el análisis los genera; si no, al terminar la optimización.
+    """
+    # El árbol de parseo y los cuádruplos son millones de objetos sin
+    # ciclos: el recolector de basura sólo agregaría recorridos de todo el
+    # heap que crecen con el tamaño del programa
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        # El optimizador reescribe los cuádruplos: sólo se listan durante
+        # el análisis si éste produce los definitivos
+        streamed = listing if not optimize and incremental is None else None
+        program = _analyze_source(code, timings, streaming, segment_bits, incremental,
+                                  exit_on_error, streamed)
+        if optimize and incremental is None:
+            from semantic.optimizer import optimize as optimize_program
+            t0 = time.perf_counter()
+            optimize_program(program)
+            if timings is not None:
+                timings['optimize'] = time.perf_counter() - t0
+        if listing is not None and streamed is None:
+            write_listing(listing, program.quadruples)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return program
 
-    # 2) Leer el archivo fuente
-    with open(filepath, 'r', encoding='utf-8') as f:
-        code = f.read()
+def _analyze_source(code, timings=None, streaming=False, segment_bits=DEFAULT_SEGMENT_BITS,
+                    incremental=None, exit_on_error=True, listing=None):
+    """Parseo y análisis semántico de compile_source()."""
+    timings = {} if timings is None else timings
+    t0 = time.perf_counter()
+
+    # Lark y el parser se importan aquí: un acierto en caché no los carga
+    # ni construye las tablas LALR
+    import babyduck
+    from lark import UnexpectedInput
+    from lark.exceptions import VisitError
+    from semantic.analyzer import SemanticAnalyzer, SemanticError
+    from semantic.streaming import StreamingAnalyzer
+    t1 = time.perf_counter()
+    timings['import_compiler'] = t1 - t0
 
-    # 3) Parseo sintactico
     try:
-        tree = parser.parse(code)
-    except UnexpectedInput as e:
-        print(f"Sintaxis invalida en linea {e.line}, columna {e.column}")
-        sys.exit(1)
+        if incremental is not None:
+            program = incremental.compile(code)
+            timings['incremental'] = time.perf_counter() - t1
+            timings['recompiled'] = len(incremental.recompiled)
+            return program
+
+        if streaming:
+            # 3-4) Parseo con acciones semánticas en cada reducción
+            analyzer = StreamingAnalyzer(segment_bits)
+            if listing is not None:
+                analyzer.stream_to(listing)
+            analyzer.analyze(code)
+            timings['parse_and_analysis'] = time.perf_counter() - t1
+            return CompiledProgram.from_analyzer(analyzer)
 
-    # 4) Analisis semantico
-    analyzer = SemanticAnalyzer()
+        # 3) Parseo sintactico
+        tree = babyduck.parser.parse(code)
+        t2 = time.perf_counter()
+        timings['parse'] = t2 - t1
+
+        # 4) Analisis semantico
+        analyzer = SemanticAnalyzer(segment_bits)
+        if listing is not None:
+            analyzer.stream_to(listing)
+        try:
+            analyzer.transform(tree)
+        except VisitError as e:
+            # Lark envuelve las excepciones lanzadas por el Transformer
+            raise e.orig_exc
+        timings['analysis'] = time.perf_counter() - t2
+    except (UnexpectedInput, SemanticError, MemoryError) as e:
+        if not exit_on_error:
+            raise
+        _exit_with_compile_error(e)
+
+    return CompiledProgram.from_analyzer(analyzer)
+
+def compile_error_message(error):
+    """Mensaje de un error de sintaxis, semántico o de memoria al compilar."""
+    from lark import UnexpectedInput
+    if isinstance(error, UnexpectedInput):
+        return f"Sintaxis invalida en linea {error.line}, columna {error.column}"
+    elif isinstance(error, MemoryError):
+        return f"Error de memoria: {error}"
+    return f"Error semantico: {error}"
+
+def _exit_with_compile_error(error):
+    """Reporta un error de sintaxis, semántico o de memoria y termina el proceso."""
+    print(compile_error_message(error))
+    sys.exit(1)
+
+def cache_variant(optimize=True, segment_bits=DEFAULT_SEGMENT_BITS, incremental=False):
+    """Variante de CompileCache para las opciones de compilación dadas."""
+    variant = f"{'O1' if optimize else 'O0'}/b{segment_bits}"
+    if incremental:
+        # El código se optimiza por unidad y puede diferir del de una compilación completa
+        variant += "/inc"
+    return variant
+
+def report_source(code, optimize=True, segment_bits=DEFAULT_SEGMENT_BITS):
+    """
+    Como compile_source() en modo con árbol, pero además devuelve el
+    reporte de compilación de semantic/compile_report.py.
+    """
+    from lark import UnexpectedInput
+    from semantic.analyzer import SemanticError
+    from semantic.compile_report import compile_with_report
     try:
-        analyzer.transform(tree)
-            # 5b) Mostrar cuádruplos generados
-        print("Cuádruplos generados:")
-        for i, quad in enumerate(analyzer.quadruples):
-            op, left, right, res = quad
-            print(f"{i:>3} : ( {op!r:7}, {left!r:5}, {right!r:5}, {res!r:5} )")
-        print()
+        return compile_with_report(code, segment_bits, optimize)
+    except (UnexpectedInput, SemanticError, MemoryError) as e:
+        _exit_with_compile_error(e)
 
+def print_startup_report(timings):
+    """Imprime el reparto del tiempo de arranque, en milisegundos."""
+    rows = [("imports de main.py", _T_IMPORTS - _T_START)]
+    if 'cache_lookup' in timings:
+        rows.append((f"caché de programas ({timings['cache_state']})", timings['cache_lookup']))
+    if 'import_compiler' in timings:
+        import babyduck
+        parser_times = babyduck.STARTUP_TIMES
+        rows += [
+            ("  importar lark", parser_times['import_lark']),
+            ("  leer gramática", parser_times['read_grammar']),
+            (f"  tablas LALR (caché: {babyduck.PARSER_CACHE_STATE})", parser_times['build_tables']),
+            ("  otros imports del compilador",
+             timings['import_compiler'] - sum(parser_times.values())),
+        ]
+        if 'incremental' in timings:
+            rows.append((f"compilación incremental ({timings['recompiled']} unidades)",
+                         timings['incremental']))
+        elif 'parse_and_analysis' in timings:
+            rows.append(("parseo + análisis (sin árbol)", timings['parse_and_analysis']))
+        else:
+            rows += [
+                ("parseo", timings['parse']),
+                ("análisis semántico", timings['analysis']),
+            ]
+    if 'optimize' in timings:
+        rows.append(("optimización", timings['optimize']))
+    if 'cache_store' in timings:
+        rows.append(("escritura en caché", timings['cache_store']))
+    rows.append(("total hasta ejecutar", timings['ready'] - _T_START))
 
-    except SemanticError as e:
-        print("Error semantico:", e)
-        sys.exit(1)
+    print("Reporte de arranque (ms):")
+    for label, seconds in rows:
+        print(f"  {label:<36} {seconds * 1000:9.2f}")
+    print()
 
+def print_program_summary(program):
+    """Imprime el éxito del análisis, las variables globales y las funciones declaradas."""
     # 5) Reporte de exito
     print("Analisis semantico exitoso\n")
 
     print("Variables globales:")
-    for name, entry in analyzer.global_vars.all_variables().items():
+    for name, entry in program.global_vars.all_variables().items():
         print(f"  • {name} : tipo={entry.var_type}, direccion={entry.address}")
     print()
 
     print("Funciones declaradas:")
-    for fname, fentry in analyzer.func_dir.all_functions().items():
+    for fname, fentry in program.func_dir.all_functions().items():
         print(f"  → Funcion '{fname}': retorna {fentry.return_type}, "
               f"parametros {fentry.param_types}, start_quad={fentry.start_quad}")
         vars_loc = fentry.variables.all_variables()
@@ -65,14 +298,202 @@ def main():
             print("\t(Sin variables locales)")
         print()
 
-    # 6) Ejecución del programa
-    print("Iniciando ejecución del programa...")
+def run_batch_inputs(program, inputs_path, output_path):
+    """
+    Ejecuta --batch: un carril por conjunto de entrada, y escribe una
+    línea JSON por carril en output_path ('-' es la salida estándar).
+    """
+    try:
+        from semantic.batch import BatchError, run_batch
+    except ImportError:
+        print("Error: --batch requiere NumPy (pip install numpy).")
+        sys.exit(1)
+    try:
+        with open(inputs_path, 'r', encoding='utf-8') as f:
+            inputs = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error: no se pudieron leer las entradas de --batch: {e}")
+        sys.exit(1)
+    if not isinstance(inputs, dict):
+        print("Error: las entradas de --batch deben ser un objeto JSON {global: valores}.")
+        sys.exit(1)
+
+    print("Iniciando ejecución por lotes...")
+    t0 = time.perf_counter()
+    try:
+        result = run_batch(program, inputs)
+    except (BatchError, LinkError) as e:
+        print(f"Error durante la ejecución: {e}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - t0
+
+    out = sys.stdout if output_path == '-' else open(output_path, 'w', encoding='utf-8')
+    try:
+        globals_ = {name: values.tolist() for name, values in result.globals.items()}
+        for lane in range(result.lanes):
+            record = {
+                'lane': lane,
+                'output': result.outputs[lane],
+                'globals': {name: values[lane] for name, values in globals_.items()},
+                'error': result.errors.get(lane),
+            }
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"\nLOTE TERMINADO: {result.lanes} carriles, {len(result.errors)} con error, "
+          f"{result.steps} instrucciones vectoriales, {elapsed * 1000:.1f} ms")
+
+def load_program(program, args, output, profile):
+    """
+    Carga el programa en el motor elegido; con --engine aot, si no se
+    puede traducir, avisa y usa table.
+    Returns:
+        (intérprete, motor usado)
+    """
+    engine = args.engine
+    if engine == 'aot':
+        from semantic.aot import AotCache, AotError, load as load_aot
+        try:
+            return load_aot(program, output,
+                            cache=None if args.no_cache else AotCache(args.cache_dir)), engine
+        except AotError as e:
+            print(f"Aviso: no se pudo traducir a Python ({e}); se usa el motor table.")
+            engine = 'table'
     interpreter = Interpreter(
-        quadruples=analyzer.quadruples,
-        global_vars=analyzer.global_vars,
-        func_dir=analyzer.func_dir,
-        memory=analyzer.memory
+        quadruples=program.quadruples,
+        global_vars=program.global_vars,
+        func_dir=program.func_dir,
+        memory=program.memory,
+        engine=engine,
+        output=output,
+        # El perfil cuenta cada cuádruplo por separado
+        fuse=not (args.no_fuse or profile)
     )
+    return interpreter, engine
+
+def main():
+    # 1) Validacion de argumentos
+    args = parse_args()
+
+    filepath = args.programa
+    if not os.path.isfile(filepath):
+        print(f"Error: el archivo '{filepath}' no existe.")
+        sys.exit(1)
+
+    # 2) Leer el archivo fuente
+    with open(filepath, 'r', encoding='utf-8') as f:
+        code = f.read()
+
+    # 3-4) Programa compilado: desde la caché o parseo + análisis
+    timings = {}
+    profile = args.profile or args.profile_json is not None
+    if profile and args.engine != 'table':
+        print("Error: --profile requiere --engine table.")
+        sys.exit(1)
+    if args.batch and profile:
+        print("Error: --profile no se combina con --batch.")
+        sys.exit(1)
+    compile_report = args.compile_report or args.compile_report_json is not None
+    if compile_report and (args.streaming or args.incremental):
+        print("Error: --compile-report no se combina con --streaming ni --incremental.")
+        sys.exit(1)
+    if not 1 <= args.segment_bits <= MAX_SEGMENT_BITS:
+        print(f"Error: --segment-bits debe estar entre 1 y {MAX_SEGMENT_BITS}.")
+        sys.exit(1)
+    variant = cache_variant(not args.no_optimize, args.segment_bits, args.incremental)
+    cache = None if args.no_cache else CompileCache(args.cache_dir, variant=variant)
+    listing = None
+    if not args.run_only:
+        try:
+            listing = open_listing(args.emit, args.emit_file, title="Cuádruplos generados:")
+        except OSError as e:
+            print(f"Error: no se pudo abrir el listado de cuádruplos: {e}")
+            sys.exit(1)
+    program = None
+    report = None
+    # El reporte necesita compilar, así que no se consulta la caché
+    if cache and not compile_report:
+        t0 = time.perf_counter()
+        program = cache.get(code)
+        timings['cache_lookup'] = time.perf_counter() - t0
+        timings['cache_state'] = 'acierto' if program is not None else 'fallo'
+    if program is None:
+        incremental = None
+        if args.incremental:
+            from semantic.incremental import IncrementalCompiler, state_path
+            incremental_path = state_path(filepath, args.cache_dir)
+            incremental = IncrementalCompiler.load(incremental_path, args.segment_bits,
+                                                   optimize=not args.no_optimize)
+        if compile_report:
+            program, report = report_source(code, optimize=not args.no_optimize,
+                                            segment_bits=args.segment_bits)
+        else:
+            program = compile_source(code, timings, streaming=args.streaming,
+                                     optimize=not args.no_optimize,
+                                     segment_bits=args.segment_bits,
+                                     incremental=incremental, listing=listing)
+            listing = None
+        if incremental is not None:
+            try:
+                incremental.save(incremental_path)
+            except OSError as e:
+                print(f"Aviso: no se pudo guardar el estado incremental: {e}")
+        if cache:
+            t0 = time.perf_counter()
+            try:
+                cache.put(code, program)
+            except (OSError, BytecodeError) as e:
+                # Sin entrada en caché el programa se vuelve a compilar la próxima vez
+                print(f"Aviso: no se pudo escribir la caché: {e}")
+            timings['cache_store'] = time.perf_counter() - t0
+    timings['ready'] = time.perf_counter()
+
+    if args.startup_report:
+        print_startup_report(timings)
+
+    if report is not None:
+        from semantic.compile_report import print_compile_report
+        print_compile_report(report)
+        if args.compile_report_json:
+            with open(args.compile_report_json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+
+    # 5b) Cuádruplos de un programa que no se compiló aquí (caché o reporte)
+    if listing is not None:
+        write_listing(listing, program.quadruples)
+
+    if not args.run_only:
+        print_program_summary(program)
+
+    # 6) Ejecución del programa
+    if args.batch:
+        run_batch_inputs(program, args.batch, args.batch_output)
+        return
+
+    output = stdout_sink(args.output_buffer) if args.output_buffer > 0 else StreamSink()
+    # Cargar el programa enlaza las llamadas y resuelve los operandos: sus
+    # errores se reportan igual que los de la ejecución
+    try:
+        interpreter, engine = load_program(program, args, output, profile)
+    except Exception as e:
+        print(f"Error durante la ejecución: {e}")
+        import traceback
+        traceback.print_exc()
+        return
+
+    if args.fusion_report and engine != 'aot':
+        print("Superinstrucciones cargadas:")
+        for kind, count in interpreter.fusions.items():
+            print(f"  {kind:<20} {count:>8}")
+        print()
+
+    if not args.run_only:
+        print("Iniciando ejecución del programa...")
+    profiler = None
+    if profile:
+        from semantic.profiler import Profiler
+        profiler = Profiler(interpreter)
 
     try:
         interpreter.execute()
@@ -80,5 +501,13 @@ def main():
         print(f"Error durante la ejecución: {e}")
         import traceback
         traceback.print_exc()
+
+    # 7) Perfil de ejecución, aun si el programa terminó con error
+    if profiler is not None:
+        from semantic.profiler import print_profile, save_profile
+        report = profiler.report()
+        print_profile(report)
+        if args.profile_json:
+            save_profile(report, args.profile_json)
 if __name__ == "__main__":
     main()
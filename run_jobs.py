@@ -0,0 +1,239 @@
+"""
+Compila y ejecuta muchos programas BabyDuck en paralelo.
+
+Cada proceso del pool importa el parser una sola vez al arrancar (con las
+tablas LALR de la caché) y después compila y ejecuta los programas que le
+tocan sin volver a pagar ese arranque. La salida de cada programa se
+captura en memoria. Cada trabajo produce una línea JSON en cuanto termina,
+con su salida, su estado, su código de salida y sus tiempos. Un trabajo
+que excede --timeout se corta con SIGALRM, como en service.py.
+
+Uso:
+    python run_jobs.py "test/*.bd" otro.bd [--jobs 4] [--output resultados.jsonl]
+                       [--engine table] [--no-optimize] [--no-cache]
+                       [--timeout 60]
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from semantic.interpreter import ENGINES
+
+# Estado de cada trabajo y el código de salida que le corresponde
+EXIT_STATUS = {
+    'ok': 0,
+    'read_error': 1,
+    'compile_error': 1,
+    'runtime_error': 2,
+    'timeout': 3,
+    'worker_error': 4,
+}
+
+# Segundos por trabajo (compilación y ejecución) si no se indica --timeout
+DEFAULT_TIMEOUT = 60.0
+
+# Opciones de los procesos del pool, fijadas por _warm_worker()
+_options = {}
+
+def expand(patterns):
+    """
+    Rutas de los programas: cada patrón es una ruta o un glob. Se quitan
+    los repetidos conservando el orden; un patrón sin coincidencias se
+    conserva tal cual para que su trabajo reporte el error de lectura.
+    """
+    paths = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        for path in matches:
+            if path not in seen:
+                seen.add(path)
+                paths.append(path)
+    return paths
+
+def _warm_worker(options):
+    """Inicializador del pool: guarda las opciones y construye el parser una vez."""
+    _options.update(options)
+    import babyduck  # noqa: F401 - construye las tablas LALR de este proceso
+    import semantic.analyzer  # noqa: F401
+    if options['engine'] == 'aot':
+        import semantic.aot  # noqa: F401
+
+class JobTimeout(Exception):
+    """Lanzada dentro del proceso de trabajo cuando un trabajo excede su tiempo."""
+    pass
+
+def _on_alarm(signum, frame):
+    raise JobTimeout()
+
+def run_job(index, path):
+    """
+    Compila y ejecuta un programa en el proceso actual. El límite de tiempo
+    se aplica con SIGALRM, así que un ciclo infinito no deja ocupado al proceso.
+    Returns:
+        Registro JSON del trabajo
+    """
+    record = {'index': index, 'path': path, 'pid': os.getpid(), 'status': 'ok',
+              'output': '', 'error': None, 'cache': None, 'timings': {}}
+    timeout = _options.get('timeout', DEFAULT_TIMEOUT)
+    t0 = time.perf_counter()
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return _run_job(record, path, t0)
+    except JobTimeout:
+        return _finish(record, 'timeout', f"excedió el límite de {timeout:g} s", t0)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def _run_job(record, path, t0):
+    """Lectura, compilación y ejecución de run_job(), dentro del límite de tiempo."""
+    from lark import UnexpectedInput
+    from main import cache_variant, compile_error_message, compile_source
+    from semantic.analyzer import SemanticError
+    from semantic.bytecode import BytecodeError
+    from semantic.compile_cache import CompileCache
+    from semantic.interpreter import Interpreter
+    from semantic.output import MemorySink
+
+    timings = record['timings']
+    output = MemorySink()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            code = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        return _finish(record, 'read_error', str(e), t0)
+    t1 = time.perf_counter()
+    timings['read'] = t1 - t0
+
+    optimize = _options.get('optimize', True)
+    cache = None
+    if _options.get('cache', True):
+        cache = CompileCache(_options.get('cache_dir'), variant=cache_variant(optimize))
+    program = cache.get(code) if cache else None
+    if cache:
+        record['cache'] = 'hit' if program is not None else 'miss'
+    if program is None:
+        try:
+            program = compile_source(code, optimize=optimize, exit_on_error=False)
+        except (UnexpectedInput, SemanticError, MemoryError) as e:
+            return _finish(record, 'compile_error', compile_error_message(e), t0)
+        if cache:
+            try:
+                cache.put(code, program)
+            except (OSError, BytecodeError):
+                pass
+    t2 = time.perf_counter()
+    timings['compile'] = t2 - t1
+
+    engine = _options.get('engine', 'table')
+    try:
+        runner = None
+        if engine == 'aot':
+            from semantic.aot import AotError, load
+            try:
+                runner = load(program, output)
+            except AotError:
+                engine = 'table'
+        if runner is None:
+            runner = Interpreter(program.quadruples, program.global_vars, program.func_dir,
+                                 program.memory, engine=engine, output=output)
+        t3 = time.perf_counter()
+        timings['load'] = t3 - t2
+        runner.execute()
+        timings['execute'] = time.perf_counter() - t3
+    except JobTimeout:
+        record['output'] = output.getvalue()
+        raise
+    except Exception as e:
+        record['output'] = output.getvalue()
+        return _finish(record, 'runtime_error', f"{type(e).__name__}: {e}", t0)
+    record['output'] = output.getvalue()
+    return _finish(record, 'ok', None, t0)
+
+def _finish(record, status, error, t0):
+    record['status'] = status
+    record['exit_status'] = EXIT_STATUS[status]
+    record['error'] = error
+    record['timings']['total'] = time.perf_counter() - t0
+    return record
+
+def run_all(paths, out, jobs=None, **options):
+    """
+    Ejecuta los programas en un ProcessPoolExecutor y escribe cada
+    registro en out en cuanto su trabajo termina (en orden de llegada).
+    Returns:
+        Cantidad de trabajos por estado
+    """
+    options = {'engine': 'table', 'optimize': True, 'cache': True, 'cache_dir': None,
+               'timeout': DEFAULT_TIMEOUT, **options}
+    counts = dict.fromkeys(EXIT_STATUS, 0)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_warm_worker,
+                             initargs=(options,)) as pool:
+        futures = {pool.submit(run_job, index, path): (index, path)
+                   for index, path in enumerate(paths)}
+        for future in as_completed(futures):
+            try:
+                record = future.result()
+            except Exception as e:
+                # El trabajo no llegó a dar su registro, p. ej. BrokenProcessPool
+                # si un proceso murió; los demás trabajos siguen
+                index, path = futures[future]
+                record = {'index': index, 'path': path, 'pid': None, 'output': '',
+                          'cache': None, 'timings': {}}
+                record.update(status='worker_error', exit_status=EXIT_STATUS['worker_error'],
+                              error=f"{type(e).__name__}: {e}")
+            counts[record['status']] += 1
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+    return counts
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("programas", nargs="+", help="rutas o globs de programas .bd")
+    arg_parser.add_argument("--jobs", type=int, default=None,
+                            help="procesos del pool (por omisión: uno por núcleo)")
+    arg_parser.add_argument("--output", default="-",
+                            help="archivo JSONL de resultados (por omisión: - para la salida estándar)")
+    arg_parser.add_argument("--engine", choices=ENGINES + ('aot',), default="table",
+                            help="motor de ejecución (por omisión: table)")
+    arg_parser.add_argument("--no-optimize", action="store_true",
+                            help="no aplica las optimizaciones sobre los cuádruplos")
+    arg_parser.add_argument("--no-cache", action="store_true",
+                            help="compila siempre, sin leer ni escribir la caché de programas")
+    arg_parser.add_argument("--cache-dir", default=None, help="directorio de la caché")
+    arg_parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                            help=f"segundos por trabajo (por omisión: {DEFAULT_TIMEOUT:g})")
+    args = arg_parser.parse_args(argv)
+
+    paths = expand(args.programas)
+    if args.jobs is not None and args.jobs < 1:
+        arg_parser.error("--jobs debe ser al menos 1")
+    if not (math.isfinite(args.timeout) and args.timeout > 0):
+        arg_parser.error("--timeout debe ser un número positivo")
+
+    t0 = time.perf_counter()
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        counts = run_all(paths, out, args.jobs, engine=args.engine,
+                         optimize=not args.no_optimize, cache=not args.no_cache,
+                         cache_dir=args.cache_dir, timeout=args.timeout)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - t0
+
+    summary = ", ".join(f"{count} {status}" for status, count in counts.items() if count)
+    print(f"{len(paths)} programas en {elapsed:.2f} s ({summary})", file=sys.stderr)
+    return 0 if counts['ok'] == len(paths) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
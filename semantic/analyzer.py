@@ -3,58 +3,162 @@
 from lark import Transformer, Visitor, Token, Tree
 from semantic.variable_table import VariableTable
 from semantic.function_directory import FunctionDirectory
-from semantic.memory_manager import MemoryManager
+from semantic.memory_manager import MemoryManager, DEFAULT_SEGMENT_BITS
+from semantic.runtime_memory import INT_MAX
 from semantic.semantic_cube import semantic_cube
+from semantic.quad_store import QuadStore
 
 class SemanticError(Exception):
     """Para errores semánticos."""
     pass
 
 class SemanticAnalyzer(Transformer):
-    def __init__(self):
+    def __init__(self, segment_bits: int = DEFAULT_SEGMENT_BITS):
         # — Tablas y memoria —
         self.global_vars      = VariableTable()
         self.func_dir         = FunctionDirectory()
-        self.memory           = MemoryManager()
+        self.memory           = MemoryManager(segment_bits)
         self.current_function = None
 
         # — Pilas y lista de cuádruplos —
         self.operators   = []   # operadores pendientes
         self.operands    = []   # direcciones de operandos
         self.types       = []   # tipos de cada operando
-        self.quadruples  = []   # fila de cuádruplos
+        self.quadruples  = QuadStore()  # fila de cuádruplos (ver semantic/quad_store.py)
         self.next_quad   = 0    # índice del próximo cuadruplo
 
         # — Pilas para saltos —
         self.jump_stack = []    # Para manejar saltos anidados
+        self.pending_calls = [] # (índice de GOSUB, función) por rellenar
 
         # — Enhanced context management —
         self.function_stack = []  # Stack to track function context during transformation
+        self.placed_functions = set()  # funciones cuyo start_quad ya es definitivo
+        self.declared_functions = set()  # funciones vistas en la primera pasada
+
+        # — Listado en flujo (ver stream_to) —
+        self.listing = None
+        self.listed = 0         # cuádruplos ya emitidos al listado
 
     def transform(self, tree):
         # Two-pass approach: first pass to collect function signatures
         self._collect_function_signatures(tree)
-        return super().transform(tree)
+        result = super().transform(tree)
+        self._patch_calls()
+        self._emit_ready(final=True)
+        return result
+
+    def stream_to(self, listing) -> None:
+        """
+        Emite cada cuádruplo a listing (ver semantic/listing.py) durante el
+        análisis, en cuanto es definitivo: todo lo anterior al salto
+        pendiente más antiguo de la pila de saltos y a la primera llamada
+        a una función que todavía no empieza.
+        """
+        self.listing = listing
+        self.listed = 0
+
+    def _emit_ready(self, final: bool = False):
+        listing = self.listing
+        if listing is None:
+            return
+        ready = len(self.quadruples)
+        if not final:
+            # Ambas listas crecen en orden de índice: su primer elemento es el menor
+            if self.jump_stack:
+                ready = min(ready, self.jump_stack[0])
+            if self.pending_calls:
+                ready = min(ready, self.pending_calls[0][0])
+        quads = self.quadruples
+        for index in range(self.listed, ready):
+            listing.quad(index, quads[index])
+        if ready > self.listed:
+            self.listed = ready
+        if final:
+            listing.close()
+            self.listing = None
 
     def _transform_tree(self, tree):
         """Override to manage function context during transformation"""
-        # Check if this is a function node and manage context
-        if hasattr(tree, 'data') and tree.data == 'func':
-            fname = tree.children[1].value
-            # Set function context for the entire function subtree
-            old_function = self.current_function
-            self.current_function = fname
-
-            try:
-                # Transform the function node normally
-                result = super()._transform_tree(tree)
-                return result
-            finally:
-                # Restore previous context
-                self.current_function = old_function
+        data = getattr(tree, 'data', None)
+        if data == 'func':
+            result = self._transform_func(tree)
+        elif data == 'condition':
+            result = self._transform_condition(tree)
+        elif data == 'cycle':
+            result = self._transform_cycle(tree)
         else:
-            # For non-function nodes, just transform normally
+            # For other nodes, just transform normally
+            result = super()._transform_tree(tree)
+        if self.listing is not None:
+            self._emit_ready()
+        return result
+
+    def _transform_func(self, tree):
+        """
+        Transforma una función dentro de su propio contexto y marco:
+        sus locales y temporales se numeran desde el inicio del marco y
+        al terminar se registra el tamaño del marco en el directorio.
+        """
+        fname = tree.children[1].value
+        fe = self.func_dir.get_function(fname)
+
+        # Set function context for the entire function subtree
+        old_function = self.current_function
+        self.current_function = fname
+        saved = self.memory.begin_frame(fe.local_sizes)
+        fe.start_quad = self.next_quad
+        self.placed_functions.add(fname)
+
+        try:
             return super()._transform_tree(tree)
+        finally:
+            # Restore previous context
+            local_sizes, temp_sizes = self.memory.end_frame(saved)
+            self.func_dir.set_frame_sizes(fname, local_sizes, temp_sizes)
+            self.current_function = old_function
+
+    def _transform_condition(self, tree):
+        """
+        Transforma un if/else en orden de ejecución: la condición, GOTOF,
+        el bloque if, GOTO y el bloque else. Los hijos se recorren a mano
+        para poder emitir los saltos entre ellos.
+        """
+        children = []
+        for child in tree.children:
+            if isinstance(child, Token) and child.type == 'ELSE':
+                self._condition_else()
+            children.extend(self._transform_children([child]))
+            if isinstance(child, Token) and child.type == 'RPAREN':
+                self._condition_start()
+        self._condition_end()
+        return self._call_userfunc(tree, children)
+
+    def _transform_cycle(self, tree):
+        """
+        Transforma un while en orden de ejecución: el inicio de la
+        condición se marca antes de recorrerla, el ')' que la cierra emite
+        el GOTOF y al terminar el cuerpo se emite el GOTO de regreso. Los
+        saltos se rellenan desde la pila, sin buscar ni insertar cuádruplos.
+        """
+        cond_start = self.next_quad
+        children = []
+        for child in tree.children:
+            children.extend(self._transform_children([child]))
+            if isinstance(child, Token) and child.type == 'RPAREN':
+                self._condition_start()
+        self._cycle_end(cond_start)
+        return self._call_userfunc(tree, children)
+
+    def _fill_jump(self, quad_index: int, target: int):
+        """Rellena el destino (resultado) de un salto pendiente."""
+        self.quadruples.patch(quad_index, target)
+
+    def _patch_calls(self):
+        """Rellena los GOSUB con el start_quad final de cada función."""
+        for quad_index, fname in self.pending_calls:
+            self._fill_jump(quad_index, self.func_dir.get_function(fname).start_quad)
+        self.pending_calls = []
 
     def _collect_function_signatures(self, node):
         """First pass: collect all function signatures"""
@@ -68,7 +172,12 @@ class SemanticAnalyzer(Transformer):
             else:
                 rawp = []
 
-            # Add function to directory
+            # A second definition is an error, as in the streaming mode. The
+            # directory may already hold the function when it is shared with
+            # an earlier pass (incremental recompilation): register it once
+            if fname in self.declared_functions:
+                raise SemanticError(f"Función '{fname}' ya declarada.")
+            self.declared_functions.add(fname)
             if not self.func_dir.has_function(fname):
                 self.func_dir.add_function(
                     name=fname,
@@ -77,12 +186,20 @@ class SemanticAnalyzer(Transformer):
                     start_quad=0  # Will be updated during second pass
                 )
 
-                # Add parameters to function's variable table
+                # Add parameters to function's variable table, at the
+                # start of the function's own frame
                 fe = self.func_dir.get_function(fname)
+                saved = self.memory.begin_frame()
                 for name, t in rawp:
-                    if not fe.variables.has_variable(name):
-                        addr = self.memory.allocate('local', t)
-                        fe.variables.add_variable(name, t, addr)
+                    if fe.variables.has_variable(name):
+                        raise SemanticError(
+                            f"Parámetro '{name}' repetido en función '{fname}'."
+                        )
+                    addr = self.memory.allocate('local', t)
+                    fe.variables.add_variable(name, t, addr)
+                    fe.param_addrs.append(addr)
+                param_sizes, _ = self.memory.end_frame(saved)
+                fe.local_sizes = param_sizes
 
         # Recursively process children
         if hasattr(node, 'children'):
@@ -134,6 +251,11 @@ class SemanticAnalyzer(Transformer):
         if res_type == 'error':
             raise SemanticError(f"Tipo inválido para {l_type} {op} {r_type}")
 
+        # Los operandos ya se consumieron: el resultado puede reutilizar
+        # sus temporales
+        self.memory.free_temp(r_addr)
+        self.memory.free_temp(l_addr)
+
         # Asignar dirección temporal para el resultado
         temp = self.memory.allocate_temp(res_type)
         self.operands.append(temp)
@@ -175,6 +297,12 @@ class SemanticAnalyzer(Transformer):
         Reutiliza direcciones para constantes idénticas.
         """
         value = int(token.value)
+        # Los enteros se guardan en 64 bits con signo (memoria y archivo objeto)
+        if value > INT_MAX:
+            raise SemanticError(
+                f"Constante entera {token.value} fuera de rango (máximo {INT_MAX}) "
+                f"en linea {token.line}"
+            )
         addr = self.memory.allocate_constant(value)
         self.operands.append(addr)
         self.types.append('int')
@@ -229,16 +357,19 @@ class SemanticAnalyzer(Transformer):
     def eq(self,  items): self.operators.append('=='); self._generate_quad('=='); return self.operands[-1]
     def neq(self, items): self.operators.append('!=' ); self._generate_quad('!='); return self.operands[-1]
 
-    def group(self, items): return items[0]
-    def pos(self,   items): return items[0]
+    def group(self, items): return items[1]
+    def pos(self,   items): return items[1]
     def neg(self,   items):
         """
         Maneja operador unario negativo.
-        Usa constante 0 y operador de resta.
+        Usa constante 0 y operador de resta: el 0 va debajo del operando
+        en las pilas para generar 0 - x.
         """
+        operand = self.operands.pop()
+        operand_type = self.types.pop()
         zero = self.memory.allocate_constant(0)
-        self.operands.append(zero)
-        self.types.append('int')
+        self.operands.extend((zero, operand))
+        self.types.extend(('int', operand_type))
         self.operators.append('-')
         self._generate_quad('-')
         return self.operands[-1]
@@ -278,6 +409,7 @@ class SemanticAnalyzer(Transformer):
 
         self.quadruples.append(('=', expr_addr, None, ve.address))
         self.next_quad += 1
+        self.memory.free_temp(expr_addr)
         return None
 
     # ————————————————————————————————————————————————
@@ -302,6 +434,11 @@ class SemanticAnalyzer(Transformer):
             self.quadruples.append(('print', elem, None, None))
             self.next_quad += 1
 
+        # Cada expresión impresa dejó su resultado en las pilas
+        for _ in range(sum(1 for x in args if isinstance(x, int))):
+            self.memory.free_temp(self.operands.pop())
+            self.types.pop()
+
         # Add PRINT_END quadruple to mark the end of this print statement
         self.quadruples.append(('PRINT_END', None, None, None))
         self.next_quad += 1
@@ -353,8 +490,12 @@ class SemanticAnalyzer(Transformer):
                 )
             self.quadruples.append(('PARAM', addr, None, idx))
             self.next_quad += 1
+            self.memory.free_temp(addr)
 
-        # 6) GOSUB
+        # 6) GOSUB (si la función está declarada más adelante, el
+        #    destino se rellena al terminar)
+        if fname not in self.placed_functions:
+            self.pending_calls.append((self.next_quad, fname))
         self.quadruples.append(('GOSUB', None, None, fe.start_quad))
         self.next_quad += 1
 
@@ -434,12 +575,7 @@ class SemanticAnalyzer(Transformer):
         if not self.func_dir.has_function(fname):
             raise SemanticError(f"Función '{fname}' no encontrada en primera pasada.")
 
-        # The function body has already been processed, so we need to set
-        # the correct start address. For simplicity, the first function starts at 0.
-        fe = self.func_dir.get_function(fname)
-        # Simple approach: first function starts at 0
-        if fe.start_quad == 0:  # Only set if not already set
-            fe.start_quad = 0
+        # start_quad was set when the function subtree was entered
 
         # Generate ENDFUNC at the end of the function
         self.quadruples.append(('ENDFUNC', None, None, None))
@@ -457,113 +593,55 @@ class SemanticAnalyzer(Transformer):
     def condition(self, items):
         """
         Maneja estatutos condicionales if-else.
-        Genera cuádruplos:
+        Los cuádruplos se generan mientras se recorre el nodo
+        (ver _transform_condition):
         1. GOTOF para saltar si la condición es falsa
         2. Código del bloque if
-        3. GOTO para saltar el bloque else
+        3. GOTO para saltar el bloque else (si existe)
         4. Código del bloque else (si existe)
         """
-        # items[0] = expr (condición)
-        # items[1] = body (bloque if)
-        # items[2] = body (bloque else, opcional)
+        return None
 
-        # 1. Evaluar condición
+    def _condition_start(self):
+        """Tras evaluar la condición: GOTOF pendiente en la pila de saltos."""
         cond_addr = self.operands.pop()
         cond_type = self.types.pop()
 
         if cond_type != 'bool':
             raise SemanticError("La condición debe ser de tipo booleano")
 
-        # 2. Generar GOTOF
         self.quadruples.append(('GOTOF', cond_addr, None, None))
-        if_false = self.next_quad
+        self.jump_stack.append(self.next_quad)
         self.next_quad += 1
+        self.memory.free_temp(cond_addr)
 
-        # 3. Código del bloque if
-        if_body = items[1]
-
-        # 4. Si hay else, generar GOTO para saltar el bloque else
-        if len(items) > 2:
-            self.quadruples.append(('GOTO', None, None, None))
-            goto_end = self.next_quad
-            self.next_quad += 1
-
-        # 5. Actualizar el GOTOF con la dirección correcta
-        if len(items) > 2:
-            self.quadruples[if_false] = ('GOTOF', cond_addr, None, self.next_quad)
-        else:
-            self.quadruples[if_false] = ('GOTOF', cond_addr, None, self.next_quad)
-
-        # 6. Si hay else, procesar su bloque
-        if len(items) > 2:
-            else_body = items[2]
-            # Actualizar el GOTO con la dirección después del else
-            self.quadruples[goto_end] = ('GOTO', None, None, self.next_quad)
+    def _condition_else(self):
+        """Al llegar al else: GOTO al final y el GOTOF salta al else."""
+        if_false = self.jump_stack.pop()
+        self.quadruples.append(('GOTO', None, None, None))
+        self.jump_stack.append(self.next_quad)
+        self.next_quad += 1
+        self._fill_jump(if_false, self.next_quad)
 
-        return None
+    def _condition_end(self):
+        """Al cerrar el if/else: el salto pendiente apunta al siguiente cuádruplo."""
+        self._fill_jump(self.jump_stack.pop(), self.next_quad)
 
     def cycle(self, items):
         """
         Maneja estatutos cíclicos while.
-
-        IMPORTANTE: En Lark Transformer, los nodos se procesan bottom-up,
-        por lo que cuando llegamos aquí, la condición y el cuerpo ya fueron procesados.
-
-        Necesitamos reorganizar los cuádruplos para crear la estructura correcta:
-        1. condition_start: Evaluación de condición
-        2. GOTOF: Saltar al final si es falsa
-        3. body: Cuerpo del ciclo
-        4. GOTO: Volver a condition_start
-        5. end: Continuar después del ciclo
+        Los cuádruplos se generan mientras se recorre el nodo
+        (ver _transform_cycle):
+        1. Evaluación de la condición (su inicio queda marcado)
+        2. GOTOF para salir si la condición es falsa
+        3. Cuerpo del ciclo
+        4. GOTO de regreso al inicio de la condición
         """
-        # items[0] = expr (condición)
-        # items[1] = body (cuerpo del ciclo)
-
-        # Buscar el resultado booleano en las pilas
-        if not self.operands or not self.types:
-            raise SemanticError("Error interno: pilas vacías en cycle")
-
-        bool_index = -1
-        for i, t in enumerate(self.types):
-            if t == 'bool':
-                bool_index = i
-                break
-
-        if bool_index == -1:
-            raise SemanticError("No se encontró resultado booleano para la condición del while")
-
-        # Extraer el resultado booleano
-        cond_addr = self.operands.pop(bool_index)
-        cond_type = self.types.pop(bool_index)
-
-        if cond_type != 'bool':
-            raise SemanticError(f"La condición debe ser de tipo booleano, pero es {cond_type}")
-
-        # Encontrar dónde está la evaluación de la condición
-        # Buscar el cuádruplo que genera cond_addr
-        condition_quad = -1
-        for i, (op, left, right, result) in enumerate(self.quadruples):
-            if result == cond_addr:
-                condition_quad = i
-                break
-
-        if condition_quad == -1:
-            raise SemanticError("No se encontró el cuádruplo de evaluación de condición")
-
-        # Generar GOTOF justo después de la condición
-        # Insertar GOTOF después del cuádruplo de condición
-        gotof_quad = ('GOTOF', cond_addr, None, None)  # Se actualizará después
-        self.quadruples.insert(condition_quad + 1, gotof_quad)
-        self.next_quad += 1
-
-        # Ajustar índices debido a la inserción
-        gotof_index = condition_quad + 1
+        return None
 
-        # Generar GOTO al final para volver al inicio de la condición
-        self.quadruples.append(('GOTO', None, None, condition_quad))
+    def _cycle_end(self, cond_start: int):
+        """Al cerrar el while: GOTO a la condición y el GOTOF sale del ciclo."""
+        gotof = self.jump_stack.pop()
+        self.quadruples.append(('GOTO', None, None, cond_start))
         self.next_quad += 1
-
-        # Actualizar el GOTOF con la dirección de salida (después del GOTO)
-        self.quadruples[gotof_index] = ('GOTOF', cond_addr, None, self.next_quad)
-
-        return None
+        self._fill_jump(gotof, self.next_quad)
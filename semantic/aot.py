@@ -0,0 +1,519 @@
+# semantic/aot.py
+
+import hashlib
+import importlib.util
+import marshal
+import os
+import sys
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional
+
+from semantic.compile_cache import CompileCache, DEFAULT_MAX_BYTES, default_cache_dir
+from semantic.interpreter import ARITHMETIC_OPS, COMPARISON_OPS, _overflow
+from semantic.linker import link
+from semantic.optimizer import basic_blocks, live_temps, main_start, reads, successors, writes
+from semantic.output import OutputSink, stdout_sink
+from semantic.runtime_memory import INT_MAX, INT_MIN
+
+# Cambia cuando cambia el código generado; forma parte de la llave de caché
+AOT_VERSION = 2
+
+# Prefijo de nombre de las variables de Python por tipo
+_TYPE_CHARS = {'int': 'i', 'float': 'f', 'bool': 'b'}
+
+def _raise_overflow(index):
+    """overflow(índice) del código generado: el mismo error que el intérprete."""
+    raise _overflow(index)
+
+class AotError(Exception):
+    """Para programas cuyos saltos no forman ciclos y condiciones estructurados."""
+    pass
+
+@dataclass
+class _Range:
+    """
+    Rango de cuádruplos [lo, hi) que se traduce como un bloque de Python.
+      - ends: destinos de salto equivalentes a terminar el rango
+      - loop: (inicio, salidas) del while más interno, o None
+    """
+    lo: int
+    hi: int
+    ends: FrozenSet[int]
+    loop: Optional[tuple]
+
+class _Translator:
+    """
+    Traduce un programa compilado a un módulo de Python con una función
+    run(write). Las variables globales son locales de run(), cada función
+    de BabyDuck es una función anidada (sus parámetros, locales y
+    temporales son locales de Python; las globales que escribe se declaran
+    nonlocal) y el main es el cuerpo de run().
+
+    Los ciclos y condiciones se reconstruyen de los patrones de saltos que
+    genera el análisis:
+        while:   cond ; GOTOF c -> fin ; cuerpo ; GOTO cond
+        if:      cond ; GOTOF c -> fin ; entonces
+        if-else: cond ; GOTOF c -> sino ; entonces ; GOTO fin ; sino
+    incluyendo los saltos ya acortados por el optimizador, que se vuelven
+    break, continue o return. Un temporal que se lee una sola vez, en el
+    mismo bloque, se sustituye por su expresión. Cada resultado aritmético
+    entero se compara contra el rango de 64 bits de la memoria del
+    intérprete y, si no cabe, falla con el mismo error (overflow(índice)).
+    """
+    def __init__(self, program):
+        self.func_dir = program.func_dir
+        self.memory = program.memory
+        self.quads = link(program.quadruples, program.func_dir)
+        self.constants = {addr: value for value, addr in self.memory.constants()}
+        self.global_names = {entry.address: f"g_{name}"
+                             for name, entry in program.global_vars.all_variables().items()}
+        self.inline = self._inlinable_temps()
+        # Destino de cada salto hacia atrás -> último GOTO que regresa a él
+        self.back_edges: Dict[int, int] = {}
+        for j, (op, _, _, target) in enumerate(self.quads):
+            if op == 'GOTO' and target <= j:
+                self.back_edges[target] = max(j, self.back_edges.get(target, j))
+        self.lines: List[str] = []
+        self.pending = {}       # temporal -> (expresión, es condición, direcciones leídas)
+        self.printing = []      # partes del print en curso
+        self.call_args = {}     # dirección del parámetro -> expresión del argumento
+        self.reads = set()      # direcciones leídas por la expresión en construcción
+
+    # ————————————————————————————————————————————————
+    # Módulo
+    # ————————————————————————————————————————————————
+    def translate(self) -> str:
+        quads = self.quads
+        self.lines = ["def run(write):"]
+        globals_ = sorted(self.global_names.items())
+        for addr, name in globals_:
+            self._line(1, f"{name} = {self._zero(addr)}")
+
+        for fname, fe in sorted(self.func_dir.all_functions().items(), key=lambda x: x[1].start_quad):
+            end = next(i for i in range(fe.start_quad, len(quads)) if quads[i][0] == 'ENDFUNC')
+            self._function(fname, fe, end)
+
+        start = main_start(quads)
+        self.local_names = {}
+        self.function_end = None
+        self._block(_Range(start, len(quads), frozenset({len(quads)}), None), 1)
+        result = ", ".join(f"{name[2:]!r}: {name}" for _, name in globals_)
+        self._line(1, f"return {{{result}}}")
+        return "\n".join(self.lines) + "\n"
+
+    def _function(self, fname: str, fe, end: int):
+        self.local_names = {entry.address: f"l_{name}"
+                            for name, entry in fe.variables.all_variables().items()}
+        self.function_end = end
+        params = [self._name(addr) for addr in fe.param_addrs]
+        self._line(1, f"def f_{fname}({', '.join(params)}):")
+
+        written = sorted({writes(self.quads[i]) for i in range(fe.start_quad, end)} & set(self.global_names))
+        if written:
+            self._line(2, "nonlocal " + ", ".join(self.global_names[a] for a in written))
+        for addr in sorted(set(self.local_names) - set(fe.param_addrs)):
+            self._line(2, f"{self.local_names[addr]} = {self._zero(addr)}")
+        start = len(self.lines)
+        self._block(_Range(fe.start_quad, end, frozenset({end}), None), 2)
+        if len(self.lines) == start:
+            self._line(2, "pass")
+
+    # ————————————————————————————————————————————————
+    # Control de flujo
+    # ————————————————————————————————————————————————
+    def _block(self, rng: _Range, depth: int, head_done: bool = False):
+        """Traduce rng a sentencias con la sangría depth."""
+        quads = self.quads
+        self.pending = {}
+        self.printing = []
+        i = rng.lo
+        while i < rng.hi:
+            back = self.back_edges.get(i)
+            if back is not None and not (head_done and i == rng.lo):
+                if back >= rng.hi:
+                    raise AotError(f"Ciclo en el cuádruplo {i} que sale de su bloque.")
+                self._flush(depth)
+                exit_ = back + 1
+                exits = {exit_, self._final(exit_)}
+                if exit_ == rng.hi or exit_ in rng.ends:
+                    exits |= rng.ends
+                self._line(depth, "while True:")
+                self._body(_Range(i, back, frozenset({i}), (i, frozenset(exits))), depth + 1, True)
+                self._while_condition(depth)
+                i = exit_
+                continue
+
+            op, left, right, result = quads[i]
+            if op == 'GOTOF':
+                i = self._gotof(rng, depth, i)
+            elif op == 'GOTO':
+                self._flush(depth)
+                statement = self._jump(rng, result, last=(i == rng.hi - 1))
+                if statement:
+                    self._line(depth, statement)
+                i += 1
+            else:
+                self._simple(i, depth)
+                i += 1
+        self._flush(depth)
+
+    def _body(self, rng: _Range, depth: int, head_done: bool = False):
+        """Como _block(), pero emite pass si el rango queda vacío."""
+        start = len(self.lines)
+        saved = self.pending, self.printing
+        self._block(rng, depth, head_done)
+        self.pending, self.printing = saved
+        if len(self.lines) == start:
+            self._line(depth, "pass")
+
+    def _while_condition(self, depth: int):
+        """
+        Reescribe el ciclo recién emitido
+            while True:
+                if not c:
+                    break
+                ...
+        como `while c:` cuando la condición es lo primero del cuerpo.
+        """
+        lines = self.lines
+        start = next(k for k in range(len(lines) - 1, -1, -1)
+                     if lines[k] == "    " * depth + "while True:")
+        body = "    " * (depth + 1)
+        if (start + 2 < len(lines) and lines[start + 1].startswith(body + "if not ")
+                and lines[start + 1].endswith(":") and lines[start + 2] == body + "    break"):
+            condition = lines[start + 1][len(body + "if not "):-1]
+            rest = lines[start + 3:]
+            if not rest or not rest[0].startswith(body):
+                rest = [body + "pass"] + rest
+            lines[start:] = ["    " * depth + f"while {condition}:"] + rest
+
+    def _gotof(self, rng: _Range, depth: int, i: int) -> int:
+        """Traduce el GOTOF en i y lo que gobierna; devuelve dónde seguir."""
+        quads = self.quads
+        condition = self._operand(quads[i][1], as_condition=True)
+        self._flush(depth)
+        target = quads[i][3]
+
+        if i < target <= rng.hi:
+            end = self._branch_end(i, target)
+            if end is not None:
+                # El GOTO final de la rama es su salto a fin o el regreso de su ciclo
+                then_hi = target if i < quads[target - 1][3] < target else target - 1
+                if target < end <= rng.hi:
+                    self._line(depth, f"if {condition}:")
+                    self._body(self._child(rng, i + 1, then_hi, end), depth + 1)
+                    self._line(depth, "else:")
+                    self._body(self._child(rng, target, end, end), depth + 1)
+                    return end
+                if end in rng.ends:
+                    self._line(depth, f"if {condition}:")
+                    self._body(self._child(rng, i + 1, then_hi, rng.hi), depth + 1)
+                    self._line(depth, "else:")
+                    self._body(self._child(rng, target, rng.hi, rng.hi), depth + 1)
+                    return rng.hi
+            self._line(depth, f"if {condition}:")
+            self._body(self._child(rng, i + 1, target, target), depth + 1)
+            return target
+
+        if target in rng.ends:
+            self._line(depth, f"if {condition}:")
+            self._body(self._child(rng, i + 1, rng.hi, rng.hi), depth + 1)
+            return rng.hi
+
+        self._line(depth, f"if not {condition}:")
+        self._line(depth + 1, self._jump(rng, target, last=False))
+        return i + 1
+
+    def _branch_end(self, i: int, target: int) -> Optional[int]:
+        """
+        Destino al terminar la rama entonces del GOTOF en i que salta a
+        target, o None si la rama sigue de largo hacia target. La rama
+        termina con GOTO fin o, si el optimizador acortó ese salto, con un
+        ciclo cuya condición sale directo a fin.
+        """
+        last = self.quads[target - 1]
+        if target - 1 <= i or last[0] != 'GOTO' or last[3] == target:
+            return None
+        head = last[3]
+        if not i < head < target:
+            return head
+        exit_ = next((q[3] for q in self.quads[head:target - 1] if q[0] == 'GOTOF'), target)
+        return exit_ if exit_ != target else None
+
+    def _child(self, rng: _Range, lo: int, hi: int, cont: int) -> _Range:
+        """Subrango [lo, hi) que, al terminar, continúa en cont."""
+        ends = {cont, self._final(cont)}
+        if cont == rng.hi or cont in rng.ends:
+            ends |= rng.ends
+        return _Range(lo, hi, frozenset(ends), rng.loop)
+
+    def _jump(self, rng: _Range, target: int, last: bool) -> Optional[str]:
+        """
+        Sentencia equivalente a saltar a target desde rng, o None si el
+        salto sólo lleva al final del rango.
+        Raises:
+            AotError: Si el salto no es break, continue ni return
+        """
+        if last and target in rng.ends:
+            return None
+        if rng.loop is not None:
+            head, exits = rng.loop
+            if target == head:
+                return "continue"
+            if target in exits:
+                return "break"
+        if target == self.function_end:
+            return "return"
+        raise AotError(f"Salto no estructurado hacia el cuádruplo {target}.")
+
+    def _final(self, index: int) -> int:
+        """Destino final de una cadena de GOTO que empieza en index."""
+        seen = set()
+        while index < len(self.quads) and self.quads[index][0] == 'GOTO' and index not in seen:
+            seen.add(index)
+            index = self.quads[index][3]
+        return index
+
+    # ————————————————————————————————————————————————
+    # Sentencias y expresiones
+    # ————————————————————————————————————————————————
+    def _simple(self, index: int, depth: int):
+        op, left, right, result = self.quads[index]
+        if op != 'print' and op != 'PRINT_END':
+            self._flush_print(depth)
+
+        if op in ARITHMETIC_OPS or op in COMPARISON_OPS:
+            l = self._operand(left)
+            r = self._operand(right)
+            if op == '/' and self.memory.type_of(result) != 'float':
+                expr = f"int({l} / {r})"
+            else:
+                expr = f"({l} {op} {r})"
+            if op in ARITHMETIC_OPS and self.memory.type_of(result) != 'float':
+                # Los enteros de Python no se desbordan; los de la memoria sí
+                expr = f"(_v if {INT_MIN} <= (_v := {expr}) <= {INT_MAX} else overflow({index}))"
+            self._assign(index, expr, op in COMPARISON_OPS, depth)
+        elif op == '=':
+            expr = self._operand(left)
+            if self.memory.type_of(result) == 'float' and self._type(left) != 'float':
+                expr = f"float({expr})"
+            self._assign(index, expr, False, depth)
+        elif op == 'print':
+            if isinstance(left, str):
+                self.printing.append(repr(left[1:-1]))
+            else:
+                self.printing.append(f"str({self._operand(left)})")
+        elif op == 'PRINT_END':
+            self.printing.append(repr("\n"))
+            self._flush_print(depth)
+        elif op == 'ERA':
+            self.call_args = {}
+        elif op == 'PARAM':
+            expr = self._operand(left)
+            if self.memory.type_of(result) == 'float' and self._type(left) != 'float':
+                expr = f"float({expr})"
+            self.call_args[result] = expr
+        elif op == 'GOSUB':
+            fe = self.func_dir.get_function(left)
+            args = ", ".join(self.call_args[addr] for addr in fe.param_addrs)
+            # La función puede escribir cualquier global
+            self._materialize(depth, lambda deps: any(a in self.global_names for a in deps))
+            self._line(depth, f"f_{left}({args})")
+        else:
+            raise AotError(f"Operación desconocida '{op}'.")
+
+    def _assign(self, index: int, expr: str, is_condition: bool, depth: int):
+        result = self.quads[index][3]
+        deps = frozenset(self.reads)
+        self.reads = set()
+        # Lo pendiente que lee result se evalúa antes de sobrescribirlo
+        self._materialize(depth, lambda d: result in d)
+        if self.inline.get(index, False):
+            self.pending[result] = (expr, is_condition, deps)
+            return
+        if is_condition:
+            expr = f"1 if {expr} else 0"
+        self._line(depth, f"{self._name(result)} = {expr}")
+
+    def _operand(self, addr, as_condition: bool = False) -> str:
+        """Expresión de un operando; consume la expresión pendiente de un temporal."""
+        if addr in self.pending:
+            expr, is_condition, deps = self.pending.pop(addr)
+            self.reads |= deps
+            if is_condition and not as_condition:
+                return f"(1 if {expr} else 0)"
+            return expr
+        if addr in self.constants:
+            value = self.constants[addr]
+            return f"({value!r})" if value < 0 else repr(value)
+        self.reads.add(addr)
+        return self._name(addr)
+
+    def _materialize(self, depth: int, needed):
+        """Asigna a su temporal cada expresión pendiente cuyas dependencias cumplen needed."""
+        for addr in [a for a, (_, _, deps) in self.pending.items() if needed(deps)]:
+            expr, is_condition, _ = self.pending.pop(addr)
+            if is_condition:
+                expr = f"1 if {expr} else 0"
+            self._line(depth, f"{self._name(addr)} = {expr}")
+
+    def _flush(self, depth: int):
+        self._flush_print(depth)
+        self._materialize(depth, lambda deps: True)
+
+    def _flush_print(self, depth: int):
+        if self.printing:
+            self._line(depth, f"write({' + '.join(self.printing)})")
+            self.printing = []
+
+    # ————————————————————————————————————————————————
+    # Nombres y tipos
+    # ————————————————————————————————————————————————
+    def _name(self, addr) -> str:
+        if addr in self.global_names:
+            return self.global_names[addr]
+        if addr in self.local_names:
+            return self.local_names[addr]
+        segment, offset = self.memory.decode(addr)
+        scope, var_type = self.memory.segments()[segment]
+        return f"{scope[0]}{_TYPE_CHARS[var_type]}{offset}"
+
+    def _type(self, addr) -> str:
+        if addr in self.constants:
+            return 'float' if isinstance(self.constants[addr], float) else 'int'
+        return self.memory.type_of(addr)
+
+    def _zero(self, addr) -> str:
+        return '0.0' if self.memory.type_of(addr) == 'float' else '0'
+
+    def _is_temp(self, addr) -> bool:
+        return isinstance(addr, int) and self.memory.scope_of(addr) == 'temp'
+
+    def _inlinable_temps(self) -> Dict[int, bool]:
+        """
+        Cuádruplos cuyo temporal resultado se lee exactamente una vez, más
+        adelante en el mismo bloque básico, y ya no se usa después.
+        Returns:
+            {índice del cuádruplo: si su resultado se sustituye por la expresión}
+        """
+        quads = self.quads
+        blocks = basic_blocks(quads, self.func_dir)
+        live_out = live_temps(quads, blocks, successors(quads, blocks), self.memory)
+        inline = {}
+        for b, (start, end) in enumerate(blocks):
+            open_defs = {}      # temporal -> [índice que lo escribe, lecturas]
+            for i in range(start, end):
+                for addr in reads(quads[i]):
+                    if addr in open_defs:
+                        open_defs[addr][1] += 1
+                target = writes(quads[i])
+                if self._is_temp(target):
+                    if target in open_defs:
+                        index, uses = open_defs[target]
+                        inline[index] = uses == 1
+                    open_defs[target] = [i, 0]
+            for target, (index, uses) in open_defs.items():
+                inline[index] = uses == 1 and target not in live_out[b]
+        return inline
+
+    def _line(self, depth: int, text: str):
+        self.lines.append("    " * depth + text)
+
+def translate(program) -> str:
+    """
+    Traduce un programa compilado a código fuente de Python.
+    Args:
+        program: CompiledProgram (o SemanticAnalyzer) ya analizado
+    Returns:
+        Módulo que define run(write): ejecuta el programa escribiendo la
+        salida de print con write() y devuelve {nombre: valor} de las
+        variables globales al terminar. El módulo espera overflow(índice)
+        en sus globales (ver load())
+    Raises:
+        AotError: Si los saltos del programa no se pueden estructurar
+    """
+    return _Translator(program).translate()
+
+class AotCache(CompileCache):
+    """
+    Caché de los módulos ya compilados con compile(), en el subdirectorio
+    aot/ de la caché de programas. La llave es el hash del código de Python
+    generado y de la versión del intérprete, pues marshal no es portable
+    entre versiones de Python.
+    """
+    suffix = '.pyc'
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        super().__init__(os.path.join(directory or default_cache_dir(), 'aot'), max_bytes)
+
+    def key(self, source: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{AOT_VERSION}/{sys.version}\0".encode('utf-8'))
+        digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, source: str):
+        """Código compilado del módulo, o None si no está en caché."""
+        path = self.path(source)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        magic = importlib.util.MAGIC_NUMBER
+        try:
+            if not data.startswith(magic):
+                raise ValueError("versión de Python distinta")
+            code = marshal.loads(data[len(magic):])
+        except (ValueError, EOFError, TypeError):
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return code
+
+    def put(self, source: str, code) -> str:
+        path = self.path(source)
+        self._write(path, importlib.util.MAGIC_NUMBER + marshal.dumps(code))
+        self.evict(keep=path)
+        return path
+
+class AotProgram:
+    """
+    Programa traducido a Python, con la misma interfaz de ejecución que
+    Interpreter: execute() corre el programa y escribe su salida en output.
+    """
+    def __init__(self, run, output: Optional[OutputSink] = None, source: str = ''):
+        self._run = run
+        self.output = stdout_sink() if output is None else output
+        self.source = source
+        self.globals: Dict[str, object] = {}
+
+    def execute(self):
+        try:
+            self.globals = self._run(self.output.write)
+            self.output.write("\nPROGRAMA TERMINADO\n")
+        finally:
+            self.output.flush()
+
+def load(program, output: Optional[OutputSink] = None,
+         cache: Optional[AotCache] = None) -> AotProgram:
+    """
+    Traduce y compila un programa, usando la caché si se da una.
+    Raises:
+        AotError: Si los saltos del programa no se pueden estructurar
+    """
+    source = translate(program)
+    code = cache.get(source) if cache is not None else None
+    if code is None:
+        code = compile(source, '<babyduck-aot>', 'exec')
+        if cache is not None:
+            try:
+                cache.put(source, code)
+            except OSError:
+                pass
+    namespace = {'overflow': _raise_overflow}
+    exec(code, namespace)
+    return AotProgram(namespace['run'], output, source)
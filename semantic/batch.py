@@ -0,0 +1,372 @@
+# semantic/batch.py
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+
+from semantic.interpreter import _overflow
+from semantic.linker import link
+from semantic.optimizer import main_start
+from semantic.runtime_memory import INT_MAX, INT_MIN
+
+# dtype de NumPy por tipo de BabyDuck, como los array('q'/'d'/'b') del intérprete
+DTYPES = {
+    'int': np.int64,
+    'float': np.float64,
+    'bool': np.int8,
+}
+
+# Profundidad máxima de llamadas por omisión; cada nivel guarda un vector
+# por variable local y temporal usada en ese nivel
+DEFAULT_MAX_DEPTH = 1000
+
+_VECTOR_OPS = {
+    '+': np.add,
+    '-': np.subtract,
+    '*': np.multiply,
+    '>': np.greater,
+    '<': np.less,
+    '==': np.equal,
+    '!=': np.not_equal,
+}
+
+# Operaciones enteras que pueden salirse de 64 bits (NumPy da la vuelta sin avisar)
+_CHECKED_OPS = ('+', '-', '*')
+
+def _overflowed(op: str, a, b, value) -> np.ndarray:
+    """
+    Carriles cuyo resultado entero dio la vuelta. La suma y la resta se
+    revisan por los signos; la multiplicación filtra con el producto en
+    float64 y confirma con enteros de Python los pocos carriles cercanos
+    al límite.
+    """
+    if op == '+':
+        return ((a ^ value) & (b ^ value)) < 0
+    if op == '-':
+        return ((a ^ b) & (a ^ value)) < 0
+    suspect = np.abs(np.multiply(a, b, dtype=np.float64)) >= 2.0 ** 62
+    failed = np.zeros(a.shape, dtype=bool)
+    for i in np.flatnonzero(suspect).tolist():
+        failed[i] = not INT_MIN <= int(a[i]) * int(b[i]) <= INT_MAX
+    return failed
+
+class BatchError(Exception):
+    """Para entradas inválidas o llamadas que exceden la profundidad máxima."""
+    pass
+
+@dataclass
+class BatchResult:
+    """
+    Resultado de run_batch():
+      - outputs: salida de print de cada carril
+      - globals: nombre -> vector con el valor final de la global en cada carril
+      - errors: carril -> mensaje, para los carriles que terminaron con error
+      - steps: instrucciones vectoriales ejecutadas (cuádruplo x grupo de carriles)
+    """
+    outputs: List[str]
+    globals: Dict[str, np.ndarray]
+    errors: Dict[int, str] = field(default_factory=dict)
+    steps: int = 0
+
+    @property
+    def lanes(self) -> int:
+        return len(self.outputs)
+
+class _BatchMachine:
+    """
+    Ejecuta los cuádruplos sobre muchos conjuntos de entrada a la vez. Cada
+    global, local y temporal es un vector con un carril por conjunto; las
+    constantes son escalares que NumPy difunde.
+
+    Los carriles que están en el mismo cuádruplo y a la misma profundidad
+    de llamada forman un grupo y avanzan juntos: cada cuádruplo aritmético
+    o de comparación es una operación vectorial sobre los carriles del
+    grupo. Un GOTOF cuya condición difiere entre carriles parte el grupo;
+    entonces se sigue con los carriles más profundos y, entre ellos, con
+    los del cuádruplo más bajo, de modo que los que salen antes de un
+    ciclo o de un if esperan a los demás y se vuelven a juntar.
+
+    Las locales y temporales se guardan por nivel de llamada: todos los
+    carriles de un grupo están en el mismo nivel y usan sus vectores.
+    """
+    def __init__(self, program, lanes: int, max_depth: int):
+        # Tuplas ya decodificadas: se lee un cuádruplo por paso vectorial
+        self.quads = list(link(program.quadruples, program.func_dir))
+        self.memory = program.memory
+        self.lanes = lanes
+        self.max_depth = max_depth
+        self.end = len(self.quads)
+        # Cuádruplos '+', '-' o '*' con resultado entero: se revisa su desbordamiento
+        self.checked = {i for i, (op, _, _, result) in enumerate(self.quads)
+                        if op in _CHECKED_OPS and self.memory.type_of(result) == 'int'}
+
+        self.constants = {addr: value for value, addr in self.memory.constants()}
+        self.global_addrs = {name: entry.address
+                             for name, entry in program.global_vars.all_variables().items()}
+        self.globals = {addr: self._zeros(addr) for addr in self.global_addrs.values()}
+        # Nivel de llamada -> {dirección local/temp: vector}
+        self.frames: List[Dict[int, np.ndarray]] = [{}]
+        # Nivel de llamada -> cuádruplo de regreso de cada carril
+        self.returns: List[Optional[np.ndarray]] = [None]
+
+        self.pc = np.full(lanes, main_start(self.quads), dtype=np.int64)
+        self.depth = np.zeros(lanes, dtype=np.int64)
+        self.outputs: List[List[str]] = [[] for _ in range(lanes)]
+        self.errors: Dict[int, str] = {}
+        self.steps = 0
+
+    def _zeros(self, addr) -> np.ndarray:
+        return np.zeros(self.lanes, dtype=DTYPES[self.memory.type_of(addr)])
+
+    def seed(self, name: str, values) -> None:
+        if name not in self.global_addrs:
+            raise BatchError(f"'{name}' no es una variable global del programa.")
+        vector = self.globals[self.global_addrs[name]]
+        vector[:] = np.asarray(values, dtype=vector.dtype)
+
+    # ————————————————————————————————————————————————
+    # Planificación de grupos
+    # ————————————————————————————————————————————————
+    def run(self) -> BatchResult:
+        while True:
+            live = self.pc < self.end
+            if not live.any():
+                break
+            depth = int(self.depth[live].max())
+            candidates = live & (self.depth == depth)
+            p = int(self.pc[candidates].min())
+            members = np.flatnonzero(candidates & (self.pc == p))
+            self._run_group(members, p, depth)
+
+        globals_ = {name: self.globals[addr] for name, addr in self.global_addrs.items()}
+        return BatchResult(outputs=[''.join(parts) for parts in self.outputs],
+                           globals=globals_, errors=self.errors, steps=self.steps)
+
+    def _run_group(self, members: np.ndarray, p: int, depth: int) -> None:
+        """
+        Avanza un grupo de carriles hasta que se divide, termina o falla.
+        Mientras todos sigan el mismo camino no se toca self.pc.
+        """
+        quads = self.quads
+        end = self.end
+        # Con todos los carriles basta un slice, que no copia
+        sel = slice(None) if len(members) == self.lanes else members
+        frame = self.frames[depth]
+
+        while p < end:
+            self.steps += 1
+            op, left, right, result = quads[p]
+
+            if op in _VECTOR_OPS:
+                # Las comparaciones dan bool, que se guarda como 1 o 0
+                a = self._read(left, sel, frame)
+                b = self._read(right, sel, frame)
+                if p in self.checked:
+                    failed = self._checked(op, a, b, result, frame, sel, members)
+                    if failed is not None:
+                        self._fail(members, failed, str(_overflow(p)))
+                        self._park(members[~failed], p + 1, depth)
+                        return
+                else:
+                    self._target(result, frame)[sel] = _VECTOR_OPS[op](a, b)
+                p += 1
+            elif op == '/':
+                divided = self._divide(left, right, result, sel, frame, members)
+                if divided is not None:
+                    zero, overflow = divided
+                    self._fail(members, zero, "division by zero")
+                    self._fail(members, overflow, str(_overflow(p)))
+                    self._park(members[~(zero | overflow)], p + 1, depth)
+                    return
+                p += 1
+            elif op == '=':
+                self._target(result, frame)[sel] = self._read(left, sel, frame)
+                p += 1
+            elif op == 'print':
+                self._print(left, sel, frame, members)
+                p += 1
+            elif op == 'PRINT_END':
+                for lane in members.tolist():
+                    self.outputs[lane].append("\n")
+                p += 1
+            elif op == 'GOTO':
+                p = result
+            elif op == 'GOTOF':
+                condition = np.asarray(self._read(left, sel, frame)) != 0
+                if condition.ndim == 0:
+                    condition = np.full(len(members), bool(condition))
+                if condition.all():
+                    p += 1
+                elif not condition.any():
+                    p = result
+                else:
+                    self.pc[members] = np.where(condition, p + 1, result)
+                    self.depth[members] = depth
+                    return
+            elif op == 'ERA':
+                if depth + 1 > self.max_depth:
+                    raise BatchError(f"Se excedió la profundidad máxima de llamadas ({self.max_depth}).")
+                if len(self.frames) == depth + 1:
+                    self.frames.append({})
+                    self.returns.append(np.zeros(self.lanes, dtype=np.int64))
+                # Marco nuevo: las locales del llamado empiezan en cero
+                for vector in self.frames[depth + 1].values():
+                    vector[sel] = 0
+                p += 1
+            elif op == 'PARAM':
+                callee = self.frames[depth + 1]
+                if result not in callee:
+                    callee[result] = self._zeros(result)
+                callee[result][sel] = self._read(left, sel, frame)
+                p += 1
+            elif op == 'GOSUB':
+                depth += 1
+                self.returns[depth][sel] = p + 1
+                frame = self.frames[depth]
+                p = result
+            elif op == 'ENDFUNC':
+                if depth == 0:
+                    p = end
+                    break
+                targets = self.returns[depth][sel]
+                depth -= 1
+                frame = self.frames[depth]
+                first = int(targets[0])
+                if not (targets == first).all():
+                    # Llamadas desde sitios distintos: cada carril regresa al suyo
+                    self.pc[members] = targets
+                    self.depth[members] = depth
+                    return
+                p = first
+            else:
+                print(f"Warning: Unknown operation '{op}' at quad {p}")
+                p += 1
+
+        self._park(members, end, depth)
+
+    def _park(self, members: np.ndarray, p: int, depth: int) -> None:
+        self.pc[members] = p
+        self.depth[members] = depth
+
+    def _fail(self, members: np.ndarray, failed: np.ndarray, message: str) -> None:
+        lanes = members[failed]
+        for lane in lanes.tolist():
+            self.errors[lane] = message
+        self.pc[lanes] = self.end
+
+    # ————————————————————————————————————————————————
+    # Operandos
+    # ————————————————————————————————————————————————
+    def _read(self, addr, sel, frame):
+        """Valor de un operando para los carriles sel: escalar si es constante."""
+        if addr in self.constants:
+            return self.constants[addr]
+        if addr in self.globals:
+            return self.globals[addr][sel]
+        if addr not in frame:
+            frame[addr] = self._zeros(addr)
+        return frame[addr][sel]
+
+    def _target(self, addr, frame) -> np.ndarray:
+        """Vector donde se escribe una dirección global, local o temporal."""
+        if addr in self.globals:
+            return self.globals[addr]
+        if addr not in frame:
+            frame[addr] = self._zeros(addr)
+        return frame[addr]
+
+    def _checked(self, op, a, b, result, frame, sel, members) -> Optional[np.ndarray]:
+        """
+        Ejecuta '+', '-' o '*' entero revisando el desbordamiento.
+        Returns:
+            None, o la máscara de carriles cuyo resultado no cabe en 64 bits
+        """
+        # Vectores de un valor por carril, aunque un operando sea constante
+        shape = (len(members),)
+        a = np.broadcast_to(np.asarray(a, dtype=np.int64), shape)
+        b = np.broadcast_to(np.asarray(b, dtype=np.int64), shape)
+        with np.errstate(over='ignore'):
+            value = _VECTOR_OPS[op](a, b)
+        self._target(result, frame)[sel] = value
+        failed = _overflowed(op, a, b, value)
+        return failed if failed.any() else None
+
+    def _divide(self, left, right, result, sel, frame, members) -> Optional[tuple]:
+        """
+        Ejecuta '/'. Un segmento entero trunca, como int(a / b).
+        Returns:
+            None, o las máscaras (división entre cero, desbordamiento): en
+            un segmento entero el cociente también puede no caber en 64 bits
+        """
+        a = self._read(left, sel, frame)
+        b = self._read(right, sel, frame)
+        zero = np.asarray(b) == 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            value = np.true_divide(a, b)
+        overflow = None
+        if self.memory.type_of(result) != 'float':
+            value = np.trunc(value)
+            # Como int(a / b): el cociente en float puede llegar a 2**63
+            overflow = np.isfinite(value) & ((value < -2.0 ** 63) | (value >= 2.0 ** 63))
+            value = np.where(np.isfinite(value) & ~overflow, value, 0).astype(np.int64)
+        self._target(result, frame)[sel] = value
+        shape = (len(members),)
+        zero = np.broadcast_to(zero, shape)
+        overflow = np.broadcast_to(False if overflow is None else overflow, shape)
+        if zero.any() or overflow.any():
+            return zero, overflow
+        return None
+
+    def _print(self, addr, sel, frame, members) -> None:
+        outputs = self.outputs
+        if isinstance(addr, str) and addr.startswith('"') and addr.endswith('"'):
+            text = addr[1:-1]
+            for lane in members.tolist():
+                outputs[lane].append(text)
+            return
+        value = self._read(addr, sel, frame)
+        if not isinstance(value, np.ndarray):
+            text = str(value)
+            for lane in members.tolist():
+                outputs[lane].append(text)
+            return
+        # tolist() da int/float de Python, que se imprimen igual que en el intérprete
+        for lane, item in zip(members.tolist(), value.tolist()):
+            outputs[lane].append(str(item))
+
+def run_batch(program, inputs: Mapping[str, object], lanes: Optional[int] = None,
+              max_depth: int = DEFAULT_MAX_DEPTH) -> BatchResult:
+    """
+    Ejecuta un programa una vez por conjunto de entrada, con todos los
+    conjuntos avanzando juntos como vectores de NumPy.
+    Args:
+        program: CompiledProgram (o SemanticAnalyzer) ya analizado
+        inputs: Valor inicial de variables globales por nombre: una
+            secuencia con un valor por carril, o un escalar para todos
+        lanes: Número de carriles; por omisión, la longitud de las secuencias
+        max_depth: Profundidad máxima de llamadas
+    Returns:
+        BatchResult con la salida y las globales finales de cada carril.
+        Los enteros son de 64 bits; un desbordamiento o una división entre
+        cero termina sólo su carril, con el mismo mensaje que el intérprete.
+    Raises:
+        BatchError: Si las entradas no corresponden al programa o a lanes
+    """
+    sizes = {len(values) for values in inputs.values() if np.ndim(values) == 1}
+    if any(np.ndim(values) > 1 for values in inputs.values()):
+        raise BatchError("Cada entrada debe ser un escalar o una secuencia de valores.")
+    if lanes is None:
+        if len(sizes) != 1:
+            raise BatchError("Las secuencias de entrada deben tener la misma longitud; "
+                             "sin secuencias, indique lanes.")
+        lanes = sizes.pop()
+    elif sizes - {lanes}:
+        raise BatchError(f"Las secuencias de entrada deben tener {lanes} valores.")
+    if lanes < 1:
+        raise BatchError("Se necesita al menos un carril.")
+
+    machine = _BatchMachine(program, lanes, max_depth)
+    for name, values in inputs.items():
+        machine.seed(name, values)
+    return machine.run()
@@ -0,0 +1,310 @@
+# semantic/bytecode.py
+
+import mmap
+import struct
+from collections.abc import Sequence
+from typing import Dict, List
+
+from semantic.function_directory import FunctionDirectory
+from semantic.memory_manager import MemoryManager, SCOPES, TYPES
+from semantic.program import CompiledProgram
+from semantic.variable_table import VariableTable
+
+# Versión del compilador: forma parte de la llave de la caché, por lo que
+# debe cambiar siempre que cambie el código que se genera.
+COMPILER_VERSION = '1.6'
+
+MAGIC = b'BDUCKOBJ'
+FORMAT_VERSION = 2
+
+# Archivos a partir de este tamaño se leen con mmap en lugar de copiarse
+MMAP_THRESHOLD = 64 * 1024
+
+_HEADER = struct.Struct('<8sHH')    # magic, versión de formato, largo de COMPILER_VERSION
+_U32 = struct.Struct('<I')
+_I32 = struct.Struct('<i')
+_QUAD = struct.Struct('<BBiii')     # opcode, tipos de operando, izq, der, resultado
+_CONST_INT = struct.Struct('<Biq')  # tipo, dirección, valor
+_CONST_FLOAT = struct.Struct('<Bid')
+_VAR = struct.Struct('<IIi')        # nombre, tipo, dirección
+
+# Tipo de cada operando de un cuádruplo, 2 bits por operando
+_NONE, _INT, _STR = 0, 1, 2
+
+class BytecodeError(Exception):
+    """Para archivos objeto inválidos o de otra versión."""
+    pass
+
+# ————————————————————————————————————————————————
+# Escritura
+# ————————————————————————————————————————————————
+class _Writer:
+    def __init__(self):
+        self.body = bytearray()
+        self.strings: List[str] = []
+        self._string_index: Dict[str, int] = {}
+
+    def string(self, text: str) -> int:
+        if text not in self._string_index:
+            self._string_index[text] = len(self.strings)
+            self.strings.append(text)
+        return self._string_index[text]
+
+    def u32(self, value: int) -> None:
+        self.body += _U32.pack(value)
+
+    def i32(self, value: int) -> None:
+        self.body += _I32.pack(value)
+
+    def pack(self, fmt: struct.Struct, *values) -> None:
+        self.body += fmt.pack(*values)
+
+def _encode_operand(writer: _Writer, value):
+    if value is None:
+        return _NONE, 0
+    if isinstance(value, str):
+        return _STR, writer.string(value)
+    return _INT, value
+
+def _write_variables(writer: _Writer, table: VariableTable) -> None:
+    variables = table.all_variables()
+    writer.u32(len(variables))
+    for name, entry in variables.items():
+        writer.pack(_VAR, writer.string(name), writer.string(entry.var_type), entry.address)
+
+def _write_sizes(writer: _Writer, sizes: Dict[str, int]) -> None:
+    for var_type in TYPES:
+        writer.u32(sizes.get(var_type, 0))
+
+def dumps(program) -> bytes:
+    """
+    Serializa un programa compilado (CompiledProgram o SemanticAnalyzer).
+    Secciones, en orden: cadenas, operadores, cuádruplos (registros de
+    tamaño fijo), constantes, bits de desplazamiento y uso de segmentos,
+    globales y funciones.
+    """
+    writer = _Writer()
+
+    # Cuádruplos
+    ops: List[str] = []
+    op_index: Dict[str, int] = {}
+    quads = bytearray()
+    count = 0
+    for op, left, right, result in program.quadruples:
+        if op not in op_index:
+            op_index[op] = len(ops)
+            ops.append(op)
+        kl, vl = _encode_operand(writer, left)
+        kr, vr = _encode_operand(writer, right)
+        kd, vd = _encode_operand(writer, result)
+        quads += _QUAD.pack(op_index[op], kl | kr << 2 | kd << 4, vl, vr, vd)
+        count += 1
+    writer.u32(len(ops))
+    for op in ops:
+        writer.u32(writer.string(op))
+    writer.u32(count)
+    writer.body += quads
+
+    # Tabla de constantes
+    constants = program.memory.constants()
+    writer.u32(len(constants))
+    for value, addr in constants:
+        try:
+            if isinstance(value, int):
+                writer.pack(_CONST_INT, 0, addr, value)
+            else:
+                writer.pack(_CONST_FLOAT, 1, addr, value)
+        except struct.error as e:
+            raise BytecodeError(f"Constante {value!r} no representable en el archivo objeto: {e}")
+
+    # Direcciones usadas por segmento
+    writer.u32(program.memory.segment_bits)
+    usage = program.memory.usage()
+    for scope in SCOPES:
+        _write_sizes(writer, usage[scope])
+
+    # Globales
+    _write_variables(writer, program.global_vars)
+
+    # Directorio de funciones
+    functions = program.func_dir.all_functions()
+    writer.u32(len(functions))
+    for name, fe in functions.items():
+        writer.u32(writer.string(name))
+        writer.u32(writer.string(fe.return_type))
+        writer.i32(fe.start_quad)
+        writer.u32(len(fe.param_types))
+        for var_type in fe.param_types:
+            writer.u32(writer.string(var_type))
+        writer.u32(len(fe.param_addrs))
+        for addr in fe.param_addrs:
+            writer.i32(addr)
+        _write_variables(writer, fe.variables)
+        _write_sizes(writer, fe.local_sizes)
+        _write_sizes(writer, fe.temp_sizes)
+
+    version = COMPILER_VERSION.encode('utf-8')
+    out = bytearray(_HEADER.pack(MAGIC, FORMAT_VERSION, len(version)))
+    out += version
+    out += _U32.pack(len(writer.strings))
+    for text in writer.strings:
+        data = text.encode('utf-8')
+        out += _U32.pack(len(data))
+        out += data
+    out += writer.body
+    return bytes(out)
+
+# ————————————————————————————————————————————————
+# Lectura
+# ————————————————————————————————————————————————
+class QuadView(Sequence):
+    """
+    Vista de sólo lectura de la sección de cuádruplos. Decodifica cada
+    registro al pedirlo, directamente desde el buffer (bytes o mmap), sin
+    copiar la sección.
+    """
+    def __init__(self, buffer, offset: int, count: int, ops: List[str], strings: List[str]):
+        self._view = memoryview(buffer)[offset:offset + count * _QUAD.size]
+        self._count = count
+        self._ops = ops
+        self._strings = strings
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _decode(self, record):
+        op, kinds, left, right, result = record
+        strings = self._strings
+        values = []
+        for shift, value in ((0, left), (2, right), (4, result)):
+            kind = (kinds >> shift) & 3
+            if kind == _NONE:
+                values.append(None)
+            elif kind == _STR:
+                values.append(strings[value])
+            else:
+                values.append(value)
+        return (self._ops[op], values[0], values[1], values[2])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("índice de cuádruplo fuera de rango")
+        return self._decode(_QUAD.unpack_from(self._view, index * _QUAD.size))
+
+    def __iter__(self):
+        for record in _QUAD.iter_unpack(self._view):
+            yield self._decode(record)
+
+class _Reader:
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.offset = 0
+        self.strings: List[str] = []
+
+    def unpack(self, fmt: struct.Struct):
+        values = fmt.unpack_from(self.buffer, self.offset)
+        self.offset += fmt.size
+        return values
+
+    def u32(self) -> int:
+        return self.unpack(_U32)[0]
+
+    def i32(self) -> int:
+        return self.unpack(_I32)[0]
+
+    def raw(self, size: int) -> bytes:
+        data = bytes(self.buffer[self.offset:self.offset + size])
+        self.offset += size
+        return data
+
+    def string(self) -> str:
+        return self.strings[self.u32()]
+
+def _read_variables(reader: _Reader, table: VariableTable) -> None:
+    for _ in range(reader.u32()):
+        name, var_type, addr = reader.unpack(_VAR)
+        table.add_variable(reader.strings[name], reader.strings[var_type], addr)
+
+def _read_sizes(reader: _Reader) -> Dict[str, int]:
+    return {var_type: reader.u32() for var_type in TYPES}
+
+def loads(buffer) -> CompiledProgram:
+    """
+    Reconstruye un programa compilado a partir de un buffer producido por
+    dumps(). Los cuádruplos quedan como una QuadView sobre el buffer.
+    Raises:
+        BytecodeError: Si el buffer no es un archivo objeto de esta versión
+    """
+    reader = _Reader(buffer)
+    try:
+        magic, version, version_len = reader.unpack(_HEADER)
+        if magic != MAGIC:
+            raise BytecodeError("No es un archivo objeto de BabyDuck")
+        compiler_version = reader.raw(version_len).decode('utf-8')
+        if version != FORMAT_VERSION or compiler_version != COMPILER_VERSION:
+            raise BytecodeError(
+                f"Archivo objeto de otra versión ({version}, {compiler_version})"
+            )
+
+        for _ in range(reader.u32()):
+            reader.strings.append(reader.raw(reader.u32()).decode('utf-8'))
+
+        ops = [reader.string() for _ in range(reader.u32())]
+        count = reader.u32()
+        quadruples = QuadView(buffer, reader.offset, count, ops, reader.strings)
+        reader.offset += count * _QUAD.size
+
+        constants = []
+        for _ in range(reader.u32()):
+            fmt = _CONST_FLOAT if buffer[reader.offset] == 1 else _CONST_INT
+            _, addr, value = reader.unpack(fmt)
+            constants.append((value, addr))
+
+        segment_bits = reader.u32()
+        usage = {scope: _read_sizes(reader) for scope in SCOPES}
+        memory = MemoryManager(segment_bits)
+        memory.restore(usage, constants)
+
+        global_vars = VariableTable()
+        _read_variables(reader, global_vars)
+
+        func_dir = FunctionDirectory()
+        for _ in range(reader.u32()):
+            name = reader.string()
+            return_type = reader.string()
+            start_quad = reader.i32()
+            param_types = [reader.string() for _ in range(reader.u32())]
+            func_dir.add_function(name, return_type, param_types, start_quad)
+            fe = func_dir.get_function(name)
+            fe.param_addrs = [reader.i32() for _ in range(reader.u32())]
+            _read_variables(reader, fe.variables)
+            local_sizes = _read_sizes(reader)
+            temp_sizes = _read_sizes(reader)
+            func_dir.set_frame_sizes(name, local_sizes, temp_sizes)
+    except (struct.error, IndexError, UnicodeDecodeError, ValueError) as e:
+        raise BytecodeError(f"Archivo objeto dañado: {e}")
+
+    return CompiledProgram(quadruples, global_vars, func_dir, memory)
+
+def dump_file(program, path: str) -> None:
+    """Escribe el archivo objeto de un programa."""
+    with open(path, 'wb') as f:
+        f.write(dumps(program))
+
+def load_file(path: str) -> CompiledProgram:
+    """
+    Carga un archivo objeto. Los archivos grandes se mapean en memoria,
+    de modo que la sección de cuádruplos se lee sin copiarla.
+    """
+    with open(path, 'rb') as f:
+        size = f.seek(0, 2)
+        f.seek(0)
+        if size >= MMAP_THRESHOLD:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = f.read()
+    return loads(buffer)
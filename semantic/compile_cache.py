@@ -0,0 +1,153 @@
+# semantic/compile_cache.py
+
+import hashlib
+import os
+import tempfile
+from typing import Optional
+
+from semantic import bytecode
+from semantic.program import CompiledProgram
+
+# Tamaño máximo por omisión del directorio de caché
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+OBJECT_SUFFIX = '.bdo'
+
+def default_cache_dir() -> str:
+    """
+    Directorio de caché: $BABYDUCK_CACHE_DIR, o babyduck/ dentro de
+    $XDG_CACHE_HOME (~/.cache por omisión).
+    """
+    if os.environ.get('BABYDUCK_CACHE_DIR'):
+        return os.environ['BABYDUCK_CACHE_DIR']
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'babyduck')
+
+class CompileCache:
+    """
+    Caché en disco de programas compilados. Cada entrada es un archivo
+    objeto (ver semantic.bytecode) nombrado con el hash del código fuente
+    y de la versión del compilador, así que un cambio en cualquiera de los
+    dos produce otra llave. Al superar max_bytes se eliminan primero las
+    entradas usadas hace más tiempo (la fecha de modificación se actualiza
+    en cada acierto). variant distingue programas compilados con opciones
+    distintas (p. ej. sin optimizar) a partir del mismo código.
+    """
+    # Extensión de las entradas; evict() y clear() sólo tocan estos archivos
+    suffix = OBJECT_SUFFIX
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 variant: str = ''):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.variant = variant
+
+    def key(self, source: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(
+            f"{bytecode.COMPILER_VERSION}/{bytecode.FORMAT_VERSION}/{self.variant}\0".encode('utf-8')
+        )
+        digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def path(self, source: str) -> str:
+        return os.path.join(self.directory, self.key(source) + self.suffix)
+
+    def get(self, source: str) -> Optional[CompiledProgram]:
+        """
+        Busca el programa compilado de un código fuente.
+        Returns:
+            El programa, o None si no está en caché o la entrada no es válida
+        """
+        path = self.path(source)
+        try:
+            program = bytecode.load_file(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, bytecode.BytecodeError):
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return program
+
+    def put(self, source: str, program) -> str:
+        """
+        Guarda el programa compilado de un código fuente y aplica el límite
+        de tamaño.
+        Returns:
+            Ruta del archivo objeto
+        """
+        path = self.path(source)
+        self._write(path, bytecode.dumps(program))
+        self.evict(keep=path)
+        return path
+
+    def _write(self, path: str, data: bytes) -> None:
+        """Escribe una entrada completa o nada: un lector nunca ve un archivo a medias."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Elimina las entradas menos usadas hasta quedar dentro de max_bytes.
+        Args:
+            keep: Entrada que no se elimina (la recién escrita)
+        Returns:
+            Bytes liberados
+        """
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+        for name in names:
+            if not name.endswith(self.suffix):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, path, st.st_size))
+            total += st.st_size
+
+        freed = 0
+        entries.sort()
+        for _, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            if self._remove(path):
+                total -= size
+                freed += size
+        return freed
+
+    def clear(self) -> None:
+        """Elimina todas las entradas."""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name.endswith(self.suffix):
+                self._remove(os.path.join(self.directory, name))
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,178 @@
+# semantic/compile_report.py
+
+import gc
+import time
+import tracemalloc
+from collections import Counter
+from typing import Callable, Dict, Tuple
+
+from lark import Transformer
+from lark.exceptions import VisitError
+
+from semantic.analyzer import SemanticAnalyzer
+from semantic.memory_manager import DEFAULT_SEGMENT_BITS, SCOPES, TYPES
+from semantic.program import CompiledProgram
+
+def compile_with_report(code: str, segment_bits: int = DEFAULT_SEGMENT_BITS,
+                        optimize: bool = True) -> Tuple[CompiledProgram, Dict]:
+    """
+    Compila un programa y reporta el costo de cada fase y el uso de memoria
+    virtual del resultado. Las fases se ejecutan dos veces: una para
+    medir tiempos y otra con tracemalloc para medir memoria, pues el
+    rastreo de asignaciones hace varias veces más lenta la compilación.
+    Args:
+        code: Código fuente BabyDuck
+        segment_bits: Bits de desplazamiento de cada segmento
+        optimize: Si se aplican las optimizaciones de semantic/optimizer.py
+    Returns:
+        (programa compilado, reporte); ver program_report() para el
+        contenido del reporte, más 'phases' con {fase: {'seconds',
+        'peak_bytes', 'retained_bytes'}} para parse, signatures,
+        transform y optimize
+    Raises:
+        lark.UnexpectedInput: Si hay un error de sintaxis
+        SemanticError: Si hay un error semántico
+        MemoryError: Si se agota un segmento de memoria
+    """
+    phases = {}
+
+    def timed(name, action):
+        t0 = time.perf_counter()
+        result = action()
+        phases[name] = {'seconds': time.perf_counter() - t0}
+        return result
+
+    def traced(name, action):
+        base, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = action()
+        current, peak = tracemalloc.get_traced_memory()
+        phases[name]['peak_bytes'] = peak - base
+        phases[name]['retained_bytes'] = current - base
+        return result
+
+    program, optimize_stats = _compile_phases(code, segment_bits, optimize, timed)
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        _compile_phases(code, segment_bits, optimize, traced)
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    report = program_report(program)
+    report['phases'] = phases
+    if optimize_stats is not None:
+        report['optimizer'] = optimize_stats
+    return program, report
+
+def compile_report(code: str, segment_bits: int = DEFAULT_SEGMENT_BITS,
+                   optimize: bool = True) -> Dict:
+    """Como compile_with_report(), pero devuelve sólo el reporte."""
+    return compile_with_report(code, segment_bits, optimize)[1]
+
+def _compile_phases(code: str, segment_bits: int, optimize: bool,
+                    measure: Callable) -> Tuple[CompiledProgram, Dict]:
+    """
+    Parseo, recolección de firmas, transformación y optimización, cada una
+    ejecutada a través de measure(nombre, acción).
+    """
+    import babyduck
+    from semantic.optimizer import optimize as optimize_program
+
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        analyzer = SemanticAnalyzer(segment_bits)
+        tree = measure('parse', lambda: babyduck.parser.parse(code))
+        measure('signatures', lambda: analyzer._collect_function_signatures(tree))
+        measure('transform', lambda: _transform(analyzer, tree))
+        program = CompiledProgram.from_analyzer(analyzer)
+        stats = None
+        if optimize:
+            stats = measure('optimize', lambda: optimize_program(program))
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return program, stats
+
+def _transform(analyzer: SemanticAnalyzer, tree) -> None:
+    """Segunda pasada de SemanticAnalyzer.transform(), sin recolectar firmas."""
+    try:
+        Transformer.transform(analyzer, tree)
+    except VisitError as e:
+        # Lark envuelve las excepciones lanzadas por el Transformer
+        raise e.orig_exc
+    analyzer._patch_calls()
+
+def program_report(program) -> Dict:
+    """
+    Métricas de un programa compilado:
+      - quadruples: total y cantidad por código de operación
+      - frames: locales y temporales por tipo del main y de cada función
+      - temps: temporales asignados por tipo, sumando todos los marcos
+      - constants: tamaño de la tabla de constantes, total y por tipo
+      - segments: {ámbito: {tipo: {'used', 'capacity', 'fill'}}}; para
+        local y temp, 'used' es el marco más grande
+    """
+    memory = program.memory
+    capacity = memory.segment_mask + 1
+
+    frames = {'main': {
+        'locals': {t: memory.used('local', t) for t in TYPES},
+        'temps': {t: memory.used('temp', t) for t in TYPES},
+    }}
+    for name, fe in program.func_dir.all_functions().items():
+        frames[name] = {
+            'locals': {t: fe.local_sizes.get(t, 0) for t in TYPES},
+            'temps': {t: fe.temp_sizes.get(t, 0) for t in TYPES},
+        }
+
+    used = {
+        'global': {t: memory.used('global', t) for t in TYPES},
+        'local': {t: max(f['locals'][t] for f in frames.values()) for t in TYPES},
+        'temp': {t: max(f['temps'][t] for f in frames.values()) for t in TYPES},
+        'const': {t: memory.used('const', t) for t in TYPES},
+    }
+    segments = {
+        scope: {t: {'used': used[scope][t], 'capacity': capacity,
+                    'fill': used[scope][t] / capacity}
+                for t in TYPES}
+        for scope in SCOPES
+    }
+
+    constants = Counter(memory.type_of(addr) for _, addr in memory.constants())
+    return {
+        'segment_bits': memory.segment_bits,
+        'quadruples': {
+            'total': len(program.quadruples),
+            'by_opcode': dict(Counter(quad[0] for quad in program.quadruples).most_common()),
+        },
+        'frames': frames,
+        'temps': {t: sum(f['temps'][t] for f in frames.values()) for t in TYPES},
+        'constants': {'total': sum(constants.values()),
+                      'by_type': {t: constants.get(t, 0) for t in TYPES}},
+        'segments': segments,
+    }
+
+def print_compile_report(report: Dict) -> None:
+    """Imprime un resumen legible del reporte de compile_with_report()."""
+    print("Reporte de compilación:")
+    for name, stats in report['phases'].items():
+        print(f"  {name:<12} {stats['seconds'] * 1000:9.2f} ms   "
+              f"pico {stats['peak_bytes'] / 1024:10.1f} KiB   "
+              f"retenido {stats['retained_bytes'] / 1024:10.1f} KiB")
+
+    quads = report['quadruples']
+    by_opcode = ", ".join(f"{op} {n}" for op, n in quads['by_opcode'].items())
+    print(f"  cuádruplos: {quads['total']} ({by_opcode})")
+    print("  temporales: " + ", ".join(f"{t} {n}" for t, n in report['temps'].items()))
+    print(f"  constantes: {report['constants']['total']}")
+
+    print(f"  segmentos (capacidad 2**{report['segment_bits']}):")
+    for scope, types in report['segments'].items():
+        cells = "   ".join(f"{t} {s['used']:>8} ({s['fill']:7.3%})" for t, s in types.items())
+        print(f"    {scope:<7} {cells}")
+    print()
@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List
 from semantic.variable_table import VariableTable
 
@@ -10,11 +10,17 @@ class FunctionEntry:
       - param_types: lista de tipos en orden de parametros
       - variables: VariableTable local (incluye parámetros)
       - start_quad: indice del primer cuadruplo de la funcion
+      - param_addrs: direcciones de los parametros en orden de declaracion
+      - local_sizes: locales (incluye parametros) por tipo en su marco
+      - temp_sizes: temporales por tipo en su marco
     """
     return_type: str
     param_types: List[str]
     variables: VariableTable
     start_quad: int
+    param_addrs: List[int] = field(default_factory=list)
+    local_sizes: Dict[str, int] = field(default_factory=dict)
+    temp_sizes: Dict[str, int] = field(default_factory=dict)
 
 class FunctionDirectory:
     """
@@ -42,11 +48,32 @@ class FunctionDirectory:
         )
         self._functions[name] = entry
 
+    def add_entry(self, name: str, entry: FunctionEntry) -> None:
+        """
+        Registra una FunctionEntry ya construida, p. ej. la de una función
+        que no cambió desde la compilación anterior.
+        """
+        if name in self._functions:
+            raise KeyError(f"Funcion '{name}' ya declarada.")
+        self._functions[name] = entry
+
     def get_function(self, name: str) -> FunctionEntry:
         if name not in self._functions:
             raise KeyError(f"Funcion '{name}' no declarada.")
         return self._functions[name]
 
+    def set_frame_sizes(self,
+                        name: str,
+                        local_sizes: Dict[str, int],
+                        temp_sizes: Dict[str, int]) -> None:
+        """
+        Registra el tamaño del marco de activacion de una funcion,
+        calculado al terminar de compilarla.
+        """
+        entry = self.get_function(name)
+        entry.local_sizes = dict(local_sizes)
+        entry.temp_sizes = dict(temp_sizes)
+
     def has_function(self, name: str) -> bool:
         return name in self._functions
 
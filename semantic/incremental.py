@@ -0,0 +1,372 @@
+# semantic/incremental.py
+
+import hashlib
+import os
+import pickle
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from lark.exceptions import LarkError, VisitError
+
+from semantic.analyzer import SemanticAnalyzer, SemanticError
+from semantic.function_directory import FunctionDirectory, FunctionEntry
+from semantic.memory_manager import DEFAULT_SEGMENT_BITS, TYPES
+from semantic.optimizer import JUMP_OPS, main_start, optimize as optimize_program
+from semantic.program import CompiledProgram
+
+# Versión del estado guardado; cambia si cambian CompiledUnit o IncrementalCompiler
+STATE_VERSION = 1
+
+# Lo único que se necesita del código fuente para separarlo en unidades:
+# cadenas (para saltar su contenido), identificadores/palabras reservadas,
+# llaves y punto y coma
+_SPLIT_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[A-Za-z_][A-Za-z0-9_]*|[{};]')
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def state_path(source_path: str, cache_dir: Optional[str] = None) -> str:
+    """
+    Archivo donde se guarda el estado incremental de un programa, dentro
+    de incremental/ en el directorio de caché.
+    """
+    from semantic.compile_cache import default_cache_dir
+    key = _digest(os.path.abspath(source_path))[:32]
+    return os.path.join(cache_dir or default_cache_dir(), 'incremental', key + '.state')
+
+@dataclass
+class SourceLayout:
+    """
+    Código fuente separado en unidades de compilación:
+      - header: 'program X;' y las variables globales
+      - functions: (nombre, texto de 'void ...' hasta su ';') en orden
+      - main: texto del cuerpo del main, de '{' a '}'
+    """
+    header: str
+    functions: List[Tuple[str, str]]
+    main: str
+
+def split_source(code: str) -> Optional[SourceLayout]:
+    """
+    Separa un programa en encabezado, funciones y main sin parsearlo,
+    siguiendo sólo palabras reservadas y llaves.
+    Returns:
+        El SourceLayout, o None si el código no tiene la forma esperada
+        (p. ej. por un error de sintaxis, que reporta el parser completo)
+        o declara dos veces la misma función
+    """
+    tokens = [(m.group(), m.start(), m.end()) for m in _SPLIT_TOKEN.finditer(code)]
+    i, n = 0, len(tokens)
+
+    def body_end(i):
+        """Índice del '}' que cierra el '{' en tokens[i]."""
+        depth = 0
+        while i < n:
+            text = tokens[i][0]
+            if text == '{':
+                depth += 1
+            elif text == '}':
+                depth -= 1
+                if depth == 0:
+                    return i
+            i += 1
+        return None
+
+    while i < n and tokens[i][0] not in ('void', 'main'):
+        i += 1
+    if i == n:
+        return None
+    header = code[:tokens[i][1]]
+
+    functions = []
+    while i < n and tokens[i][0] == 'void':
+        start = tokens[i][1]
+        if i + 1 >= n:
+            return None
+        name = tokens[i + 1][0]
+        while i < n and tokens[i][0] != '{':
+            i += 1
+        i = body_end(i)
+        if i is None or i + 1 >= n or tokens[i + 1][0] != ';':
+            return None
+        i += 1
+        functions.append((name, code[start:tokens[i][2]]))
+        i += 1
+
+    if i >= n or tokens[i][0] != 'main' or i + 1 >= n or tokens[i + 1][0] != '{':
+        return None
+    close = body_end(i + 1)
+    if close is None or close + 2 != n or tokens[close + 1][0] != 'end':
+        return None
+    names = [name for name, _ in functions]
+    if len(set(names)) != len(names):
+        return None
+    return SourceLayout(header, functions, code[tokens[i + 1][1]:tokens[close][2]])
+
+@dataclass
+class CompiledUnit:
+    """
+    Código de una función o del main, listo para reubicarse:
+      - digest: hash del texto fuente de la unidad
+      - quadruples: cuádruplos con destinos de salto relativos al inicio
+        de la unidad y GOSUB sin destino (se enlazan al ensamblar)
+      - callees: firma (tipos de parámetros) de cada función llamada,
+        tal como era al compilar la unidad
+      - entry: FunctionEntry de la función (None para el main)
+      - temp_sizes: temporales por tipo del main
+    """
+    digest: str
+    quadruples: List[tuple]
+    callees: Dict[str, Tuple[str, ...]]
+    entry: Optional[FunctionEntry] = None
+    temp_sizes: Dict[str, int] = field(default_factory=dict)
+
+class IncrementalCompiler:
+    """
+    Compilador que conserva, entre compilaciones del mismo programa, el
+    código de cada función. Al recompilar sólo se parsean y analizan las
+    funciones cuyo texto cambió (o que llaman a una función cuya firma
+    cambió), y el programa se ensambla concatenando los bloques de
+    cuádruplos y enlazando de nuevo los GOSUB.
+
+    Las locales y temporales de cada función son desplazamientos dentro de
+    su propio marco, así que el código de una función no depende de dónde
+    quede en el programa. Un cambio en el encabezado (variables globales)
+    sí cambia direcciones compartidas, y provoca una compilación completa.
+    """
+    def __init__(self, segment_bits: int = DEFAULT_SEGMENT_BITS, optimize: bool = True):
+        self.segment_bits = segment_bits
+        self.optimize = optimize
+        self._reset()
+
+    def _reset(self):
+        self.header_digest: Optional[str] = None
+        self.global_vars = None
+        self.memory = None
+        self.units: Dict[str, CompiledUnit] = {}
+        self.main_unit: Optional[CompiledUnit] = None
+        # Unidades compiladas en la última llamada a compile() ('main' para el main)
+        self.recompiled: List[str] = []
+
+    # ————————————————————————————————————————————————
+    # Compilación
+    # ————————————————————————————————————————————————
+    def compile(self, code: str) -> CompiledProgram:
+        """
+        Compila un programa reutilizando las unidades que no cambiaron.
+        Raises:
+            lark.UnexpectedInput: Si hay un error de sintaxis
+            SemanticError: Si hay un error semántico
+        """
+        layout = split_source(code)
+        if layout is not None and self.header_digest == _digest(layout.header):
+            try:
+                return self._compile_incremental(layout)
+            except (LarkError, SemanticError, MemoryError):
+                # Cualquier error se reporta desde la compilación completa,
+                # con líneas y columnas del programa entero
+                pass
+        return self._compile_full(code, layout)
+
+    def _compile_full(self, code: str, layout: Optional[SourceLayout]) -> CompiledProgram:
+        import babyduck
+        self._reset()
+        analyzer = SemanticAnalyzer(self.segment_bits)
+        _transform(analyzer, babyduck.parser.parse(code))
+
+        functions = analyzer.func_dir.all_functions()
+        if layout is None or list(functions) != [name for name, _ in layout.functions]:
+            program = CompiledProgram.from_analyzer(analyzer)
+            if self.optimize:
+                optimize_program(program)
+            return program
+
+        # Separar el resultado en unidades
+        self.global_vars = analyzer.global_vars
+        self.memory = analyzer.memory
+        quads = analyzer.quadruples
+        bounds = [fe.start_quad for fe in functions.values()] + [main_start(quads), len(quads)]
+        for (name, text), start, end in zip(layout.functions, bounds, bounds[1:]):
+            self.units[name] = self._unit(text, quads[start:end], start, functions[name])
+        self.main_unit = self._unit(layout.main, quads[bounds[-2]:], bounds[-2])
+        self.main_unit.temp_sizes = {t: analyzer.memory.used('temp', t) for t in TYPES}
+
+        self.header_digest = _digest(layout.header)
+        self.recompiled = list(self.units) + ['main']
+        return self._assemble(layout)
+
+    def _compile_incremental(self, layout: SourceLayout) -> CompiledProgram:
+        parser = _fragment_parser()
+        analyzer = SemanticAnalyzer(self.segment_bits)
+
+        # Funciones cuyo texto cambió y su nueva firma
+        trees = {}
+        signatures = {}
+        for name, text in layout.functions:
+            unit = self.units.get(name)
+            if unit is not None and unit.digest == _digest(text):
+                signatures[name] = tuple(unit.entry.param_types)
+            else:
+                trees[name] = parser.parse(text, start='func')
+                param_list = trees[name].children[3]
+                signatures[name] = tuple(t for _, t in analyzer._extract_params(param_list.children))
+
+        # Unidades sin cambios que llaman a una función cuya firma cambió
+        def stale(unit):
+            return any(signatures.get(callee) != sig for callee, sig in unit.callees.items())
+
+        for name, text in layout.functions:
+            if name not in trees and stale(self.units[name]):
+                trees[name] = parser.parse(text, start='func')
+        main_changed = self.main_unit.digest != _digest(layout.main) or stale(self.main_unit)
+
+        # Directorio: entradas conservadas y firmas de las funciones a compilar
+        func_dir = FunctionDirectory()
+        for name, _ in layout.functions:
+            if name not in trees:
+                func_dir.add_entry(name, self.units[name].entry)
+        for tree in trees.values():
+            self._analyzer(func_dir)._collect_function_signatures(tree)
+
+        units = {}
+        for name, text in layout.functions:
+            if name in trees:
+                analyzer = self._analyzer(func_dir)
+                _transform(analyzer, trees[name])
+                units[name] = self._unit(text, analyzer.quadruples, 0, func_dir.get_function(name))
+            else:
+                units[name] = self.units[name]
+
+        main_unit = self.main_unit
+        if main_changed:
+            analyzer = self._analyzer(func_dir)
+            saved = self.memory.begin_frame()
+            try:
+                _transform(analyzer, parser.parse(layout.main, start='body'))
+            finally:
+                _, temp_sizes = self.memory.end_frame(saved)
+            main_unit = self._unit(layout.main, analyzer.quadruples, 0)
+            main_unit.temp_sizes = temp_sizes
+
+        self.units = units
+        self.main_unit = main_unit
+        self.recompiled = list(trees) + (['main'] if main_changed else [])
+        return self._assemble(layout)
+
+    def _analyzer(self, func_dir: FunctionDirectory) -> SemanticAnalyzer:
+        """Analizador nuevo que comparte globales, memoria y directorio."""
+        analyzer = SemanticAnalyzer(self.segment_bits)
+        analyzer.global_vars = self.global_vars
+        analyzer.memory = self.memory
+        analyzer.func_dir = func_dir
+        return analyzer
+
+    def _unit(self, text: str, quads, start: int, entry: FunctionEntry = None) -> CompiledUnit:
+        """Crea una unidad a partir de sus cuádruplos, que empiezan en start."""
+        relative = []
+        callees = {}
+        for op, left, right, result in quads:
+            if op in JUMP_OPS:
+                result -= start
+            elif op == 'GOSUB':
+                result = None
+            elif op == 'ERA':
+                callees[result] = None
+            relative.append((op, left, right, result))
+
+        unit = CompiledUnit(_digest(text), relative, callees, entry)
+        if self.optimize:
+            unit_dir = FunctionDirectory()
+            if entry is not None:
+                entry.start_quad = 0
+                unit_dir.add_entry('', entry)
+            program = CompiledProgram(relative, self.global_vars, unit_dir, self.memory)
+            optimize_program(program)
+            # optimize() devuelve un QuadStore; las unidades se concatenan
+            # en cada ensamblado y se guardan como tuplas
+            unit.quadruples = list(program.quadruples)
+        return unit
+
+    def _assemble(self, layout: SourceLayout) -> CompiledProgram:
+        """Concatena las unidades, reubica sus saltos y enlaza los GOSUB."""
+        quadruples = []
+        func_dir = FunctionDirectory()
+        for name, _ in layout.functions:
+            unit = self.units[name]
+            unit.entry.start_quad = len(quadruples)
+            func_dir.add_entry(name, unit.entry)
+            _append(quadruples, unit.quadruples)
+
+        _append(quadruples, self.main_unit.quadruples)
+        self.memory.set_usage('local', {})
+        self.memory.set_usage('temp', self.main_unit.temp_sizes)
+
+        # Destinos de GOSUB y firmas vistas por cada unidad
+        calls = []
+        for i, (op, left, right, result) in enumerate(quadruples):
+            if op == 'ERA':
+                calls.append(result)
+            elif op == 'GOSUB':
+                quadruples[i] = (op, left, right, func_dir.get_function(calls.pop()).start_quad)
+        for unit in list(self.units.values()) + [self.main_unit]:
+            for callee in unit.callees:
+                unit.callees[callee] = tuple(func_dir.get_function(callee).param_types)
+
+        return CompiledProgram(quadruples, self.global_vars, func_dir, self.memory)
+
+    # ————————————————————————————————————————————————
+    # Persistencia
+    # ————————————————————————————————————————————————
+    def save(self, path: str) -> None:
+        """Guarda el estado para la siguiente compilación."""
+        from semantic.bytecode import COMPILER_VERSION
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump((STATE_VERSION, COMPILER_VERSION, self), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: str, segment_bits: int = DEFAULT_SEGMENT_BITS,
+             optimize: bool = True) -> 'IncrementalCompiler':
+        """
+        Carga el estado guardado con save(). Si no existe, es de otra
+        versión o se compiló con otras opciones, devuelve un compilador
+        vacío (la siguiente compilación será completa).
+        """
+        from semantic.bytecode import COMPILER_VERSION
+        try:
+            with open(path, 'rb') as f:
+                version, compiler_version, compiler = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError, TypeError):
+            return cls(segment_bits, optimize)
+        if ((version, compiler_version) != (STATE_VERSION, COMPILER_VERSION)
+                or not isinstance(compiler, cls)
+                or (compiler.segment_bits, compiler.optimize) != (segment_bits, optimize)):
+            return cls(segment_bits, optimize)
+        return compiler
+
+def _append(quadruples: List[tuple], unit_quads: List[tuple]) -> None:
+    """Agrega los cuádruplos de una unidad, reubicando sus saltos."""
+    start = len(quadruples)
+    for op, left, right, result in unit_quads:
+        if op in JUMP_OPS:
+            result += start
+        quadruples.append((op, left, right, result))
+
+def _transform(analyzer: SemanticAnalyzer, tree) -> None:
+    """analyzer.transform(tree), sin el VisitError con que Lark envuelve los errores."""
+    try:
+        analyzer.transform(tree)
+    except VisitError as e:
+        raise e.orig_exc
+
+_FRAGMENT_PARSER = None
+
+def _fragment_parser():
+    """Parser LALR que acepta una función o un cuerpo sueltos, creado al primer uso."""
+    global _FRAGMENT_PARSER
+    if _FRAGMENT_PARSER is None:
+        import babyduck
+        _FRAGMENT_PARSER = babyduck.build_parser(cache_name='babyduck_fragments',
+                                                 start=['func', 'body'])
+    return _FRAGMENT_PARSER
@@ -1,34 +1,132 @@
 # semantic/interpreter.py
 
+import operator
+
+from semantic.runtime_memory import RuntimeMemory, FramePool
+from semantic.linker import link
+from semantic.output import stdout_sink
+
 class RuntimeError(Exception):
     """Para errores en tiempo de ejecución."""
     pass
 
+# Integer opcodes used by the table-driven engine
+OPCODES = {
+    '=': 0, 'print': 1, 'PRINT_END': 2,
+    '+': 3, '-': 4, '*': 5, '/': 6,
+    '>': 7, '<': 8, '==': 9, '!=': 10,
+    'GOTOF': 11, 'GOTO': 12,
+    'ERA': 13, 'PARAM': 14, 'GOSUB': 15, 'ENDFUNC': 16,
+}
+UNKNOWN_OPCODE = -1
+
+ARITHMETIC_OPS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+}
+
+def _truncating_div(a, b):
+    """Division stored into an int segment (int / int keeps int type)."""
+    return int(a / b)
+
+def _overflow(index):
+    """Error for a result that does not fit in an int segment (int64)."""
+    return RuntimeError(f"Desbordamiento de entero en el cuádruplo {index}: "
+                        f"el resultado no cabe en 64 bits")
+
+COMPARISON_OPS = {
+    '>': operator.gt,
+    '<': operator.lt,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+# Available execution engines: 'table' loads the quadruples once into
+# pre-bound handlers, 'legacy' keeps the original if/elif interpreter loop.
+ENGINES = ('table', 'legacy')
+
+# Operations that only exist in the legacy engine's resolved program (see
+# Interpreter._resolve): a print of a string literal with its quotes
+# already stripped, and a division stored into an int segment.
+PRINT_TEXT = 'PRINT_TEXT'
+INT_DIV = 'INT_DIV'
+
+def _literal_text(operand):
+    """Text of a string literal operand without its quotes, or None."""
+    if isinstance(operand, str) and operand.startswith('"') and operand.endswith('"'):
+        return operand[1:-1]
+    return None
+
 class Interpreter:
-    def __init__(self, quadruples, global_vars, func_dir, memory):
-        self.quadruples = quadruples
+    def __init__(self, quadruples, global_vars, func_dir, memory, engine='table', output=None,
+                 fuse=True):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+        # Call sites are resolved once here: PARAM carries the callee's
+        # parameter address and GOSUB the callee's name and start quad
+        self.quadruples = link(quadruples, func_dir)
         self.global_vars = global_vars
         self.func_dir = func_dir
         self.memory = memory
+        self.engine = engine
+        # Where print statements write; buffered stdout unless the caller
+        # passes another OutputSink (e.g. a MemorySink to capture output)
+        self.output = stdout_sink() if output is None else output
 
         # Execution state
         self.instruction_pointer = 0
-        self.call_stack = []
-        self.memory_values = {}  # address -> value mapping
-        self.current_function_call = None  # Current function being called
-        self.param_values = {}  # Parameter values for current function call
+        self.call_stack = []  # (return ip, caller segments, callee frame)
+        self.pending_frame = None  # Frame reserved by ERA for the next GOSUB
 
-        # Initialize global variables to 0
-        for name, var_entry in global_vars.all_variables().items():
-            self.memory_values[var_entry.address] = 0
+        # Typed memory segments: globals start at 0 and constants are
+        # loaded from the memory manager. Local and temp segments belong
+        # to the active frame and are swapped on every call and return.
+        self.memory_values = RuntimeMemory(memory)
+        self.frame_pool = FramePool(self.memory_values, func_dir)
 
-        # Initialize constants from memory manager
-        for value, addr in memory._const_table.items():
-            self.memory_values[addr] = value
+        # Loaded program for the table engine: one opcode and one
+        # pre-bound step function per quadruple. With fuse, common pairs
+        # of quadruples load as one superinstruction (see
+        # semantic/superinstructions.py); self.fusions counts them.
+        self.fuse = fuse
+        self.fusions = {}
+        self.opcodes = []
+        self._code = []
+        # Resolved program for the legacy engine: operands classified once
+        self._resolved = []
+        if engine == 'table':
+            self._load()
+        else:
+            self._resolved = self._resolve()
 
     def execute(self):
         """Execute the quadruples starting from the main program."""
+        self.instruction_pointer = self._main_start()
 
+        try:
+            if self.engine == 'table':
+                self._run_table()
+            else:
+                self._run_legacy()
+            self.output.write("\nPROGRAMA TERMINADO\n")
+        finally:
+            # Output printed before a runtime error is still delivered
+            self.output.flush()
+
+    def instrument(self, wrap):
+        """
+        Replace every loaded step with wrap(index, step), e.g. to count or
+        time each quadruple. The dispatch loop itself is unchanged, so an
+        interpreter that is never instrumented pays nothing for it.
+        """
+        if self.engine != 'table':
+            raise ValueError("Only the table engine can be instrumented")
+        self._code = [wrap(index, step) for index, step in enumerate(self._code)]
+
+    def _main_start(self):
+        """Return the index of the first quadruple of the main program."""
         # Find main program start (after all function definitions)
         main_start = 0  # Default to start from beginning if no functions
         last_endfunc = -1
@@ -43,10 +141,33 @@ class Interpreter:
         if last_endfunc >= 0:
             main_start = last_endfunc + 1
 
-        self.instruction_pointer = main_start
+        return main_start
+
+    def _run_table(self):
+        """Run the loaded program: one indexed call per executed quadruple."""
+        code = self._code
+        end = len(code)
+        ip = self.instruction_pointer
+        try:
+            while ip < end:
+                ip = code[ip](ip)
+        except OverflowError:
+            # An int segment is int64: the failed store left memory unchanged
+            self.instruction_pointer = ip
+            raise _overflow(ip) from None
+        self.instruction_pointer = ip
 
-        while self.instruction_pointer < len(self.quadruples):
-            quad = self.quadruples[self.instruction_pointer]
+    def _run_legacy(self):
+        """Original interpreter loop, kept as a fallback to compare outputs."""
+        try:
+            self._legacy_loop()
+        except OverflowError:
+            raise _overflow(self.instruction_pointer) from None
+
+    def _legacy_loop(self):
+        quadruples = self._resolved
+        while self.instruction_pointer < len(quadruples):
+            quad = quadruples[self.instruction_pointer]
             op, left, right, result = quad
 
             # Debug output (optional - can be disabled)
@@ -56,6 +177,8 @@ class Interpreter:
                 self._execute_assign(left, result)
             elif op == 'print':
                 self._execute_print(left)
+            elif op == PRINT_TEXT:
+                self.output.write(left)
             elif op == 'PRINT_END':
                 self._execute_print_end()
             elif op == '+':
@@ -66,6 +189,8 @@ class Interpreter:
                 self._execute_arithmetic(left, right, result, lambda a, b: a * b)
             elif op == '/':
                 self._execute_arithmetic(left, right, result, lambda a, b: a / b)
+            elif op == INT_DIV:
+                self._execute_arithmetic(left, right, result, _truncating_div)
             elif op == '>':
                 self._execute_comparison(left, right, result, lambda a, b: a > b)
             elif op == '<':
@@ -94,51 +219,340 @@ class Interpreter:
                 print(f"Warning: Unknown operation '{op}' at quad {self.instruction_pointer}")
 
             self.instruction_pointer += 1
-        
-        print("\nPROGRAMA TERMINADO")
-
-    def _get_value(self, address):
-        """Get value from memory address or return the address if it's a literal."""
-        if isinstance(address, str) and address.startswith('"') and address.endswith('"'):
-            # String literal
-            return address[1:-1]  # Remove quotes
-        elif address in self.memory_values:
-            return self.memory_values[address]
+
+    # ————————————————————————————————————————————————
+    # Legacy engine: resolving operands once
+    # ————————————————————————————————————————————————
+    def _resolve(self):
+        """
+        Classify every operand once and return the program in resolved
+        form, so the legacy loop reads operands without checking their kind:
+          - variables, temps and constants become (segment, offset) slots;
+            constants live in their own segments, so reading one is the
+            same indexing as reading a variable
+          - a printed string literal becomes PRINT_TEXT with its quotes
+            already stripped
+          - jump targets, function names and linked parameter addresses
+            stay immediates; PARAM's becomes its (frame position, offset)
+        A division into an int segment becomes INT_DIV, which truncates
+        like storing through RuntimeMemory did.
+        """
+        slot = self._slot
+        types = self.memory_values.segment_types
+        resolved = []
+        for op, left, right, result in self.quadruples:
+            if op == '=':
+                quad = (op, slot(left), None, slot(result))
+            elif op == 'print':
+                text = _literal_text(left)
+                quad = (PRINT_TEXT, text, None, None) if text is not None else (op, slot(left), None, None)
+            elif op in ARITHMETIC_OPS or op in COMPARISON_OPS:
+                target = slot(result)
+                if op == '/' and types[target[0]] != 'float':
+                    op = INT_DIV
+                quad = (op, slot(left), slot(right), target)
+            elif op == 'GOTOF':
+                quad = (op, slot(left), None, result)
+            elif op == 'PARAM':
+                try:
+                    param = self.memory_values.frame_slot(result)
+                except (KeyError, TypeError):
+                    raise RuntimeError(f"Invalid parameter address {result!r}")
+                quad = (op, slot(left), None, param)
+            else:
+                quad = (op, left, right, result)
+            resolved.append(quad)
+        return resolved
+
+    # ————————————————————————————————————————————————
+    # Table engine: loading quadruples into step functions
+    # ————————————————————————————————————————————————
+    def _load(self):
+        """
+        Translate every quadruple once into an integer opcode and a step
+        function with its operands already bound. Each step receives the
+        current instruction pointer and returns the next one.
+        """
+        factories = {
+            OPCODES['=']: self._make_assign,
+            OPCODES['print']: self._make_print,
+            OPCODES['PRINT_END']: self._make_print_end,
+            OPCODES['GOTOF']: self._make_gotof,
+            OPCODES['GOTO']: self._make_goto,
+            OPCODES['ERA']: self._make_era,
+            OPCODES['PARAM']: self._make_param,
+            OPCODES['GOSUB']: self._make_gosub,
+            OPCODES['ENDFUNC']: self._make_endfunc,
+        }
+        for op, fn in ARITHMETIC_OPS.items():
+            factories[OPCODES[op]] = self._binary_factory(fn, as_flag=False)
+        for op, fn in COMPARISON_OPS.items():
+            factories[OPCODES[op]] = self._binary_factory(fn, as_flag=True)
+
+        plan = [None] * len(self.quadruples)
+        if self.fuse:
+            from semantic.superinstructions import plan_fusions, fusion_stats
+            plan = plan_fusions(self.quadruples, self.func_dir, self.memory)
+            self.fusions = fusion_stats(plan)
+        fused_factories = {
+            'compare_branch': self._make_compare_branch,
+            'op_into_var': self._make_op_into_var,
+            'print_line': self._make_print_line,
+        }
+
+        self.opcodes = []
+        self._code = []
+        for index, (op, left, right, result) in enumerate(self.quadruples):
+            opcode = OPCODES.get(op, UNKNOWN_OPCODE)
+            if opcode == UNKNOWN_OPCODE:
+                step = self._make_unknown(op, index)
+            elif plan[index] is not None:
+                kind, keep_temp = plan[index]
+                step = fused_factories[kind](index, keep_temp)
+            else:
+                step = factories[opcode](left, right, result)
+            self.opcodes.append(opcode)
+            self._code.append(step)
+
+    def _make_assign(self, left, right, result):
+        segs = self.memory_values.segments
+        ss, so = self._slot(left)
+        ds, do = self._slot(result)
+        def step(ip):
+            segs[ds][do] = segs[ss][so]
+            return ip + 1
+        return step
+
+    def _make_print(self, left, right, result):
+        write = self.output.write
+        text = _literal_text(left)
+        if text is not None:
+            def step(ip):
+                write(text)
+                return ip + 1
+            return step
+        segs = self.memory_values.segments
+        s, o = self._slot(left)
+        def step(ip):
+            write(str(segs[s][o]))
+            return ip + 1
+        return step
+
+    def _make_print_end(self, left, right, result):
+        write = self.output.write
+        def step(ip):
+            write("\n")
+            return ip + 1
+        return step
+
+    def _binary_factory(self, fn, as_flag):
+        """Build the factory for an arithmetic or comparison opcode."""
+        segs = self.memory_values.segments
+        types = self.memory_values.segment_types
+        slot = self._slot
+        if as_flag:
+            def make(left, right, result):
+                ls, lo = slot(left)
+                rs, ro = slot(right)
+                ds, do = slot(result)
+                def step(ip):
+                    segs[ds][do] = 1 if fn(segs[ls][lo], segs[rs][ro]) else 0
+                    return ip + 1
+                return step
         else:
-            # Assume it's a literal value
-            return address
+            def make(left, right, result):
+                ls, lo = slot(left)
+                rs, ro = slot(right)
+                ds, do = slot(result)
+                op = fn
+                if fn is operator.truediv and types[ds] != 'float':
+                    op = _truncating_div
+                def step(ip):
+                    segs[ds][do] = op(segs[ls][lo], segs[rs][ro])
+                    return ip + 1
+                return step
+        return make
+
+    def _make_gotof(self, left, right, result):
+        segs = self.memory_values.segments
+        cs, co = self._slot(left)
+        def step(ip):
+            if not segs[cs][co]:
+                return result
+            return ip + 1
+        return step
+
+    def _make_goto(self, left, right, result):
+        def step(ip):
+            return result
+        return step
+
+    def _make_era(self, left, right, result):
+        acquire = self.frame_pool.acquire
+        def step(ip):
+            self.pending_frame = acquire(result)
+            return ip + 1
+        return step
+
+    def _make_param(self, left, right, result):
+        segs = self.memory_values.segments
+        ss, so = self._slot(left)
+        position, offset = self.memory_values.frame_slot(result)
+        def step(ip):
+            self.pending_frame.segments[position][offset] = segs[ss][so]
+            return ip + 1
+        return step
+
+    def _make_gosub(self, left, right, result):
+        activate = self.memory_values.activate
+        call_stack = self.call_stack
+        def step(ip):
+            frame = self.pending_frame
+            call_stack.append((ip + 1, activate(frame.segments), frame))
+            return result
+        return step
 
-    def _execute_assign(self, source_addr, dest_addr):
+    def _make_endfunc(self, left, right, result):
+        activate = self.memory_values.activate
+        release = self.frame_pool.release
+        call_stack = self.call_stack
+        end = len(self.quadruples)
+        def step(ip):
+            if call_stack:
+                return_ip, caller_segments, frame = call_stack.pop()
+                activate(caller_segments)
+                release(frame)
+                return return_ip
+            return end
+        return step
+
+    # ————————————————————————————————————————————————
+    # Superinstructions: a quadruple fused with the next one
+    # ————————————————————————————————————————————————
+    def _make_compare_branch(self, index, keep_temp):
+        """Comparison followed by GOTOF on its result."""
+        from semantic.superinstructions import fallthrough
+        op, left, right, temp = self.quadruples[index]
+        target = self.quadruples[index + 1][3]
+        fn = COMPARISON_OPS[op]
+        segs = self.memory_values.segments
+        ls, lo = self._slot(left)
+        rs, ro = self._slot(right)
+        ts, to = self._slot(temp)
+        taken = fallthrough(self.quadruples, index + 2)
+        if keep_temp:
+            def step(ip):
+                if fn(segs[ls][lo], segs[rs][ro]):
+                    segs[ts][to] = 1
+                    return taken
+                segs[ts][to] = 0
+                return target
+        else:
+            def step(ip):
+                if fn(segs[ls][lo], segs[rs][ro]):
+                    return taken
+                return target
+        return step
+
+    def _make_op_into_var(self, index, keep_temp):
+        """Arithmetic into a temp followed by '=' copying the temp to a variable."""
+        from semantic.superinstructions import fallthrough
+        op, left, right, temp = self.quadruples[index]
+        dest = self.quadruples[index + 1][3]
+        segs = self.memory_values.segments
+        types = self.memory_values.segment_types
+        ls, lo = self._slot(left)
+        rs, ro = self._slot(right)
+        ts, to = self._slot(temp)
+        ds, do = self._slot(dest)
+        fn = ARITHMETIC_OPS[op]
+        if fn is operator.truediv and types[ts] != 'float':
+            fn = _truncating_div
+        after = fallthrough(self.quadruples, index + 2)
+        if keep_temp:
+            def step(ip):
+                segs[ts][to] = segs[ds][do] = fn(segs[ls][lo], segs[rs][ro])
+                return after
+        else:
+            def step(ip):
+                segs[ds][do] = fn(segs[ls][lo], segs[rs][ro])
+                return after
+        return step
+
+    def _make_print_line(self, index, keep_temp):
+        """Last print of a statement followed by PRINT_END."""
+        from semantic.superinstructions import fallthrough
+        left = self.quadruples[index][1]
+        write = self.output.write
+        after = fallthrough(self.quadruples, index + 2)
+        text = _literal_text(left)
+        if text is not None:
+            line = text + "\n"
+            def step(ip):
+                write(line)
+                return after
+            return step
+        segs = self.memory_values.segments
+        s, o = self._slot(left)
+        def step(ip):
+            write(f"{segs[s][o]}\n")
+            return after
+        return step
+
+    def _make_unknown(self, op, index):
+        def step(ip):
+            print(f"Warning: Unknown operation '{op}' at quad {index}")
+            return ip + 1
+        return step
+
+    def _get_value(self, slot):
+        """Read an operand resolved to a (segment, offset) slot."""
+        segment, offset = slot
+        return self.memory_values.segments[segment][offset]
+
+    def _set_value(self, slot, value):
+        """Write through a resolved (segment, offset) slot."""
+        segment, offset = slot
+        self.memory_values.segments[segment][offset] = value
+
+    def _slot(self, address):
+        """Resolve an address to its (segment, offset) pair at load time."""
+        try:
+            return self.memory_values.resolve(address)
+        except (KeyError, TypeError):
+            raise RuntimeError(f"Invalid memory address {address!r}")
+
+    def _execute_assign(self, source_slot, dest_slot):
         """Execute assignment: dest = source"""
-        value = self._get_value(source_addr)
-        self.memory_values[dest_addr] = value
+        value = self._get_value(source_slot)
+        self._set_value(dest_slot, value)
 
-    def _execute_print(self, address):
-        """Execute print statement"""
-        value = self._get_value(address)
-        print(value, end="")
+    def _execute_print(self, slot):
+        """Execute print statement of a value (literals are PRINT_TEXT)"""
+        value = self._get_value(slot)
+        self.output.write(str(value))
 
     def _execute_print_end(self):
         """Execute end of print statement - add newline"""
-        print()  # Print newline to end the current print statement
+        self.output.write("\n")  # Newline to end the current print statement
 
-    def _execute_arithmetic(self, left_addr, right_addr, result_addr, operation):
+    def _execute_arithmetic(self, left_slot, right_slot, result_slot, operation):
         """Execute arithmetic operation"""
-        left_val = self._get_value(left_addr)
-        right_val = self._get_value(right_addr)
+        left_val = self._get_value(left_slot)
+        right_val = self._get_value(right_slot)
         result = operation(left_val, right_val)
-        self.memory_values[result_addr] = result
+        self._set_value(result_slot, result)
 
-    def _execute_comparison(self, left_addr, right_addr, result_addr, operation):
+    def _execute_comparison(self, left_slot, right_slot, result_slot, operation):
         """Execute comparison operation"""
-        left_val = self._get_value(left_addr)
-        right_val = self._get_value(right_addr)
+        left_val = self._get_value(left_slot)
+        right_val = self._get_value(right_slot)
         result = operation(left_val, right_val)
-        self.memory_values[result_addr] = 1 if result else 0  # Store as int
+        self._set_value(result_slot, 1 if result else 0)  # Store as int
 
-    def _execute_gotof(self, condition_addr, target_quad):
+    def _execute_gotof(self, condition_slot, target_quad):
         """Execute conditional jump (GOTOF)"""
-        condition = self._get_value(condition_addr)
+        condition = self._get_value(condition_slot)
         if not condition:  # If condition is false (0)
             self.instruction_pointer = target_quad
         else:
@@ -150,47 +564,34 @@ class Interpreter:
 
     def _execute_era(self, func_name):
         """Execute ERA (activation record)"""
-        # Prepare for function call - store function name for parameter passing
-        self.current_function_call = func_name
-        self.param_values = {}
+        # Prepare for function call - reserve the callee's frame
+        self.pending_frame = self.frame_pool.acquire(func_name)
 
-    def _execute_param(self, param_addr, param_index):
-        """Execute parameter passing"""
-        # Get the value from the parameter address
-        value = self._get_value(param_addr)
-        # Store the parameter value for the current function call
-        self.param_values[param_index] = value
+    def _execute_param(self, source_slot, param_slot):
+        """Execute parameter passing into the linked parameter slot"""
+        # Read in the caller's frame, write into the reserved callee frame
+        value = self._get_value(source_slot)
+        position, offset = param_slot
+        self.pending_frame.segments[position][offset] = value
 
     def _execute_gosub(self, target_quad):
         """Execute function call (GOSUB)"""
-        # Push return address to call stack
-        self.call_stack.append(self.instruction_pointer + 1)
-
-        # Set up parameter values in function's local memory
-        if hasattr(self, 'current_function_call') and hasattr(self, 'param_values'):
-            func_name = self.current_function_call
-            if self.func_dir.has_function(func_name):
-                func_entry = self.func_dir.get_function(func_name)
-                # Get parameter names and addresses from function's variable table
-                param_names = []
-                for var_name, var_entry in func_entry.variables.all_variables().items():
-                    param_names.append((var_name, var_entry.address))
-
-                # Sort by parameter order (assuming they were added in order)
-                param_names.sort(key=lambda x: x[1])  # Sort by address
-
-                # Assign parameter values to their addresses
-                for i, (param_name, param_addr) in enumerate(param_names[:len(self.param_values)]):
-                    if (i + 1) in self.param_values:
-                        self.memory_values[param_addr] = self.param_values[i + 1]
-
+        # Switch to the callee's frame and push the return address along
+        # with the caller's local/temp segments
+        frame = self.pending_frame
+        self.pending_frame = None
+        caller_segments = self.memory_values.activate(frame.segments)
+        self.call_stack.append((self.instruction_pointer + 1, caller_segments, frame))
         self.instruction_pointer = target_quad
 
     def _execute_endfunc(self):
         """Execute end of function (ENDFUNC)"""
         if self.call_stack:
-            # Return to caller
-            self.instruction_pointer = self.call_stack.pop()
+            # Return to caller and give the callee's frame back to the pool
+            return_ip, caller_segments, frame = self.call_stack.pop()
+            self.memory_values.activate(caller_segments)
+            self.frame_pool.release(frame)
+            self.instruction_pointer = return_ip
         else:
             # End of main program
             self.instruction_pointer = len(self.quadruples)
@@ -0,0 +1,47 @@
+# semantic/linker.py
+
+from semantic.quad_store import QuadStore
+
+class LinkError(Exception):
+    """Para llamadas que no se pueden resolver al enlazar."""
+    pass
+
+def link(quadruples, func_dir) -> QuadStore:
+    """
+    Enlaza los sitios de llamada una sola vez, después del análisis.
+    Para cada secuencia ERA / PARAM / GOSUB resuelve la función llamada:
+      - PARAM addr, None, i      ->  PARAM addr, None, dirección del parámetro i
+      - GOSUB None, None, quad   ->  GOSUB función, None, start_quad
+    Así, en ejecución PARAM escribe directo en el marco de la función y
+    GOSUB sólo cambia de marco y salta.
+    Args:
+        quadruples: Cuádruplos generados por el analizador
+        func_dir: Directorio de funciones del programa
+    Returns:
+        Nuevo QuadStore con los cuádruplos enlazados
+    Raises:
+        LinkError: Si una llamada no corresponde a su declaración
+    """
+    linked = QuadStore()
+    calls = []  # funciones con ERA pendiente de su GOSUB
+    for index, (op, left, right, result) in enumerate(quadruples):
+        if op == 'ERA':
+            if not func_dir.has_function(result):
+                raise LinkError(f"Cuádruplo {index}: función '{result}' no declarada.")
+            calls.append(result)
+        elif op == 'PARAM':
+            if not calls:
+                raise LinkError(f"Cuádruplo {index}: PARAM fuera de una llamada.")
+            fe = func_dir.get_function(calls[-1])
+            if not 1 <= result <= len(fe.param_addrs):
+                raise LinkError(
+                    f"Cuádruplo {index}: '{calls[-1]}' no tiene parámetro {result}."
+                )
+            result = fe.param_addrs[result - 1]
+        elif op == 'GOSUB':
+            if not calls:
+                raise LinkError(f"Cuádruplo {index}: GOSUB sin ERA.")
+            left = calls.pop()
+            result = func_dir.get_function(left).start_quad
+        linked.append((op, left, right, result))
+    return linked
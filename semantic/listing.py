@@ -0,0 +1,187 @@
+# semantic/listing.py
+
+import json
+import struct
+import sys
+from typing import BinaryIO, Iterator, Optional, TextIO, Tuple
+
+from semantic.interpreter import OPCODES
+
+# Formatos de listado de cuádruplos de main.py --emit
+LISTING_FORMATS = ('none', 'text', 'jsonl', 'binary')
+
+BINARY_MAGIC = b'BDUCKQL1'
+
+_RECORD = struct.Struct('<BB')      # opcode, tipos de operando (2 bits cada uno)
+_I32 = struct.Struct('<i')
+_U16 = struct.Struct('<H')
+# Operación sin opcode conocido: su nombre va en el registro
+_NAMED_OP = 255
+_NONE, _INT, _STR = 0, 1, 2
+_OP_NAMES = {code: op for op, code in OPCODES.items()}
+
+class QuadListing:
+    """
+    Destino de un listado de cuádruplos. quad() se llama una vez por
+    cuádruplo, en orden de índice, en cuanto el cuádruplo es definitivo;
+    close() termina el listado y cierra el archivo si owns_stream.
+    """
+    def __init__(self, stream, owns_stream: bool = False):
+        self._stream = stream
+        self._write = stream.write
+        self._owns_stream = owns_stream
+
+    def quad(self, index: int, quad: tuple) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        if self._owns_stream:
+            self._stream.close()
+        else:
+            self._stream.flush()
+
+class TextListing(QuadListing):
+    """Una línea por cuádruplo con repr de cada campo, como el listado original de main.py."""
+    def __init__(self, stream: TextIO, title: Optional[str] = None, owns_stream: bool = False):
+        super().__init__(stream, owns_stream)
+        self._title = title
+        self._started = False
+
+    def quad(self, index, quad):
+        if not self._started:
+            self._begin()
+        op, left, right, res = quad
+        self._write(f"{index:>3} : ( {op!r:7}, {left!r:5}, {right!r:5}, {res!r:5} )\n")
+
+    def _begin(self):
+        self._started = True
+        if self._title is not None:
+            self._write(self._title + "\n")
+
+    def close(self):
+        if not self._started:
+            self._begin()
+        if self._title is not None:
+            self._write("\n")
+        super().close()
+
+class JsonlListing(QuadListing):
+    """Una línea JSON [índice, op, izq, der, res] por cuádruplo."""
+    def quad(self, index, quad):
+        op, left, right, res = quad
+        self._write(f"[{index}, {_json(op)}, {_json(left)}, {_json(right)}, {_json(res)}]\n")
+
+def _json(value) -> str:
+    """JSON de un campo de cuádruplo; sólo el texto pasa por json.dumps."""
+    if value is None:
+        return 'null'
+    if type(value) is int:
+        return str(value)
+    return json.dumps(value)
+
+class BinaryListing(QuadListing):
+    """
+    Registros binarios que se pueden escribir sin conocer el programa
+    completo: BINARY_MAGIC y luego, por cuádruplo, opcode (el de
+    OPCODES), tipos de operando y cada operando presente (i32, o u16 de
+    largo + UTF-8 si es texto). Se lee con read_binary_listing().
+    """
+    def __init__(self, stream: BinaryIO, owns_stream: bool = False):
+        super().__init__(stream, owns_stream)
+        self._write(BINARY_MAGIC)
+        # Registros sin texto: un Struct por combinación de operandos presentes
+        self._int_records = {}
+
+    def quad(self, index, quad):
+        op, *operands = quad
+        code = OPCODES.get(op, _NAMED_OP)
+        if code != _NAMED_OP and str not in map(type, operands):
+            present = tuple(value is not None for value in operands)
+            packer = self._int_records.get(present)
+            if packer is None:
+                kinds = sum(_INT << (2 * position) for position, p in enumerate(present) if p)
+                fmt = struct.Struct('<BB' + 'i' * sum(present))
+                packer = self._int_records[present] = (fmt.pack, kinds)
+            pack, kinds = packer
+            self._write(pack(code, kinds, *[value for value in operands if value is not None]))
+            return
+        kinds = 0
+        body = b''
+        for position, value in enumerate(operands):
+            if value is None:
+                continue
+            if isinstance(value, str):
+                data = value.encode('utf-8')
+                kinds |= _STR << (2 * position)
+                body += _U16.pack(len(data)) + data
+            else:
+                kinds |= _INT << (2 * position)
+                body += _I32.pack(value)
+        record = _RECORD.pack(code, kinds)
+        if code == _NAMED_OP:
+            data = op.encode('utf-8')
+            record += _U16.pack(len(data)) + data
+        self._write(record + body)
+
+def open_listing(fmt: str, path: Optional[str] = None,
+                 title: Optional[str] = None) -> Optional[QuadListing]:
+    """
+    Crea el listado de un formato de LISTING_FORMATS hacia path, o hacia
+    la salida estándar si path es None o '-' (con title como encabezado
+    en formato text).
+    Returns:
+        El listado, o None con el formato 'none'
+    """
+    if fmt == 'none':
+        return None
+    if fmt not in LISTING_FORMATS:
+        raise ValueError(f"Formato de listado desconocido '{fmt}'")
+    to_stdout = path is None or path == '-'
+    if fmt == 'binary':
+        if to_stdout:
+            sys.stdout.flush()
+            return BinaryListing(sys.stdout.buffer)
+        return BinaryListing(open(path, 'wb'), owns_stream=True)
+    stream = sys.stdout if to_stdout else open(path, 'w', encoding='utf-8')
+    if fmt == 'jsonl':
+        return JsonlListing(stream, owns_stream=not to_stdout)
+    return TextListing(stream, title if to_stdout else None, owns_stream=not to_stdout)
+
+def read_binary_listing(stream: BinaryIO) -> Iterator[Tuple]:
+    """
+    Lee un listado de BinaryListing.
+    Yields:
+        Cada cuádruplo (op, izq, der, res)
+    Raises:
+        ValueError: Si el archivo no es un listado binario
+    """
+    if stream.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise ValueError("No es un listado binario de cuádruplos")
+
+    def text():
+        (length,) = _U16.unpack(stream.read(_U16.size))
+        return stream.read(length).decode('utf-8')
+
+    while True:
+        header = stream.read(_RECORD.size)
+        if not header:
+            return
+        code, kinds = _RECORD.unpack(header)
+        op = text() if code == _NAMED_OP else _OP_NAMES[code]
+        operands = []
+        for position in range(3):
+            kind = (kinds >> (2 * position)) & 3
+            if kind == _NONE:
+                operands.append(None)
+            elif kind == _INT:
+                operands.append(_I32.unpack(stream.read(_I32.size))[0])
+            else:
+                operands.append(text())
+        yield (op, *operands)
+
+def write_listing(listing: QuadListing, quadruples, start: int = 0) -> None:
+    """Emite a listing los cuádruplos desde start y termina el listado."""
+    quad = listing.quad
+    for index in range(start, len(quadruples)):
+        quad(index, quadruples[index])
+    listing.close()
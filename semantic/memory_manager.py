@@ -1,41 +1,53 @@
-from typing import Dict, Union, Tuple
+from typing import Dict, List, Union, Tuple
+
+# Orden fijo de ámbitos y tipos; define el índice de segmento de cada rango
+SCOPES = ('global', 'local', 'temp', 'const')
+TYPES = ('int', 'float', 'bool')
+# Ámbitos que viven en el marco de activación de cada llamada
+FRAME_SCOPES = ('local', 'temp')
+# Bits de desplazamiento por omisión: 2**20 direcciones por segmento
+DEFAULT_SEGMENT_BITS = 20
+# Límite para que toda dirección quepa en un entero de 32 bits con signo,
+# como se guarda en el archivo objeto (ver semantic/bytecode.py)
+MAX_SEGMENT_BITS = 27
 
 class MemoryManager:
     """
     Gestiona la asignación de direcciones virtuales por ámbito y tipo.
-    Implementa rangos específicos para cada tipo de memoria:
-    - Global: 1000-1999 (int), 2000-2999 (float), 3000-3999 (bool)
-    - Local: 4000-4999 (int), 5000-5999 (float), 6000-6999 (bool)
-    - Temporal: 7000-7999 (int), 8000-8999 (float), 9000-9999 (bool)
-    - Constante: 10000-10999 (int), 11000-11999 (float), 12000-12999 (bool)
+    Cada par ámbito/tipo es un segmento y una dirección se forma con el
+    número de segmento en los bits altos y el desplazamiento en los bajos:
+        dirección = (número de segmento << segment_bits) | desplazamiento
+    Los segmentos se numeran desde 1, en el orden de segments():
+    - Global: 1 (int), 2 (float), 3 (bool)
+    - Local: 4 (int), 5 (float), 6 (bool)
+    - Temporal: 7 (int), 8 (float), 9 (bool)
+    - Constante: 10 (int), 11 (float), 12 (bool)
+    Con segment_bits = 20 cada segmento admite 1,048,576 direcciones; el
+    segmento y el desplazamiento se obtienen con un corrimiento y una
+    máscara (ver decode()).
     """
-    def __init__(self):
+    def __init__(self, segment_bits: int = DEFAULT_SEGMENT_BITS):
+        if not 1 <= segment_bits <= MAX_SEGMENT_BITS:
+            raise ValueError(
+                f"segment_bits debe estar entre 1 y {MAX_SEGMENT_BITS}, se recibió {segment_bits}"
+            )
+        self.segment_bits = segment_bits
+        self.segment_mask = (1 << segment_bits) - 1
+
+        # (ámbito, tipo) de cada índice de segmento
+        self._segments = [(scope, var_type) for scope in SCOPES for var_type in TYPES]
+
         # Definición de rangos de memoria (sin solapamientos)
-        self.ranges = {
-            'global': {
-                'int': (1000, 1999),
-                'float': (2000, 2999),
-                'bool': (3000, 3999)
-            },
-            'local': {
-                'int': (4000, 4999),
-                'float': (5000, 5999),
-                'bool': (6000, 6999)
-            },
-            'temp': {
-                'int': (7000, 7999),
-                'float': (8000, 8999),
-                'bool': (9000, 9999)
-            },
-            'const': {
-                'int': (10000, 10999),
-                'float': (11000, 11999),
-                'bool': (12000, 12999)
-            }
-        }
+        self.ranges = {scope: {} for scope in SCOPES}
+        for index, (scope, var_type) in enumerate(self._segments):
+            base = (index + 1) << segment_bits
+            self.ranges[scope][var_type] = (base, base + self.segment_mask)
         # Contadores actuales por ámbito y tipo
         self._counters = {}
-        # Tabla de constantes para evitar duplicados
+        # Temporales liberados por tipo, listos para reutilizarse
+        self._free_temps = {t: [] for t in TYPES}
+        # Tabla de constantes para evitar duplicados.
+        # La llave incluye el tipo para que 2 y 2.0 no compartan dirección.
         self._const_table = {}
 
     def allocate(self, scope: str, var_type: str) -> int:
@@ -63,35 +75,132 @@ class MemoryManager:
         self._counters[scope][var_type] += 1
         return current
 
-    def allocate_constant(self, value: Union[int, float]) -> int:
+    def begin_frame(self, local_counts: Dict[str, int] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Inicia el marco de una función: los contadores local y temp vuelven
+        al inicio de su rango, de modo que las direcciones de cada función
+        son desplazamientos dentro de su propio marco.
+        Args:
+            local_counts: Locales ya asignados por tipo (p. ej. parámetros
+                          registrados en la primera pasada)
+        Returns:
+            Estado previo de los contadores, para end_frame()
+        """
+        saved = {scope: dict(self._counters[scope])
+                 for scope in FRAME_SCOPES if scope in self._counters}
+        saved['free_temps'] = self._free_temps
+        self._free_temps = {t: [] for t in TYPES}
+        for scope in FRAME_SCOPES:
+            self._counters[scope] = {t: self.ranges[scope][t][0] for t in TYPES}
+        for var_type, count in (local_counts or {}).items():
+            self._counters['local'][var_type] += count
+        return saved
+
+    def end_frame(self, saved: Dict[str, Dict[str, int]]) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Cierra el marco iniciado con begin_frame() y restaura los contadores.
+        Args:
+            saved: Estado devuelto por begin_frame()
+        Returns:
+            (locales por tipo, temporales por tipo) usados por el marco
+        """
+        local_sizes = {t: self.used('local', t) for t in TYPES}
+        temp_sizes = {t: self.used('temp', t) for t in TYPES}
+        for scope in FRAME_SCOPES:
+            if scope in saved:
+                self._counters[scope] = saved[scope]
+            else:
+                self._counters.pop(scope, None)
+        self._free_temps = saved['free_temps']
+        return local_sizes, temp_sizes
+
+    def allocate_constant(self, value: Union[int, float], var_type: str = None) -> int:
         """
         Asigna una dirección virtual para una constante.
         Reutiliza direcciones para constantes idénticas.
         Args:
             value: Valor de la constante
+            var_type: Tipo de la constante; por omisión se deduce del valor
+                      ('bool' sólo se usa para resultados ya calculados
+                      de una comparación, con valor 0 o 1)
         Returns:
             Dirección virtual asignada
         """
+        # Determinar el tipo de la constante
+        if var_type is None:
+            var_type = 'int' if isinstance(value, int) else 'float'
+        key = (var_type, value)
+
         # Si la constante ya existe, reutilizar su dirección
-        if value in self._const_table:
-            return self._const_table[value]
+        if key in self._const_table:
+            return self._const_table[key]
 
-        # Determinar el tipo y asignar nueva dirección
-        var_type = 'int' if isinstance(value, int) else 'float'
         addr = self.allocate('const', var_type)
-        self._const_table[value] = addr
+        self._const_table[key] = addr
         return addr
 
     def allocate_temp(self, var_type: str) -> int:
         """
         Asigna una dirección virtual para una variable temporal.
+        Reutiliza primero los temporales liberados con free_temp().
         Args:
             var_type: 'int' o 'float'
         Returns:
             Dirección virtual asignada
         """
+        free = self._free_temps[var_type]
+        if free:
+            return free.pop()
         return self.allocate('temp', var_type)
 
+    def free_temp(self, address) -> None:
+        """
+        Libera un temporal cuyo valor ya se consumió, para que el siguiente
+        allocate_temp() de su tipo lo reutilice. Los temporales se consumen
+        en orden de pila (el de una subexpresión antes que el de la
+        expresión que lo contiene), así que el número de temporales de un
+        marco queda en el máximo de temporales vivos a la vez.
+        Las direcciones que no son temporales se ignoran.
+        Args:
+            address: Dirección del operando consumido
+        """
+        if isinstance(address, int) and self.scope_of(address) == 'temp':
+            self._free_temps[self.type_of(address)].append(address)
+
+    def usage(self) -> Dict[str, Dict[str, int]]:
+        """
+        Direcciones asignadas por ámbito y tipo.
+        Returns:
+            {ámbito: {tipo: cantidad}}
+        """
+        return {scope: {t: self.used(scope, t) for t in TYPES} for scope in SCOPES}
+
+    def restore(self, usage: Dict[str, Dict[str, int]],
+                constants: List[Tuple[Union[int, float], int]]) -> None:
+        """
+        Reconstruye el estado a partir de usage() y constants(), p. ej. al
+        cargar un programa ya compilado.
+        Args:
+            usage: Direcciones asignadas por ámbito y tipo
+            constants: Pares (valor, dirección) de la tabla de constantes
+        """
+        self._counters = {}
+        for scope, counts in usage.items():
+            self.set_usage(scope, counts)
+        self._const_table = {
+            (self.type_of(addr), value): addr
+            for value, addr in constants
+        }
+
+    def set_usage(self, scope: str, counts: Dict[str, int]) -> None:
+        """
+        Fija cuántas direcciones hay asignadas en cada segmento de un ámbito.
+        Args:
+            scope: Ámbito de memoria
+            counts: Direcciones asignadas por tipo
+        """
+        self._counters[scope] = {t: self.ranges[scope][t][0] + counts.get(t, 0) for t in TYPES}
+
     def check_memory_limits(self, scope: str, var_type: str) -> bool:
         """
         Verifica si hay memoria disponible en el rango especificado.
@@ -117,6 +226,68 @@ class MemoryManager:
         Raises:
             KeyError: Si la constante no existe
         """
-        if value not in self._const_table:
+        key = ('int' if isinstance(value, int) else 'float', value)
+        if key not in self._const_table:
             raise KeyError(f"Constante {value} no encontrada")
-        return self._const_table[value]
+        return self._const_table[key]
+
+    def constants(self) -> List[Tuple[Union[int, float], int]]:
+        """
+        Lista las constantes registradas.
+        Returns:
+            Pares (valor, dirección) de la tabla de constantes
+        """
+        return [(value, addr) for (_, value), addr in self._const_table.items()]
+
+    def segments(self) -> List[Tuple[str, str]]:
+        """
+        Enumera los segmentos de memoria en orden de índice.
+        Returns:
+            Pares (ámbito, tipo); la posición en la lista es el índice
+            de segmento que devuelve decode()
+        """
+        return list(self._segments)
+
+    def decode(self, address: int) -> Tuple[int, int]:
+        """
+        Descompone una dirección virtual en segmento y desplazamiento con
+        un corrimiento y una máscara de bits.
+        Args:
+            address: Dirección virtual
+        Returns:
+            (índice de segmento, desplazamiento dentro del segmento)
+        """
+        return (address >> self.segment_bits) - 1, address & self.segment_mask
+
+    def type_of(self, address: int) -> str:
+        """
+        Tipo del segmento al que pertenece una dirección virtual.
+        Args:
+            address: Dirección virtual
+        Returns:
+            'int', 'float' o 'bool'
+        """
+        return self._segments[(address >> self.segment_bits) - 1][1]
+
+    def scope_of(self, address: int) -> str:
+        """
+        Ámbito del segmento al que pertenece una dirección virtual.
+        Args:
+            address: Dirección virtual
+        Returns:
+            'global', 'local', 'temp' o 'const'
+        """
+        return self._segments[(address >> self.segment_bits) - 1][0]
+
+    def used(self, scope: str, var_type: str) -> int:
+        """
+        Cantidad de direcciones asignadas en un segmento.
+        Args:
+            scope: Ámbito de memoria
+            var_type: Tipo de dato
+        Returns:
+            Número de direcciones entregadas hasta ahora
+        """
+        if scope not in self._counters:
+            return 0
+        return self._counters[scope][var_type] - self.ranges[scope][var_type][0]
@@ -0,0 +1,385 @@
+# semantic/optimizer.py
+
+from typing import Dict, List, Optional, Set, Tuple
+
+from semantic.interpreter import ARITHMETIC_OPS, COMPARISON_OPS, _truncating_div
+from semantic.quad_store import QuadStore
+
+# Operadores con dos operandos que escriben un resultado
+BINARY_OPS = tuple(ARITHMETIC_OPS) + tuple(COMPARISON_OPS)
+# Saltos cuyo resultado es un índice de cuádruplo
+JUMP_OPS = ('GOTO', 'GOTOF')
+
+# Rango de array('q'), donde se guardan los enteros en ejecución
+_INT_MIN, _INT_MAX = -2 ** 63, 2 ** 63 - 1
+
+# ————————————————————————————————————————————————
+# Estructura del código
+# ————————————————————————————————————————————————
+def reads(quad) -> Tuple[int, ...]:
+    """Direcciones que lee un cuádruplo."""
+    op, left, right, _ = quad
+    if op in BINARY_OPS:
+        return (left, right)
+    if op in ('=', 'GOTOF', 'PARAM') or (op == 'print' and isinstance(left, int)):
+        return (left,)
+    return ()
+
+def writes(quad) -> Optional[int]:
+    """Dirección que escribe un cuádruplo en el marco actual, o None."""
+    op, _, _, result = quad
+    if op in BINARY_OPS or op == '=':
+        return result
+    return None
+
+def basic_blocks(quadruples, func_dir) -> List[Tuple[int, int]]:
+    """
+    Divide los cuádruplos en bloques básicos.
+    Un bloque empieza en el inicio de cada función, en cada destino de un
+    salto y después de cada GOTO, GOTOF o ENDFUNC.
+    Returns:
+        Pares (inicio, fin) en orden, con fin exclusivo
+    """
+    n = len(quadruples)
+    leaders = {0} if n else set()
+    for fe in func_dir.all_functions().values():
+        leaders.add(fe.start_quad)
+    for i, (op, _, _, result) in enumerate(quadruples):
+        if op in JUMP_OPS:
+            leaders.add(result)
+            leaders.add(i + 1)
+        elif op == 'ENDFUNC':
+            leaders.add(i + 1)
+    starts = sorted(x for x in leaders if 0 <= x < n)
+    return list(zip(starts, starts[1:] + [n]))
+
+def successors(quadruples, blocks: List[Tuple[int, int]]) -> List[List[int]]:
+    """
+    Bloques a los que puede pasar el control al terminar cada bloque.
+    GOSUB no cuenta como salida: la llamada regresa al cuádruplo siguiente.
+    """
+    block_at = {start: b for b, (start, _) in enumerate(blocks)}
+    result = []
+    for b, (start, end) in enumerate(blocks):
+        op, _, _, target = quadruples[end - 1]
+        succ = []
+        if op in JUMP_OPS and target in block_at:
+            succ.append(block_at[target])
+        if op not in ('GOTO', 'ENDFUNC') and end in block_at:
+            succ.append(block_at[end])
+        result.append(succ)
+    return result
+
+def live_temps(quadruples, blocks, succ, memory) -> List[Set[int]]:
+    """
+    Temporales vivos a la salida de cada bloque (leídos más adelante antes
+    de volver a escribirse). Sólo se consideran temporales: viven en el
+    marco de la función y ninguna llamada los lee ni los modifica.
+    """
+    is_temp = lambda addr: isinstance(addr, int) and memory.scope_of(addr) == 'temp'
+    use: List[Set[int]] = []
+    define: List[Set[int]] = []
+    for start, end in blocks:
+        u, d = set(), set()
+        for i in range(start, end):
+            quad = quadruples[i]
+            u.update(a for a in reads(quad) if is_temp(a) and a not in d)
+            target = writes(quad)
+            if is_temp(target):
+                d.add(target)
+        use.append(u)
+        define.append(d)
+
+    live_in = [set(u) for u in use]
+    live_out: List[Set[int]] = [set() for _ in blocks]
+    changed = True
+    while changed:
+        changed = False
+        for b in reversed(range(len(blocks))):
+            out = set()
+            for s in succ[b]:
+                out |= live_in[s]
+            if out != live_out[b]:
+                live_out[b] = out
+                live_in[b] = use[b] | (out - define[b])
+                changed = True
+    return live_out
+
+def compact(program, keep: List[bool]) -> int:
+    """
+    Elimina los cuádruplos marcados como False en keep y renumera los
+    destinos de GOTO/GOTOF/GOSUB y el start_quad de cada función. Un
+    destino que apuntaba a un cuádruplo eliminado pasa al siguiente que
+    se conserva.
+    Args:
+        program: CompiledProgram (o SemanticAnalyzer) a modificar
+        keep: Un valor por cuádruplo
+    Returns:
+        Cantidad de cuádruplos eliminados
+    """
+    quadruples = program.quadruples
+    n = len(quadruples)
+    new_index = [0] * (n + 1)
+    count = 0
+    for i in range(n):
+        new_index[i] = count
+        if keep[i]:
+            count += 1
+    new_index[n] = count
+
+    compacted = []
+    for i, (op, left, right, result) in enumerate(quadruples):
+        if not keep[i]:
+            continue
+        if (op in JUMP_OPS or op == 'GOSUB') and isinstance(result, int):
+            result = new_index[result]
+        compacted.append((op, left, right, result))
+
+    for fe in program.func_dir.all_functions().values():
+        fe.start_quad = new_index[fe.start_quad]
+    program.quadruples = compacted
+    return n - count
+
+# ————————————————————————————————————————————————
+# Plegado y propagación de constantes
+# ————————————————————————————————————————————————
+def _evaluate(op: str, left, right, res_type: str):
+    """
+    Calcula op con la misma semántica que el intérprete.
+    Returns:
+        El valor, o None si la operación debe quedarse para la ejecución
+        (división entre cero o un entero fuera de rango)
+    """
+    if op in COMPARISON_OPS:
+        return 1 if COMPARISON_OPS[op](left, right) else 0
+    if op == '/' and right == 0:
+        return None
+    if op == '/' and res_type != 'float':
+        value = _truncating_div(left, right)
+    else:
+        value = ARITHMETIC_OPS[op](left, right)
+    if res_type == 'float':
+        return float(value)
+    value = int(value)
+    return value if _INT_MIN <= value <= _INT_MAX else None
+
+def fold_constants(program) -> int:
+    """
+    Evalúa en compilación las operaciones cuyos operandos son constantes
+    y propaga, dentro de cada bloque básico, los valores conocidos de las
+    variables asignadas con una constante. Los tipos de los resultados son
+    los del cubo semántico, ya reflejados en el segmento de cada dirección.
+
+    Una operación plegada se vuelve una asignación de constante, o
+    desaparece si escribía un temporal que no se usa fuera del bloque.
+    Los resultados nuevos se registran en la tabla de constantes.
+    Args:
+        program: CompiledProgram (o SemanticAnalyzer) a modificar
+    Returns:
+        Cantidad de operaciones plegadas
+    """
+    memory = program.memory
+    quadruples = list(program.quadruples)
+    values: Dict[int, object] = {addr: value for value, addr in memory.constants()}
+    blocks = basic_blocks(quadruples, program.func_dir)
+    live_out = live_temps(quadruples, blocks, successors(quadruples, blocks), memory)
+
+    def constant(value, var_type) -> Optional[int]:
+        try:
+            addr = memory.allocate_constant(value, var_type)
+        except MemoryError:
+            return None
+        values[addr] = value
+        return addr
+
+    keep = [True] * len(quadruples)
+    folded = 0
+    for b, (start, end) in enumerate(blocks):
+        known: Dict[int, int] = {}  # dirección -> dirección de su constante
+        for i in range(start, end):
+            op, left, right, result = quadruples[i]
+
+            # Sustituir lecturas de valores conocidos
+            if op in BINARY_OPS:
+                left, right = known.get(left, left), known.get(right, right)
+            elif op in ('=', 'GOTOF', 'PARAM', 'print') and isinstance(left, int):
+                left = known.get(left, left)
+            quadruples[i] = (op, left, right, result)
+
+            if op == 'GOSUB':
+                # La función llamada puede modificar cualquier global
+                known = {a: c for a, c in known.items() if memory.scope_of(a) != 'global'}
+                continue
+            target = writes(quadruples[i])
+            if target is None:
+                continue
+            known.pop(target, None)
+            res_type = memory.type_of(target)
+
+            if op == '=' and left in values:
+                value = values[left]
+                if res_type == 'float' and not isinstance(value, float):
+                    addr = constant(float(value), 'float')
+                    if addr is not None:
+                        quadruples[i] = ('=', addr, None, target)
+                        known[target] = addr
+                else:
+                    known[target] = left
+                continue
+
+            if op not in BINARY_OPS or left not in values or right not in values:
+                continue
+            value = _evaluate(op, values[left], values[right], res_type)
+            addr = None if value is None else constant(value, res_type)
+            if addr is None:
+                continue
+            folded += 1
+            known[target] = addr
+            if memory.scope_of(target) == 'temp' and not _live_after(quadruples, i, end, target, live_out[b]):
+                keep[i] = False
+            else:
+                quadruples[i] = ('=', addr, None, target)
+
+    program.quadruples = quadruples
+    compact(program, keep)
+    return folded
+
+def _live_after(quadruples, index: int, end: int, addr: int, live_out: Set[int]) -> bool:
+    """Indica si el valor escrito en index puede leerse después del bloque."""
+    for i in range(index + 1, end):
+        if writes(quadruples[i]) == addr:
+            return False
+    return addr in live_out
+
+# ————————————————————————————————————————————————
+# Saltos y código muerto
+# ————————————————————————————————————————————————
+def _final_target(quadruples, target):
+    """Sigue una cadena de GOTO hasta el primer cuádruplo que no lo es."""
+    seen = set()
+    while 0 <= target < len(quadruples) and quadruples[target][0] == 'GOTO' and target not in seen:
+        seen.add(target)
+        target = quadruples[target][3]
+    return target
+
+def thread_jumps(program) -> int:
+    """
+    Simplifica los saltos:
+      - un GOTO/GOTOF que llega a otro GOTO salta directo al destino final
+      - un GOTOF sobre una constante se vuelve GOTO (falsa) o desaparece
+        (verdadera)
+      - un GOTO al cuádruplo siguiente desaparece
+    Returns:
+        Cantidad de saltos modificados o eliminados
+    """
+    quadruples = list(program.quadruples)
+    values = {addr: value for value, addr in program.memory.constants()}
+    keep = [True] * len(quadruples)
+    changed = 0
+    for i, (op, left, right, result) in enumerate(quadruples):
+        if op not in JUMP_OPS:
+            continue
+        target = _final_target(quadruples, result)
+        if op == 'GOTOF' and left in values:
+            if values[left]:
+                keep[i] = False
+                changed += 1
+                continue
+            op, left = 'GOTO', None
+        if op == 'GOTO' and target == i + 1:
+            keep[i] = False
+            changed += 1
+            continue
+        if (op, left, target) != (quadruples[i][0], quadruples[i][1], result):
+            quadruples[i] = (op, left, right, target)
+            changed += 1
+
+    program.quadruples = quadruples
+    compact(program, keep)
+    return changed
+
+def main_start(quadruples) -> int:
+    """Índice del primer cuádruplo del main: el siguiente al último ENDFUNC."""
+    for i in range(len(quadruples) - 1, -1, -1):
+        if quadruples[i][0] == 'ENDFUNC':
+            return i + 1
+    return 0
+
+def eliminate_dead_code(program) -> int:
+    """
+    Elimina los bloques a los que no se puede llegar desde el main ni desde
+    el inicio de una función, y las escrituras a temporales que nadie lee
+    después. Los ENDFUNC se conservan siempre: delimitan las funciones y
+    marcan dónde empieza el main.
+    Returns:
+        Cantidad de cuádruplos eliminados
+    """
+    quadruples = program.quadruples
+    memory = program.memory
+    blocks = basic_blocks(quadruples, program.func_dir)
+    succ = successors(quadruples, blocks)
+    block_at = {start: b for b, (start, _) in enumerate(blocks)}
+
+    # Bloques alcanzables
+    entries = [main_start(quadruples)] + [fe.start_quad for fe in program.func_dir.all_functions().values()]
+    pending = [block_at[x] for x in entries if x in block_at]
+    reachable = set()
+    while pending:
+        b = pending.pop()
+        if b not in reachable:
+            reachable.add(b)
+            pending.extend(succ[b])
+
+    keep = [True] * len(quadruples)
+    live_out = live_temps(quadruples, blocks, succ, memory)
+    for b, (start, end) in enumerate(blocks):
+        if b not in reachable:
+            for i in range(start, end):
+                keep[i] = quadruples[i][0] == 'ENDFUNC'
+            continue
+        # Escrituras muertas, recorriendo el bloque hacia atrás
+        live = set(live_out[b])
+        for i in range(end - 1, start - 1, -1):
+            quad = quadruples[i]
+            target = writes(quad)
+            if target is not None and memory.scope_of(target) == 'temp':
+                if target not in live:
+                    keep[i] = False
+                    continue
+                live.discard(target)
+            live.update(a for a in reads(quad)
+                        if isinstance(a, int) and memory.scope_of(a) == 'temp')
+
+    return compact(program, keep)
+
+# ————————————————————————————————————————————————
+# Punto de entrada
+# ————————————————————————————————————————————————
+# Límite de rondas: cada pasada puede abrir oportunidades a las demás
+MAX_ROUNDS = 8
+
+def optimize(program) -> Dict[str, int]:
+    """
+    Aplica las optimizaciones sobre un programa ya analizado, antes de
+    guardarlo en caché o ejecutarlo. Las pasadas se repiten mientras
+    alguna cambie el código (p. ej. plegar una condición vuelve constante
+    su GOTOF, y eso deja un bloque inalcanzable).
+    Returns:
+        Estadísticas de cada pasada y cuádruplos antes/después
+    """
+    stats = {'folded': 0, 'jumps': 0, 'removed': 0,
+             'quadruples_before': len(program.quadruples)}
+    for _ in range(MAX_ROUNDS):
+        folded = fold_constants(program)
+        jumps = thread_jumps(program)
+        removed = eliminate_dead_code(program)
+        stats['folded'] += folded
+        stats['jumps'] += jumps
+        stats['removed'] += removed
+        if not (folded or jumps or removed):
+            break
+    stats['quadruples_after'] = len(program.quadruples)
+    # Las pasadas trabajan sobre listas; el resultado vuelve al formato compacto
+    if not isinstance(program.quadruples, QuadStore):
+        program.quadruples = QuadStore(program.quadruples)
+    return stats
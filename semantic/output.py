@@ -0,0 +1,96 @@
+# semantic/output.py
+
+import os
+import sys
+
+# Caracteres acumulados antes de escribir al destino
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+class OutputSink:
+    """
+    Destino de la salida de los estatutos print. El intérprete sólo llama
+    a write() con texto ya formateado y a flush() al terminar el programa.
+    """
+    def write(self, text: str) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.flush()
+
+class StreamSink(OutputSink):
+    """
+    Escribe directamente a un stream de texto. Sin stream usa el sys.stdout
+    vigente en cada escritura, así respeta redirecciones hechas después de
+    crear el sink.
+    """
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def write(self, text: str) -> None:
+        (self.stream or sys.stdout).write(text)
+
+    def flush(self) -> None:
+        (self.stream or sys.stdout).flush()
+
+class FdSink(OutputSink):
+    """Escribe el texto codificado a un descriptor de archivo con os.write."""
+    def __init__(self, fd: int, encoding: str = 'utf-8'):
+        self.fd = fd
+        self.encoding = encoding
+
+    def write(self, text: str) -> None:
+        data = memoryview(text.encode(self.encoding))
+        while data:
+            # os.write puede escribir sólo una parte en pipes y sockets
+            written = os.write(self.fd, data)
+            data = data[written:]
+
+class MemorySink(OutputSink):
+    """Guarda la salida en memoria; getvalue() la devuelve completa."""
+    def __init__(self):
+        self._parts = []
+
+    def write(self, text: str) -> None:
+        self._parts.append(text)
+
+    def getvalue(self) -> str:
+        value = ''.join(self._parts)
+        self._parts = [value]
+        return value
+
+class BufferedSink(OutputSink):
+    """
+    Acumula las escrituras y las pasa a otro sink en un solo bloque cuando
+    el texto pendiente alcanza buffer_size, o al llamar flush().
+    """
+    def __init__(self, sink: OutputSink, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        if buffer_size < 1:
+            raise ValueError("buffer_size debe ser positivo")
+        self.sink = sink
+        self.buffer_size = buffer_size
+        self._parts = []
+        self._size = 0
+
+    def write(self, text: str) -> None:
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size:
+            self._drain()
+
+    def _drain(self) -> None:
+        if self._parts:
+            text = ''.join(self._parts)
+            self._parts = []
+            self._size = 0
+            self.sink.write(text)
+
+    def flush(self) -> None:
+        self._drain()
+        self.sink.flush()
+
+def stdout_sink(buffer_size: int = DEFAULT_BUFFER_SIZE) -> BufferedSink:
+    """Sink por omisión del intérprete: sys.stdout con buffer."""
+    return BufferedSink(StreamSink(), buffer_size)
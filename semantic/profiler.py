@@ -0,0 +1,156 @@
+# semantic/profiler.py
+
+import bisect
+import json
+import time
+from typing import Dict, List
+
+class Profiler:
+    """
+    Perfil de ejecución del motor por tabla. Al crearse envuelve cada paso
+    cargado del Interpreter con un contador y un cronómetro, así que sólo
+    un intérprete perfilado paga ese costo. Los tiempos son propios de
+    cada cuádruplo (GOSUB cuenta el cambio de marco, no la función
+    llamada) e incluyen el costo de la medición, así que sirven para
+    comparar, no como tiempos absolutos. El intérprete se debe crear con
+    fuse=False para que cada cuádruplo se cuente por separado.
+    """
+    def __init__(self, interpreter):
+        if interpreter.fuse:
+            raise ValueError("El perfil requiere un Interpreter creado con fuse=False")
+        self.interpreter = interpreter
+        size = len(interpreter.quadruples)
+        self.counts: List[int] = [0] * size
+        self.times: List[int] = [0] * size   # nanosegundos por cuádruplo
+        interpreter.instrument(self._wrap)
+
+    def _wrap(self, index: int, step):
+        counts = self.counts
+        times = self.times
+        clock = time.perf_counter_ns
+        def profiled(ip):
+            t0 = clock()
+            next_ip = step(ip)
+            times[index] += clock() - t0
+            counts[index] += 1
+            return next_ip
+        return profiled
+
+    # ————————————————————————————————————————————————
+    # Agregados
+    # ————————————————————————————————————————————————
+    def _function_ranges(self):
+        """
+        Returns:
+            lista ordenada de (inicio, fin, nombre); el main va desde el
+            cuádruplo siguiente al último ENDFUNC hasta el final
+        """
+        quads = self.interpreter.quadruples
+        main_start = self.interpreter._main_start()
+        starts = sorted((fe.start_quad, name)
+                        for name, fe in self.interpreter.func_dir.all_functions().items())
+        ranges = []
+        for k, (start, name) in enumerate(starts):
+            end = starts[k + 1][0] if k + 1 < len(starts) else main_start
+            ranges.append((start, end, name))
+        ranges.append((main_start, len(quads), 'main'))
+        return ranges
+
+    def report(self) -> Dict:
+        """
+        Resume los contadores por código de operación, cuádruplo, función
+        y ciclo. Los ciclos se reconocen por sus saltos hacia atrás: un GOTO
+        en el cuádruplo i hacia t <= i cierra el ciclo t..i, y cada vez que
+        se ejecuta es una iteración.
+        """
+        quads = self.interpreter.quadruples
+        counts, times = self.counts, self.times
+        ranges = self._function_ranges()
+        starts = [start for start, _, _ in ranges]
+
+        def function_of(index):
+            k = bisect.bisect_right(starts, index) - 1
+            return ranges[k][2] if k >= 0 else 'main'
+
+        opcodes = {}
+        for index, (op, _, _, _) in enumerate(quads):
+            if counts[index]:
+                stats = opcodes.setdefault(op, [0, 0])
+                stats[0] += counts[index]
+                stats[1] += times[index]
+
+        functions = []
+        for start, end, name in ranges:
+            if name == 'main':
+                calls = 1
+            else:
+                calls = sum(counts[i] for i in range(start, end) if quads[i][0] == 'ENDFUNC')
+            functions.append({
+                'name': name,
+                'calls': calls,
+                'instructions': sum(counts[start:end]),
+                'seconds': sum(times[start:end]) / 1e9,
+            })
+
+        loops = []
+        for index, (op, _, _, target) in enumerate(quads):
+            if op == 'GOTO' and isinstance(target, int) and target <= index:
+                loops.append({
+                    'function': function_of(index),
+                    'start': target,
+                    'end': index,
+                    'iterations': counts[index],
+                    'instructions': sum(counts[target:index + 1]),
+                    'seconds': sum(times[target:index + 1]) / 1e9,
+                })
+
+        return {
+            'instructions': sum(counts),
+            'seconds': sum(times) / 1e9,
+            'opcodes': sorted(
+                ({'op': op, 'count': c, 'seconds': t / 1e9} for op, (c, t) in opcodes.items()),
+                key=lambda x: x['seconds'], reverse=True),
+            'quadruples': sorted(
+                ({'index': i, 'quad': list(quads[i]), 'function': function_of(i),
+                  'count': counts[i], 'seconds': times[i] / 1e9}
+                 for i in range(len(quads)) if counts[i]),
+                key=lambda x: x['seconds'], reverse=True),
+            'functions': sorted(functions, key=lambda x: x['seconds'], reverse=True),
+            'loops': sorted(loops, key=lambda x: x['seconds'], reverse=True),
+        }
+
+def save_profile(report: Dict, path: str) -> None:
+    """Guarda el reporte de Profiler.report() como JSON."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+def print_profile(report: Dict, top: int = 10) -> None:
+    """Imprime las partes más costosas del reporte de Profiler.report()."""
+    total = report['seconds'] or 1e-12
+
+    def share(seconds):
+        return f"{seconds * 1000:>10.2f} ms {seconds / total:>6.1%}"
+
+    print(f"\nPerfil de ejecución: {report['instructions']} instrucciones, "
+          f"{report['seconds'] * 1000:.2f} ms")
+
+    print("\nPor operación:")
+    for item in report['opcodes']:
+        print(f"  {item['op']:<9} {item['count']:>12} {share(item['seconds'])}")
+
+    print("\nPor función:")
+    for item in report['functions']:
+        print(f"  {item['name']:<20} llamadas={item['calls']:<8} "
+              f"{item['instructions']:>12} {share(item['seconds'])}")
+
+    print(f"\nCuádruplos más costosos (top {top}):")
+    for item in report['quadruples'][:top]:
+        quad = ", ".join(repr(x) for x in item['quad'])
+        print(f"  {item['index']:>5} ({quad}) [{item['function']}] "
+              f"{item['count']:>10} {share(item['seconds'])}")
+
+    if report['loops']:
+        print(f"\nCiclos más costosos (top {top}):")
+        for item in report['loops'][:top]:
+            print(f"  {item['start']:>5}..{item['end']:<5} [{item['function']}] "
+                  f"iteraciones={item['iterations']:<10} {share(item['seconds'])}")
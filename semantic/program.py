@@ -0,0 +1,33 @@
+# semantic/program.py
+
+from dataclasses import dataclass
+from typing import Sequence
+
+from semantic.variable_table import VariableTable
+from semantic.function_directory import FunctionDirectory
+from semantic.memory_manager import MemoryManager
+
+@dataclass
+class CompiledProgram:
+    """
+    Resultado de compilar un programa BabyDuck, listo para el Interpreter:
+      - quadruples: cuádruplos generados
+      - global_vars: VariableTable de globales
+      - func_dir: FunctionDirectory con marcos y parámetros
+      - memory: MemoryManager con la tabla de constantes y el uso de segmentos
+    Tiene los mismos atributos que SemanticAnalyzer, así que ambos sirven
+    donde se espera un programa compilado.
+    """
+    quadruples: Sequence[tuple]
+    global_vars: VariableTable
+    func_dir: FunctionDirectory
+    memory: MemoryManager
+
+    @classmethod
+    def from_analyzer(cls, analyzer) -> 'CompiledProgram':
+        return cls(
+            quadruples=analyzer.quadruples,
+            global_vars=analyzer.global_vars,
+            func_dir=analyzer.func_dir,
+            memory=analyzer.memory,
+        )
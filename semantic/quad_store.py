@@ -0,0 +1,154 @@
+# semantic/quad_store.py
+
+from array import array
+from collections.abc import MutableSequence
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# Operando vacío (None); ninguna dirección ni índice de cuádruplo lo alcanza
+EMPTY = -2 ** 31
+
+class QuadStore(MutableSequence):
+    """
+    Cuádruplos guardados por columnas en lugar de como lista de tuplas:
+      - ops: código de la operación de cada cuádruplo (array de bytes)
+      - left, right, result: operandos como enteros de 32 bits (array('i'))
+    Las direcciones y los índices de cuádruplo se guardan tal cual (son
+    no negativos); None es EMPTY y un texto (una cadena de print o el
+    nombre de una función) es -1 - su índice en la tabla de cadenas. Los
+    códigos de operación se asignan en orden de aparición.
+
+    Se comporta como la lista de tuplas (op, izq, der, res) que reemplaza:
+    append, índices, iteración y asignación devuelven y reciben tuplas, así
+    que el optimizador, el enlazador y el intérprete la usan sin cambios.
+    patch() rellena sólo el resultado de un salto, sin armar una tupla.
+    """
+    def __init__(self, quadruples: Iterable[tuple] = ()):
+        self.ops = array('B')
+        self.left = array('i')
+        self.right = array('i')
+        self.result = array('i')
+        self._op_names: List[str] = []
+        self._op_codes: Dict[str, int] = {}
+        self._strings: List[str] = []
+        self._string_index: Dict[str, int] = {}
+        self.extend(quadruples)
+
+    # ————————————————————————————————————————————————
+    # Codificación de operandos
+    # ————————————————————————————————————————————————
+    def _op_code(self, op: str) -> int:
+        code = self._op_codes.get(op)
+        if code is None:
+            if len(self._op_names) > 255:
+                raise ValueError("Demasiadas operaciones distintas para un QuadStore")
+            code = self._op_codes[op] = len(self._op_names)
+            self._op_names.append(op)
+        return code
+
+    def _encode(self, value) -> int:
+        if value is None:
+            return EMPTY
+        if isinstance(value, str):
+            index = self._string_index.get(value)
+            if index is None:
+                index = self._string_index[value] = len(self._strings)
+                self._strings.append(value)
+            return -1 - index
+        if value < 0:
+            raise ValueError(f"Operando negativo {value} en un cuádruplo")
+        return value
+
+    def _decode(self, value):
+        if value >= 0:
+            return value
+        if value == EMPTY:
+            return None
+        return self._strings[-1 - value]
+
+    # ————————————————————————————————————————————————
+    # Protocolo de secuencia
+    # ————————————————————————————————————————————————
+    def __len__(self) -> int:
+        return len(self.ops)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.ops)))]
+        decode = self._decode
+        return (self._op_names[self.ops[index]], decode(self.left[index]),
+                decode(self.right[index]), decode(self.result[index]))
+
+    def __setitem__(self, index, quad) -> None:
+        if isinstance(index, slice):
+            raise TypeError("QuadStore no admite asignación por slices")
+        op, left, right, result = quad
+        encode = self._encode
+        # Se codifica todo antes de escribir: un error no deja el cuádruplo a medias
+        row = (self._op_code(op), encode(left), encode(right), encode(result))
+        self.ops[index], self.left[index], self.right[index], self.result[index] = row
+
+    def __delitem__(self, index) -> None:
+        del self.ops[index]
+        del self.left[index]
+        del self.right[index]
+        del self.result[index]
+
+    def insert(self, index: int, quad) -> None:
+        op, left, right, result = quad
+        encode = self._encode
+        row = (self._op_code(op), encode(left), encode(right), encode(result))
+        self.ops.insert(index, row[0])
+        self.left.insert(index, row[1])
+        self.right.insert(index, row[2])
+        self.result.insert(index, row[3])
+
+    def append(self, quad) -> None:
+        op, left, right, result = quad
+        code = self._op_codes.get(op)
+        if code is None:
+            code = self._op_code(op)
+        # Camino rápido: direcciones e índices se guardan sin pasar por _encode
+        if type(left) is not int or left < 0:
+            left = self._encode(left)
+        if type(right) is not int or right < 0:
+            right = self._encode(right)
+        if type(result) is not int or result < 0:
+            result = self._encode(result)
+        if result > 0x7FFFFFFF or left > 0x7FFFFFFF or right > 0x7FFFFFFF:
+            raise OverflowError("Operando fuera del rango de 32 bits")
+        self.ops.append(code)
+        self.left.append(left)
+        self.right.append(right)
+        self.result.append(result)
+
+    def extend(self, quadruples: Iterable[tuple]) -> None:
+        append = self.append
+        for quad in quadruples:
+            append(quad)
+
+    def __iter__(self) -> Iterator[Tuple]:
+        names = self._op_names
+        strings = self._strings
+
+        def decode(value):
+            if value >= 0:
+                return value
+            return None if value == EMPTY else strings[-1 - value]
+
+        for op, left, right, result in zip(self.ops, self.left, self.right, self.result):
+            yield (names[op], decode(left), decode(right), decode(result))
+
+    def __repr__(self) -> str:
+        return f"QuadStore({len(self.ops)} cuádruplos)"
+
+    # ————————————————————————————————————————————————
+    # Relleno de saltos
+    # ————————————————————————————————————————————————
+    def patch(self, index: int, result) -> None:
+        """Cambia sólo el resultado de un cuádruplo (el destino de un salto o de un GOSUB)."""
+        self.result[index] = self._encode(result)
+
+    def nbytes(self) -> int:
+        """Bytes ocupados por las cuatro columnas, sin contar las tablas de textos."""
+        return sum(column.itemsize * len(column)
+                   for column in (self.ops, self.left, self.right, self.result))
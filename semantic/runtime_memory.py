@@ -0,0 +1,171 @@
+# semantic/runtime_memory.py
+
+from array import array
+from typing import Dict, List
+
+from semantic.memory_manager import FRAME_SCOPES
+
+# Código de tipo de array por tipo de BabyDuck
+TYPECODES = {
+    'int': 'q',
+    'float': 'd',
+    'bool': 'b',
+}
+
+# Rango de los enteros de BabyDuck (array('q'): 64 bits con signo)
+INT_MIN = -2 ** 63
+INT_MAX = 2 ** 63 - 1
+
+class RuntimeMemory:
+    """
+    Memoria de ejecución respaldada por un arreglo tipado por segmento.
+    Cada par ámbito/tipo del MemoryManager tiene su propio array('q'),
+    array('d') o array('b') dimensionado a las direcciones realmente
+    asignadas, de modo que leer o escribir es decodificar la dirección
+    (segmento, desplazamiento) e indexar, sin tablas hash.
+
+    Se comporta como un mapeo dirección -> valor para el código que aún
+    trabaja con direcciones virtuales.
+    """
+    def __init__(self, memory_manager):
+        self.manager = memory_manager
+        self.decode = memory_manager.decode
+        self.segments: List[array] = []
+        self.segment_types: List[str] = []
+        # Índices de los segmentos local/temp, que cambian con cada llamada
+        self.frame_layout: List[tuple] = []
+        # Índice de segmento -> posición dentro de los segmentos de un marco
+        self._frame_positions: Dict[int, int] = {}
+
+        # Los segmentos local/temp iniciales forman el marco del main
+        for index, (scope, var_type) in enumerate(memory_manager.segments()):
+            size = memory_manager.used(scope, var_type)
+            self.segments.append(array(TYPECODES[var_type], [0]) * size)
+            self.segment_types.append(var_type)
+            if scope in FRAME_SCOPES:
+                self._frame_positions[index] = len(self.frame_layout)
+                self.frame_layout.append((index, scope, var_type))
+
+        # Inicializar constantes
+        for value, addr in memory_manager.constants():
+            self[addr] = value
+
+    def locate(self, address: int):
+        """
+        Devuelve (índice de segmento, desplazamiento) validando la dirección.
+        Raises:
+            KeyError: Si la dirección no pertenece a ningún segmento asignado
+        """
+        segment, offset = self.decode(address)
+        if not (0 <= segment < len(self.segments)) or not (0 <= offset < len(self.segments[segment])):
+            raise KeyError(f"Dirección {address} fuera de la memoria asignada")
+        return segment, offset
+
+    def resolve(self, address: int):
+        """
+        Como locate(), pero para cargar código: las direcciones local/temp
+        se validan contra el marco de su función al ejecutarse, no contra
+        el marco activo en este momento.
+        """
+        segment, offset = self.decode(address)
+        if segment in self._frame_positions and offset >= 0:
+            return segment, offset
+        return self.locate(address)
+
+    def frame_slot(self, address: int):
+        """
+        Ubica una dirección local/temp dentro de los segmentos de un marco.
+        Returns:
+            (posición en Frame.segments, desplazamiento)
+        Raises:
+            KeyError: Si la dirección no es local ni temporal
+        """
+        segment, offset = self.decode(address)
+        if segment not in self._frame_positions:
+            raise KeyError(f"Dirección {address} no pertenece a un marco")
+        return self._frame_positions[segment], offset
+
+    def type_of(self, address: int) -> str:
+        """Tipo ('int', 'float' o 'bool') del segmento de la dirección."""
+        return self.segment_types[self.resolve(address)[0]]
+
+    def __getitem__(self, address: int):
+        segment, offset = self.locate(address)
+        return self.segments[segment][offset]
+
+    def __setitem__(self, address: int, value) -> None:
+        segment, offset = self.locate(address)
+        if self.segment_types[segment] != 'float' and isinstance(value, float):
+            # Los segmentos enteros truncan, igual que int / int
+            value = int(value)
+        self.segments[segment][offset] = value
+
+    def __contains__(self, address) -> bool:
+        if not isinstance(address, int):
+            return False
+        try:
+            self.locate(address)
+        except KeyError:
+            return False
+        return True
+
+    def new_frame(self, local_sizes: Dict[str, int], temp_sizes: Dict[str, int]) -> List[array]:
+        """Crea los segmentos local/temp de un marco, en orden de frame_layout."""
+        sizes = {'local': local_sizes, 'temp': temp_sizes}
+        return [array(TYPECODES[var_type], [0]) * sizes[scope].get(var_type, 0)
+                for _, scope, var_type in self.frame_layout]
+
+    def activate(self, frame_segments: List[array]) -> List[array]:
+        """
+        Instala los segmentos de un marco como memoria local/temp actual.
+        Returns:
+            Los segmentos del marco que estaba activo
+        """
+        segments = self.segments
+        previous = []
+        for (index, _, _), seg in zip(self.frame_layout, frame_segments):
+            previous.append(segments[index])
+            segments[index] = seg
+        return previous
+
+    def nbytes(self) -> int:
+        """Bytes ocupados por los valores de todos los segmentos."""
+        return sum(len(seg) * seg.itemsize for seg in self.segments)
+
+
+class Frame:
+    """Registro de activación de una llamada: función y sus segmentos."""
+    __slots__ = ('function', 'segments')
+
+    def __init__(self, function: str, segments: List[array]):
+        self.function = function
+        self.segments = segments
+
+
+class FramePool:
+    """
+    Reserva de marcos de activación por función. Un marco liberado al
+    terminar una llamada se limpia y se reutiliza en la siguiente, de modo
+    que una cadena de llamadas sólo crea tantos marcos como su profundidad
+    máxima.
+    """
+    def __init__(self, memory: RuntimeMemory, func_dir):
+        self._memory = memory
+        self._func_dir = func_dir
+        self._free: Dict[str, List[Frame]] = {}
+        self._blank: Dict[str, List[array]] = {}
+
+    def acquire(self, function: str) -> Frame:
+        free = self._free.get(function)
+        if free:
+            return free.pop()
+        fe = self._func_dir.get_function(function)
+        if function not in self._blank:
+            self._blank[function] = self._memory.new_frame(fe.local_sizes, fe.temp_sizes)
+        return Frame(function, self._memory.new_frame(fe.local_sizes, fe.temp_sizes))
+
+    def release(self, frame: Frame) -> None:
+        for seg, blank in zip(frame.segments, self._blank[frame.function]):
+            if seg:
+                seg[:] = blank
+        self._free.setdefault(frame.function, []).append(frame)
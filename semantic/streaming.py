@@ -0,0 +1,239 @@
+# semantic/streaming.py
+
+from lark import Token
+
+from semantic.analyzer import SemanticAnalyzer, SemanticError
+from semantic.memory_manager import DEFAULT_SEGMENT_BITS
+from semantic.semantic_cube import semantic_cube
+
+class StreamingAnalyzer(SemanticAnalyzer):
+    """
+    Analizador semántico que genera los cuádruplos mientras el parser LALR
+    reduce cada regla, sin construir el árbol de parseo.
+
+    Las acciones de cada regla son las mismas de SemanticAnalyzer; lo que
+    en el modo con árbol se decide al recorrer un nodo (contexto de función,
+    saltos de if/while) aquí se decide observando los tokens conforme se
+    alimentan al parser:
+      - VOID ID abre el contexto y el marco de la función
+      - IF/WHILE registran un marcador; el ')' que cierra la condición
+        emite el GOTOF, ELSE emite el GOTO y el ';' que cierra el estatuto
+        rellena los saltos
+      - las llamadas a funciones aún no declaradas se verifican y se
+        rellenan al terminar (backpatching)
+    La memoria usada crece con la profundidad de anidamiento, no con el
+    tamaño del programa.
+    """
+    def __init__(self, segment_bits: int = DEFAULT_SEGMENT_BITS):
+        super().__init__(segment_bits)
+        # — Estado del flujo de tokens —
+        self.paren_depth = 0
+        self.brace_depth = 0
+        self.controls = []          # if/while abiertos: [token, paréntesis, llaves, fase, inicio]
+        self.deferred_calls = []    # (función, tipos de argumentos) por verificar al final
+        self._expect_function = False
+        self._frame_saved = None
+
+    def analyze(self, code: str) -> 'StreamingAnalyzer':
+        """
+        Parsea y analiza el código en una sola pasada.
+        Raises:
+            lark.UnexpectedInput: Si hay un error de sintaxis
+            SemanticError: Si hay un error semántico
+        """
+        parser = _action_parser()
+        _DISPATCHER.target = self
+        try:
+            interactive = parser.parse_interactive(code)
+            last = None
+            for token in interactive.lexer_thread.lex(interactive.parser_state):
+                self._before_token(token)
+                interactive.feed_token(token)
+                self._after_token(token)
+                last = token
+            interactive.feed_eof(last)
+        finally:
+            _DISPATCHER.target = None
+
+        self._check_calls()
+        self._patch_calls()
+        self._emit_ready(final=True)
+        return self
+
+    # ————————————————————————————————————————————————
+    # Seguimiento de tokens
+    # ————————————————————————————————————————————————
+    def _before_token(self, token: Token):
+        kind = token.type
+        if kind == 'VOID':
+            self._expect_function = True
+        elif kind == 'ID' and self._expect_function:
+            self._expect_function = False
+            self._begin_function(token.value)
+        elif kind == 'ELSE':
+            if self._at_open_control():
+                self._condition_else()
+        elif kind == 'SEMICOLON':
+            if self._at_open_control():
+                control = self.controls.pop()
+                if control[0] == 'IF':
+                    self._condition_end()
+                else:
+                    self._cycle_end(control[4])
+
+    def _after_token(self, token: Token):
+        kind = token.type
+        if kind in ('IF', 'WHILE'):
+            # Tras alimentar el token ya se redujo el estatuto anterior, así
+            # que next_quad es el inicio de la condición
+            self.controls.append([kind, self.paren_depth, self.brace_depth, 'cond', self.next_quad])
+        elif kind == 'LPAREN':
+            self.paren_depth += 1
+        elif kind == 'RPAREN':
+            self.paren_depth -= 1
+            if self.controls:
+                control = self.controls[-1]
+                if control[3] == 'cond' and control[1] == self.paren_depth:
+                    # La condición ya se redujo al alimentar el ')'
+                    self._condition_start()
+                    control[3] = 'body'
+        elif kind == 'LBRACE':
+            self.brace_depth += 1
+        elif kind == 'RBRACE':
+            self.brace_depth -= 1
+        if self.listing is not None:
+            self._emit_ready()
+
+    def _at_open_control(self) -> bool:
+        """Indica si el token actual está al nivel del if/while más interno, tras su bloque."""
+        if not self.controls:
+            return False
+        control = self.controls[-1]
+        return control[3] == 'body' and control[2] == self.brace_depth
+
+    # ————————————————————————————————————————————————
+    # Funciones
+    # ————————————————————————————————————————————————
+    def _begin_function(self, fname: str):
+        if self.func_dir.has_function(fname):
+            raise SemanticError(f"Función '{fname}' ya declarada.")
+        self.func_dir.add_function(
+            name=fname,
+            return_type='void',
+            param_types=[],
+            start_quad=self.next_quad
+        )
+        self.placed_functions.add(fname)
+        self.current_function = fname
+        self._frame_saved = self.memory.begin_frame()
+
+    def param_list(self, items):
+        params = super().param_list(items)
+        fname = self.current_function
+        fe = self.func_dir.get_function(fname)
+        for name, t in params:
+            if fe.variables.has_variable(name):
+                raise SemanticError(f"Parámetro '{name}' repetido en función '{fname}'.")
+            addr = self.memory.allocate('local', t)
+            fe.variables.add_variable(name, t, addr)
+            fe.param_addrs.append(addr)
+            fe.param_types.append(t)
+        return params
+
+    def func(self, items):
+        super().func(items)
+        local_sizes, temp_sizes = self.memory.end_frame(self._frame_saved)
+        self.func_dir.set_frame_sizes(self.current_function, local_sizes, temp_sizes)
+        self.current_function = None
+        return None
+
+    def f_call(self, items):
+        """
+        Genera ERA / PARAM / GOSUB sin exigir que la función ya esté
+        declarada; el número y tipo de los argumentos se verifican al final.
+        """
+        fname = items[0].value
+        # items: ID LPAREN (expr (COMMA expr)*)? RPAREN SEMICOLON
+        args = [x for x in items[2:-2] if not (isinstance(x, Token) and x.type == 'COMMA')]
+        count = len(args)
+
+        actual_addrs = [self.operands.pop() for _ in range(count)][::-1]
+        actual_types = [self.types.pop()     for _ in range(count)][::-1]
+
+        self.quadruples.append(('ERA', None, None, fname))
+        self.next_quad += 1
+        for idx, addr in enumerate(actual_addrs, start=1):
+            self.quadruples.append(('PARAM', addr, None, idx))
+            self.next_quad += 1
+            self.memory.free_temp(addr)
+
+        self.deferred_calls.append((fname, actual_types))
+        target = None
+        if fname in self.placed_functions:
+            target = self.func_dir.get_function(fname).start_quad
+        else:
+            self.pending_calls.append((self.next_quad, fname))
+        self.quadruples.append(('GOSUB', None, None, target))
+        self.next_quad += 1
+        return None
+
+    def _check_calls(self):
+        """Verifica las llamadas diferidas contra las firmas ya completas."""
+        for fname, actual_types in self.deferred_calls:
+            if not self.func_dir.has_function(fname):
+                raise SemanticError(f"Función '{fname}' no declarada.")
+            fe = self.func_dir.get_function(fname)
+            if len(actual_types) != len(fe.param_types):
+                raise SemanticError(
+                    f"Número incorrecto de argumentos para '{fname}': "
+                    f"esperados {len(fe.param_types)}, recibidos {len(actual_types)}."
+                )
+            for idx, (atype, expected) in enumerate(zip(actual_types, fe.param_types), start=1):
+                if semantic_cube[expected][atype]['='] == 'error':
+                    raise SemanticError(
+                        f"Arg {idx} inválido para '{fname}': se esperaba {expected}, se obtuvo {atype}."
+                    )
+        self.deferred_calls = []
+
+    # ————————————————————————————————————————————————
+    # Reglas que no deben acumular resultados
+    # ————————————————————————————————————————————————
+    def statement(self, items):
+        return None
+
+    def body(self, items):
+        return None
+
+    def funcs(self, items):
+        return None
+
+class _ActionDispatcher:
+    """
+    Transformer fijo con el que se construye el parser de acciones: cada
+    regla o terminal que StreamingAnalyzer sabe manejar se reenvía al
+    analizador activo, así las tablas LALR se construyen una sola vez por
+    proceso. Las reglas sin acción producen un Tree como de costumbre.
+    """
+    target = None
+
+    def __getattr__(self, name):
+        if name.startswith('_') or not callable(getattr(StreamingAnalyzer, name, None)):
+            raise AttributeError(name)
+        def action(arg):
+            return getattr(self.target, name)(arg)
+        return action
+
+_DISPATCHER = _ActionDispatcher()
+_PARSER = None
+
+def _action_parser():
+    """Parser LALR con las acciones semánticas enlazadas, creado al primer uso."""
+    global _PARSER
+    if _PARSER is None:
+        import babyduck
+        _PARSER = babyduck.build_parser(transformer=_DISPATCHER)
+    return _PARSER
+
+def analyze_streaming(code: str, segment_bits: int = DEFAULT_SEGMENT_BITS) -> StreamingAnalyzer:
+    """Analiza un programa BabyDuck en modo sin árbol."""
+    return StreamingAnalyzer(segment_bits).analyze(code)
@@ -0,0 +1,94 @@
+# semantic/superinstructions.py
+
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from semantic.interpreter import ARITHMETIC_OPS, COMPARISON_OPS
+from semantic.optimizer import _live_after, basic_blocks, live_temps, successors
+
+# Pares de cuádruplos que el motor por tabla ejecuta como una sola instrucción
+COMPARE_BRANCH = 'compare_branch'   # a < b -> t ; GOTOF t
+OP_INTO_VAR = 'op_into_var'         # a + b -> t ; = t -> x
+PRINT_LINE = 'print_line'           # print v ; PRINT_END
+FUSIONS = (COMPARE_BRANCH, OP_INTO_VAR, PRINT_LINE)
+
+def fusion_kind(quadruples, index: int) -> Optional[str]:
+    """
+    Superinstrucción que forman el cuádruplo index y el siguiente, o None.
+    Args:
+        quadruples: Cuádruplos enlazados
+        index: Índice del primer cuádruplo del par
+    """
+    if index + 1 >= len(quadruples):
+        return None
+    op, _, _, result = quadruples[index]
+    next_op, next_left, _, _ = quadruples[index + 1]
+    if op in COMPARISON_OPS and next_op == 'GOTOF' and next_left == result:
+        return COMPARE_BRANCH
+    if op in ARITHMETIC_OPS and next_op == '=' and next_left == result:
+        return OP_INTO_VAR
+    if op == 'print' and next_op == 'PRINT_END':
+        return PRINT_LINE
+    return None
+
+def plan_fusions(quadruples, func_dir, memory) -> List[Optional[Tuple[str, bool]]]:
+    """
+    Decide, para cada cuádruplo, si se carga fusionado con el siguiente.
+    Cada par sigue existiendo por separado: el cuádruplo index + 1 conserva
+    su propia instrucción para los saltos que llegan directo a él, así que
+    fusionar nunca cambia a dónde se puede saltar.
+    En COMPARE_BRANCH y OP_INTO_VAR el resultado intermedio es un
+    temporal; si nadie lo lee después del par, la superinstrucción ni
+    siquiera lo escribe.
+    Args:
+        quadruples: Cuádruplos enlazados
+        func_dir: Directorio de funciones
+        memory: MemoryManager del programa
+    Returns:
+        Por índice, (tipo de fusión, si se escribe el temporal) o None
+    """
+    plan: List[Optional[Tuple[str, bool]]] = [None] * len(quadruples)
+    kinds = [fusion_kind(quadruples, i) for i in range(len(quadruples))]
+    if not any(kinds):
+        return plan
+
+    blocks = basic_blocks(quadruples, func_dir)
+    live_out = live_temps(quadruples, blocks, successors(quadruples, blocks), memory)
+    block_of = [0] * len(quadruples)
+    for b, (start, end) in enumerate(blocks):
+        for i in range(start, end):
+            block_of[i] = b
+
+    for i, kind in enumerate(kinds):
+        if kind is None:
+            continue
+        keep_temp = False
+        if kind != PRINT_LINE:
+            temp = quadruples[i][3]
+            b = block_of[i + 1]
+            keep_temp = (memory.scope_of(temp) != 'temp'
+                         or _live_after(quadruples, i + 1, blocks[b][1], temp, live_out[b]))
+        plan[i] = (kind, keep_temp)
+    return plan
+
+def fusion_stats(plan) -> Dict[str, int]:
+    """
+    Cuenta las fusiones de un plan de plan_fusions().
+    Returns:
+        {tipo: cantidad} más 'temp_writes_elided'
+    """
+    stats = Counter(entry[0] for entry in plan if entry is not None)
+    counts = {kind: stats.get(kind, 0) for kind in FUSIONS}
+    counts['temp_writes_elided'] = sum(
+        1 for entry in plan if entry is not None and entry[0] != PRINT_LINE and not entry[1]
+    )
+    return counts
+
+def fallthrough(quadruples, index: int) -> int:
+    """
+    Siguiente instrucción real al pasar de largo a index: si ahí hay un
+    GOTO, su destino, así el final de un ciclo no despacha el salto.
+    """
+    if index < len(quadruples) and quadruples[index][0] == 'GOTO':
+        return quadruples[index][3]
+    return index
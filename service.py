@@ -0,0 +1,360 @@
+"""
+Servicio local que compila y ejecuta programas BabyDuck.
+
+Escucha en localhost por TCP o en un socket Unix y recibe una petición
+JSON por línea:
+    {"id": 1, "action": "check" | "quads" | "run", "source": "program ...",
+     "optimize": true, "timeout": 2.0}
+y responde una línea JSON por petición, con el mismo id:
+    check: {"id", "ok", "diagnostics"}
+    quads: además "quadruples": [[op, izq, der, res], ...]
+    run:   además "output", "status" y "timings"
+Las respuestas de una conexión pueden llegar en otro orden que las
+peticiones. Con una petición mal formada, o si el servicio está saturado
+("error": "busy") o el trabajo excede su tiempo ("error": "timeout"), la
+respuesta trae "ok": false.
+
+El parseo, el análisis y la ejecución corren en un ProcessPoolExecutor
+cuyos procesos construyen el parser de babyduck.py una sola vez al
+arrancar.
+
+Uso:
+    python service.py [--host 127.0.0.1] [--port 8765] [--unix RUTA]
+                      [--workers 4] [--max-pending 64] [--timeout 5.0]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from semantic.interpreter import ENGINES
+
+ACTIONS = ('check', 'quads', 'run')
+
+DEFAULT_PORT = 8765
+# Segundos por trabajo si la petición no indica otro límite
+DEFAULT_TIMEOUT = 5.0
+# Peticiones aceptadas esperando o en ejecución; las siguientes reciben "busy"
+DEFAULT_MAX_PENDING = 64
+# Peticiones en curso por conexión; al llegar al límite se deja de leer
+# la conexión y el cliente queda frenado por TCP
+DEFAULT_PER_CONNECTION = 8
+# Tamaño máximo de una línea de petición
+MAX_REQUEST_BYTES = 4 * 1024 * 1024
+
+class JobTimeout(Exception):
+    """Lanzada dentro del proceso de trabajo cuando un trabajo excede su tiempo."""
+    pass
+
+# ————————————————————————————————————————————————
+# Procesos de trabajo
+# ————————————————————————————————————————————————
+_engine = 'table'
+
+def _warm_worker(engine):
+    """Inicializador del pool: construye el parser una vez por proceso."""
+    global _engine
+    _engine = engine
+    # Ctrl+C llega a todo el grupo de procesos; sólo el servidor lo atiende
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import babyduck  # noqa: F401 - tablas LALR de este proceso
+    import main  # noqa: F401
+    import semantic.analyzer  # noqa: F401
+
+def _ready():
+    return os.getpid()
+
+def _on_alarm(signum, frame):
+    raise JobTimeout()
+
+def serve_request(action, source, optimize=True, timeout=DEFAULT_TIMEOUT):
+    """
+    Atiende una petición en el proceso actual. El límite de tiempo se
+    aplica con SIGALRM, así que un ciclo infinito no deja ocupado al proceso.
+    Returns:
+        Respuesta JSON, sin el id
+    """
+    from lark import UnexpectedInput
+    from main import compile_error_message, compile_source
+    from semantic.analyzer import SemanticError
+    from semantic.interpreter import Interpreter
+    from semantic.output import MemorySink
+
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    timings = {}
+    output = MemorySink()
+    try:
+        t0 = time.perf_counter()
+        try:
+            program = compile_source(source, optimize=optimize, exit_on_error=False)
+        except (UnexpectedInput, SemanticError, MemoryError) as e:
+            return {'ok': False, 'diagnostics': [_diagnostic(e, compile_error_message(e))]}
+        t1 = time.perf_counter()
+        timings['compile'] = t1 - t0
+        response = {'ok': True, 'diagnostics': []}
+        if action == 'quads':
+            response['quadruples'] = [list(quad) for quad in program.quadruples]
+        elif action == 'run':
+            try:
+                Interpreter(program.quadruples, program.global_vars, program.func_dir,
+                            program.memory, engine=_engine, output=output).execute()
+                response['status'] = 'ok'
+            except JobTimeout:
+                raise
+            except Exception as e:
+                response.update(ok=False, status='runtime_error', error=f"{type(e).__name__}: {e}")
+            response['output'] = output.getvalue()
+            timings['execute'] = time.perf_counter() - t1
+            response['timings'] = timings
+        return response
+    except JobTimeout:
+        return {'ok': False, 'error': 'timeout', 'output': output.getvalue()}
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def _diagnostic(error, message):
+    from lark import UnexpectedInput
+    diagnostic = {'message': message}
+    if isinstance(error, UnexpectedInput):
+        diagnostic.update(kind='syntax', line=error.line, column=error.column)
+    elif isinstance(error, MemoryError):
+        diagnostic['kind'] = 'memory'
+    else:
+        diagnostic['kind'] = 'semantic'
+    return diagnostic
+
+# ————————————————————————————————————————————————
+# Servidor
+# ————————————————————————————————————————————————
+class BabyDuckService:
+    """
+    Servidor asyncio que reparte las peticiones entre procesos ya
+    calentados. A lo más `workers` trabajos corren a la vez; hasta
+    max_pending más esperan turno y, pasado ese límite, la petición se
+    rechaza al momento con "busy" en lugar de formar una cola sin fin.
+    """
+    def __init__(self, workers=None, max_pending=DEFAULT_MAX_PENDING,
+                 timeout=DEFAULT_TIMEOUT, per_connection=DEFAULT_PER_CONNECTION,
+                 engine='table'):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.per_connection = per_connection
+        self.engine = engine
+        self.pending = 0
+        self.stats = {'requests': 0, 'busy': 0, 'timeouts': 0}
+        self._pool = None
+        self._slots = None
+        self._server = None
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT, path=None):
+        """Arranca los procesos de trabajo y empieza a escuchar."""
+        loop = asyncio.get_running_loop()
+        self._pool = self._new_pool()
+        self._slots = asyncio.Semaphore(self.workers)
+        # El pool crea sus procesos bajo demanda: se piden todos ahora
+        await asyncio.gather(*(loop.run_in_executor(self._pool, _ready)
+                               for _ in range(self.workers)))
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._connection, path=path,
+                                                           limit=MAX_REQUEST_BYTES)
+        else:
+            self._server = await asyncio.start_server(self._connection, host, port,
+                                                      limit=MAX_REQUEST_BYTES)
+        return self._server
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+
+    async def _connection(self, reader, writer):
+        in_flight = asyncio.Semaphore(self.per_connection)
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                await in_flight.acquire()
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    in_flight.release()
+                    await self._send(writer, write_lock, {'ok': False, 'error': 'request too large'})
+                    break
+                if not line:
+                    in_flight.release()
+                    break
+                task = asyncio.create_task(self._respond(line, writer, write_lock, in_flight))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, line, writer, write_lock, in_flight):
+        try:
+            response = await self.dispatch(line)
+            await self._send(writer, write_lock, response)
+        except ConnectionError:
+            pass
+        finally:
+            in_flight.release()
+
+    async def _send(self, writer, write_lock, response):
+        async with write_lock:
+            writer.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b"\n")
+            await writer.drain()
+
+    async def dispatch(self, line):
+        """Atiende una línea de petición y devuelve la respuesta."""
+        self.stats['requests'] += 1
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("la petición debe ser un objeto JSON")
+        except ValueError as e:
+            return {'ok': False, 'error': f"bad request: {e}"}
+        request_id = request.get('id')
+        action = request.get('action', 'run')
+        source = request.get('source')
+        if action not in ACTIONS or not isinstance(source, str):
+            return {'id': request_id, 'ok': False,
+                    'error': f"bad request: se necesita source y action en {ACTIONS}"}
+        try:
+            timeout = float(request.get('timeout', self.timeout))
+        except (TypeError, ValueError):
+            timeout = math.nan
+        # Con 0 setitimer apagaría la alarma; negativo o NaN fallaría en el proceso
+        if not (math.isfinite(timeout) and timeout > 0):
+            return {'id': request_id, 'ok': False,
+                    'error': "bad request: timeout debe ser un número positivo"}
+        timeout = min(timeout, self.timeout)
+
+        if self.pending >= self.workers + self.max_pending:
+            self.stats['busy'] += 1
+            return {'id': request_id, 'ok': False, 'error': 'busy'}
+        self.pending += 1
+        t0 = time.perf_counter()
+        try:
+            await self._slots.acquire()
+            try:
+                job = self._pool.submit(serve_request, action, source,
+                                        bool(request.get('optimize', True)), timeout)
+            except BrokenProcessPool as e:
+                # Un proceso murió (p. ej. por memoria): el pool ya no sirve
+                # y se reemplaza para las peticiones siguientes
+                self._slots.release()
+                self._replace_pool()
+                return {'id': request_id, 'ok': False,
+                        'error': f"worker error: {type(e).__name__}: {e}"}
+            except BaseException:
+                self._slots.release()
+                raise
+            # El turno se devuelve cuando el proceso termina el trabajo, no
+            # cuando se deja de esperarlo: así nunca corren más de `workers`
+            job.add_done_callback(self._release_slot(asyncio.get_running_loop()))
+            broken_pool = self._pool
+            try:
+                # El proceso corta el trabajo con SIGALRM; esta espera
+                # extra sólo cubre un proceso que no responde
+                response = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job)),
+                                                  timeout + 1.0)
+            except asyncio.TimeoutError:
+                response = {'ok': False, 'error': 'timeout'}
+            except Exception as e:
+                # El trabajo falló fuera de serve_request, p. ej. BrokenProcessPool
+                if isinstance(e, BrokenProcessPool) and self._pool is broken_pool:
+                    self._replace_pool()
+                response = {'ok': False, 'error': f"worker error: {type(e).__name__}: {e}"}
+        finally:
+            self.pending -= 1
+        if response.get('error') == 'timeout':
+            self.stats['timeouts'] += 1
+        response['id'] = request_id
+        response['elapsed'] = time.perf_counter() - t0
+        return response
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker,
+                                   initargs=(self.engine,))
+
+    def _replace_pool(self):
+        broken = self._pool
+        self._pool = self._new_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _release_slot(self, loop):
+        """Callback de un trabajo del pool: libera su turno desde el hilo del loop."""
+        slots = self._slots
+
+        def release(job):
+            try:
+                loop.call_soon_threadsafe(slots.release)
+            except RuntimeError:
+                pass  # el loop ya terminó
+        return release
+
+async def open_connection(host='127.0.0.1', port=DEFAULT_PORT, path=None):
+    """Abre una conexión de cliente al servicio (socket Unix si se da path)."""
+    if path is not None:
+        return await asyncio.open_unix_connection(path, limit=MAX_REQUEST_BYTES)
+    return await asyncio.open_connection(host, port, limit=MAX_REQUEST_BYTES)
+
+async def _serve(args):
+    service = BabyDuckService(workers=args.workers, max_pending=args.max_pending,
+                              timeout=args.timeout, engine=args.engine)
+    server = await service.start(args.host, args.port, args.unix)
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"Servicio BabyDuck en {where} con {service.workers} procesos", file=sys.stderr)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    async with server:
+        await stop.wait()
+    await service.close()
+    if args.unix:
+        try:
+            os.remove(args.unix)
+        except OSError:
+            pass
+    print(f"Servicio detenido: {service.stats}", file=sys.stderr)
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--host", default="127.0.0.1", help="dirección TCP (por omisión: 127.0.0.1)")
+    arg_parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                            help=f"puerto TCP (por omisión: {DEFAULT_PORT})")
+    arg_parser.add_argument("--unix", metavar="RUTA", help="escucha en un socket Unix en lugar de TCP")
+    arg_parser.add_argument("--workers", type=int, default=None,
+                            help="procesos de trabajo (por omisión: uno por núcleo)")
+    arg_parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING,
+                            help="peticiones en espera antes de responder busy "
+                                 f"(por omisión: {DEFAULT_MAX_PENDING})")
+    arg_parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                            help=f"segundos máximos por trabajo (por omisión: {DEFAULT_TIMEOUT})")
+    arg_parser.add_argument("--engine", choices=ENGINES, default="table",
+                            help="motor de ejecución (por omisión: table)")
+    args = arg_parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        arg_parser.error("--workers debe ser al menos 1")
+    if not (math.isfinite(args.timeout) and args.timeout > 0):
+        arg_parser.error("--timeout debe ser un número positivo")
+    asyncio.run(_serve(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# test/batch_vs_scalar.py
+"""
+Compara --batch contra el intérprete escalar: ejecuta el programa con
+semantic/batch.py y, por separado, una vez por carril con Interpreter
+sembrando las mismas globales. Cada carril debe dar la misma salida, el
+mismo error y las mismas globales finales.
+
+Uso:
+    python test/batch_vs_scalar.py test/batch_overflow.bd test/batch_overflow.json
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import compile_source
+from semantic.batch import run_batch
+from semantic.interpreter import Interpreter
+from semantic.output import MemorySink
+
+FOOTER = "\nPROGRAMA TERMINADO\n"
+
+def run_scalar(program, values):
+    """Salida, error y globales finales de un carril en el motor por tabla."""
+    output = MemorySink()
+    interpreter = Interpreter(program.quadruples, program.global_vars, program.func_dir,
+                              program.memory, output=output)
+    variables = program.global_vars.all_variables()
+    for name, value in values.items():
+        interpreter.memory_values[variables[name].address] = value
+    error = None
+    try:
+        interpreter.execute()
+    except Exception as e:
+        error = str(e)
+    text = output.getvalue()
+    if text.endswith(FOOTER):
+        text = text[:-len(FOOTER)]
+    globals_ = {name: interpreter.memory_values[entry.address] for name, entry in variables.items()}
+    return text, error, globals_
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print(__doc__.strip().splitlines()[-1].strip())
+        return 2
+    with open(argv[0], 'r', encoding='utf-8') as f:
+        program = compile_source(f.read(), exit_on_error=False)
+    with open(argv[1], 'r', encoding='utf-8') as f:
+        inputs = json.load(f)
+
+    result = run_batch(program, inputs)
+    mismatches = 0
+    for lane in range(result.lanes):
+        values = {name: v[lane] if isinstance(v, list) else v for name, v in inputs.items()}
+        text, error, globals_ = run_scalar(program, values)
+        batch_globals = {name: vector[lane].item() for name, vector in result.globals.items()}
+        batch = (result.outputs[lane], result.errors.get(lane))
+        same = batch == (text, error) and (error is not None or batch_globals == globals_)
+        if not same:
+            mismatches += 1
+            print(f"carril {lane}: DISTINTO\n  lote:    {batch!r} {batch_globals}\n"
+                  f"  escalar: {(text, error)!r} {globals_}")
+        else:
+            print(f"carril {lane}: igual ({error or text.strip()})")
+    print(f"{result.lanes - mismatches}/{result.lanes} carriles iguales")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())